@@ -6,8 +6,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_session import Session # <-- Import Session
 from flask_login import LoginManager
+from app.database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 sess = Session() # <-- Create a Session instance
 login_manager = LoginManager()
@@ -36,7 +37,12 @@ def create_app(config_class=Config):
     except OSError:
         pass
 
-    db.init_app(app)
+    from app import logging_setup
+    logging_setup.init_app(app)  # first, so everything below logs through it
+    from app import database
+    database.init_app(app)  # db.init_app plus engine tuning
+    from app import sharding
+    sharding.init_app(app)
     migrate.init_app(app, db)
     sess.init_app(app) # <-- Initialize the session extension
     login_manager.init_app(app)
@@ -57,10 +63,29 @@ def create_app(config_class=Config):
 
     from app.routes import bp as main_bp
     from app.auth import bp as auth_bp
+    from app.feeds import bp as feeds_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(feeds_bp)
+
+    from app import metrics
+    metrics.init_app(app)
+
+    from app import compression
+    compression.init_app(app)
+
+    from app import assets
+    assets.init_app(app)  # content-hashed static files and asset_url()
+
+    from app import nplusone
+    nplusone.init_app(app)
 
     from app import models
 
+    # Optional in-process calendar sync (single-worker deployments only)
+    if app.config.get('CALENDAR_SYNC_INTERVAL'):
+        from app.services import calendar_sync
+        calendar_sync.start_scheduler(app, app.config['CALENDAR_SYNC_INTERVAL'])
+
     return app
\ No newline at end of file
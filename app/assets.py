@@ -0,0 +1,159 @@
+# app/assets.py
+"""
+Content-hashed static assets.
+
+build() copies every CSS and JS file under app/static, plus the
+node_modules files the templates reference, to app/static/dist under a
+name that includes a hash of its content (css/main.css ->
+css/main.1a2b3c4d5e6f.css). CSS @imports of local files are inlined, so
+main.css loads as one file. Each copy gets .gz and, when the brotli
+package is installed, .br variants. manifest.json maps the original paths
+to the hashed ones.
+
+Templates link assets with asset_url('css/main.css'). With a manifest
+(and ASSETS_HASHED, outside debug mode) that points at the hashed copy,
+served from /static/dist with the precompressed variant the client
+accepts and a long immutable Cache-Control. Otherwise it is the plain
+static URL, so the app works without running the build.
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+from flask import current_app, send_from_directory, url_for
+from app import compression
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+HASHED_EXTENSIONS = ('.css', '.js')
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+# asset_url('...') calls in the templates, for the node_modules files
+ASSET_REFERENCE = re.compile(r"""asset_url\(\s*['"]([^'"]+)['"]\s*\)""")
+CSS_IMPORT = re.compile(r"""@import\s+(?:url\(\s*)?['"]?([^'")\s;]+)['"]?\s*\)?\s*;""")
+
+_manifests = {}  # path -> (mtime, mapping)
+
+def _dist_folder(app):
+    return os.path.join(app.static_folder, 'dist')
+
+def _node_modules_folder(app):
+    return os.path.join(app.root_path, '..', 'node_modules')
+
+def _inline_imports(path, seen=()):
+    """CSS at path with its local @imports replaced by their (inlined) content."""
+    with open(path, encoding='utf-8') as f:
+        css = f.read()
+
+    def replace(match):
+        target = match.group(1)
+        imported = os.path.normpath(os.path.join(os.path.dirname(path), target))
+        if '//' in target or imported in seen or not os.path.isfile(imported):
+            return match.group(0)
+        return _inline_imports(imported, seen + (path,))
+    return CSS_IMPORT.sub(replace, css)
+
+def _sources(app):
+    """Original asset path -> file on disk."""
+    sources = {}
+    dist = _dist_folder(app)
+    for root, dirs, files in os.walk(app.static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in files:
+            if name.endswith(HASHED_EXTENSIONS):
+                path = os.path.join(root, name)
+                sources[os.path.relpath(path, app.static_folder).replace(os.sep, '/')] = path
+    for root, dirs, files in os.walk(app.template_folder):
+        for name in files:
+            with open(os.path.join(root, name), encoding='utf-8') as f:
+                for filename in ASSET_REFERENCE.findall(f.read()):
+                    if filename.startswith('node_modules/'):
+                        path = os.path.join(_node_modules_folder(app), filename[len('node_modules/'):])
+                        if os.path.isfile(path):
+                            sources[filename] = path
+                        else:
+                            logger.warning('Asset %s not found; it will be served unhashed', filename)
+    return sources
+
+def build(app):
+    """
+    Rebuilds app/static/dist and its manifest. Returns one
+    {'path', 'hashed', 'bytes', 'gzip', 'br'} dict per asset (compressed
+    sizes are None when that variant wasn't written).
+    """
+    dist = _dist_folder(app)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+    manifest, report = {}, []
+    for filename, path in sorted(_sources(app).items()):
+        if filename.endswith('.css'):
+            data = _inline_imports(os.path.abspath(path)).encode('utf-8')
+        else:
+            with open(path, 'rb') as f:
+                data = f.read()
+        stem, extension = os.path.splitext(filename)
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+        target = os.path.join(dist, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        sizes = {'path': filename, 'hashed': hashed, 'bytes': len(data), 'gzip': None, 'br': None}
+        for encoding in compression.available_encodings():
+            compressed = compression.compress(data, encoding)
+            if len(compressed) < len(data):
+                with open(target + PRECOMPRESSED[encoding], 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+        manifest[filename] = hashed
+        report.append(sizes)
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    _manifests.clear()
+    return report
+
+def _manifest():
+    path = os.path.join(_dist_folder(current_app), MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _manifests.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = _manifests[path] = (mtime, json.load(f))
+    return cached[1]
+
+def asset_url(filename):
+    """URL of a static asset: its content-hashed copy when built, else the plain static URL."""
+    if current_app.config.get('ASSETS_HASHED', True) and not current_app.debug:
+        hashed = _manifest().get(filename)
+        if hashed:
+            return url_for('dist_asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+def dist_asset(filename):
+    """A hashed asset, precompressed when the client accepts it; immutable, so cached for ASSETS_MAX_AGE."""
+    dist = _dist_folder(current_app)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    built = [encoding for encoding, suffix in PRECOMPRESSED.items()
+             if os.path.isfile(os.path.join(dist, filename + suffix))]
+    encoding = compression.negotiate(built) if built else None
+    max_age = current_app.config.get('ASSETS_MAX_AGE', 31536000)
+    response = send_from_directory(dist, filename + PRECOMPRESSED[encoding] if encoding else filename,
+                                   mimetype=mimetype, max_age=max_age)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+def init_app(app):
+    app.add_url_rule('/static/dist/<path:filename>', 'dist_asset', dist_asset)
+    app.add_template_global(asset_url)
@@ -2,8 +2,10 @@
 
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import select
 from app.models import User, Company, Invitation
 from app import db
+from app import sharding
 import re
 
 bp = Blueprint('auth', __name__)
@@ -27,6 +29,8 @@ def register():
             # Handle invitation-based registration
             from app.models import Invitation
             
+            # In sharded mode, continue on the shard that issued the invitation
+            sharding.route_to(select(Invitation).filter_by(code=invitation_code))
             invitation = Invitation.query.filter_by(code=invitation_code).first()
             
             if not invitation:
@@ -49,8 +53,8 @@ def register():
             if not all([name, password]):
                 return {'success': False, 'error': 'Name and password are required'}, 400
             
-            # Check if user already exists
-            if User.query.filter_by(email=email).first():
+            # Check if user already exists (on any shard)
+            if sharding.first(select(User).filter_by(email=email)):
                 return {'success': False, 'error': 'User with this email already exists'}, 400
             
             # Create user
@@ -89,8 +93,8 @@ def register():
             if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
                 return {'success': False, 'error': 'Invalid email format'}, 400
             
-            # Check if user already exists
-            if User.query.filter_by(email=email).first():
+            # Check if user already exists (on any shard)
+            if sharding.first(select(User).filter_by(email=email)):
                 return {'success': False, 'error': 'User with this email already exists'}, 400
             
             company = None
@@ -102,10 +106,12 @@ def register():
                 if not validate_domain(email, company_domain):
                     return {'success': False, 'error': 'Email domain must match company domain'}, 400
                 
-                # Check if company exists, create if not
+                # Check if company exists, create if not; in sharded mode the
+                # request moves to the company's (existing or newly assigned) shard
+                sharding.route_to(select(Company).filter_by(domain=company_domain))
                 company = Company.query.filter_by(domain=company_domain).first()
                 if not company:
-                    company = Company(name=company_name, domain=company_domain)
+                    company = Company(id=sharding.new_company_id(), name=company_name, domain=company_domain)
                     db.session.add(company)
                     db.session.flush()  # Get the company ID
                 
@@ -148,6 +154,9 @@ def login():
         if not email or not password:
             return {'success': False, 'error': 'Email and password are required'}, 400
         
+        # In sharded mode, continue on the shard holding this account (or invitation)
+        sharding.route_to(select(User).filter_by(email=email), select(Invitation).filter_by(code=password))
+        
         # First, check if this might be an invitation code
         invitation = Invitation.query.filter_by(code=password).first()
         
@@ -202,7 +211,7 @@ def check_domain():
         return {'success': False, 'error': 'Domain is required'}, 400
     
     # For now, allow any domain. In production, you might want to whitelist specific domains
-    company = Company.query.filter_by(domain=domain).first()
+    company = sharding.first(select(Company).filter_by(domain=domain))
     
     return {
         'success': True,
@@ -0,0 +1,140 @@
+# app/compression.py
+"""
+Response compression.
+
+An after_request hook compresses JSON and text responses (API, pages,
+calendar feeds, /metrics) using the client's Accept-Encoding. It uses brotli
+when the optional brotli package is installed, and gzip otherwise. Small
+bodies and bodies that don't shrink are sent as they are. Streamed responses
+(the .ics feeds) are compressed chunk by chunk as they are generated. Files
+sent with send_file are skipped; static assets come precompressed from
+build_assets.py instead (see app/assets.py).
+
+Strong ETags become weak on compressed responses, since the bytes differ
+from the uncompressed body while the content is the same.
+"""
+
+import gzip
+import threading
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Content types worth compressing
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/calendar',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml'
+}
+
+_lock = threading.Lock()
+_stats = {}  # encoding -> [responses, bytes in, bytes out]
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def negotiate(encodings):
+    """The request's preferred encoding among `encodings` (ties go to the first), or None."""
+    if not request.accept_encodings:
+        return None
+    return request.accept_encodings.best_match(encodings)
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if level is None else level)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+def get_stats():
+    with _lock:
+        return {encoding: list(values) for encoding, values in _stats.items()}
+
+def _count(encoding, size_in, size_out):
+    with _lock:
+        counts = _stats.setdefault(encoding, [0, 0, 0])
+        counts[0] += 1
+        counts[1] += size_in
+        counts[2] += size_out
+
+def _compress_stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        write, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+        write, finish = compressor.compress, compressor.flush
+    size_in = size_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            size_in += len(chunk)
+            data = write(chunk)
+            if data:
+                size_out += len(data)
+                yield data
+        data = finish()
+        size_out += len(data)
+        yield data
+        _count(encoding, size_in, size_out)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+def _compress_response(response):
+    config = current_app.config
+    if not config.get('COMPRESSION_ENABLED', True):
+        return response
+    if response.status_code == 304:
+        # Keep the validator the client got with the compressed body
+        if negotiate(available_encodings()):
+            _weaken_etag(response)
+        return response
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 206)
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(available_encodings())
+    if encoding is None:
+        return response
+    level = config.get('COMPRESSION_BROTLI_QUALITY', 5) if encoding == 'br' else config.get('COMPRESSION_GZIP_LEVEL', 6)
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get('COMPRESSION_MIN_SIZE', 500):
+            return response
+        compressed = compress(data, encoding, level)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        _count(encoding, len(data), len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+def init_app(app):
+    app.after_request(_compress_response)
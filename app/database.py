@@ -0,0 +1,191 @@
+# app/database.py
+"""
+Engine setup for the Flask-SQLAlchemy extension.
+
+SQLite's defaults (rollback journal, no busy timeout) make every booking
+commit block readers, and concurrent writers fail straight away with
+"database is locked". With SQLITE_PROFILE = 'production' each new SQLite
+connection switches to WAL and sets busy_timeout, synchronous, mmap_size,
+cache_size and foreign_keys. Pool sizes come from the DATABASE_POOL_*
+settings; anything set in SQLALCHEMY_ENGINE_OPTIONS wins.
+
+With DATABASE_REPLICA_URLS set, each replica becomes a `replica_<n>` bind and
+RoutingSession sends the reads of GET/HEAD requests to one of them. Writes,
+reads after the session has written, and work outside a request always use
+the primary. After a user's own write their requests stay on the primary for
+REPLICA_STICKY_SECONDS, so they read their writes despite replication lag.
+
+With DATABASE_SHARDS set, each shard becomes a `shard_<name>` bind and a
+request routed to a shard (see app/sharding.py) sends every query there.
+Work handed to another thread (feed fetches, cache refreshes, outbound sync)
+has no request, so it captures current_shard_key() when it is submitted and
+runs inside shard_scope(key).
+"""
+
+import contextlib
+import contextvars
+import random
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql import Select, CompoundSelect
+
+REPLICA_PREFIX = 'replica_'
+SHARD_PREFIX = 'shard_'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+# Shard bind key for work running outside a request; requests use g.db_shard
+_shard_key = contextvars.ContextVar('db_shard_key', default=None)
+
+class RoutingSession(Session):
+    """Session that sends request queries to the request's shard or a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        shard = current_shard_key()
+        if bind is None and shard:
+            return self._db.engines[shard]
+        if bind is None and not self._flushing and not self.info.get('wrote') \
+                and isinstance(clause, (Select, CompoundSelect)):
+            replica = _replica_key()
+            if replica is not None:
+                return self._db.engines[replica]
+        if self._flushing or (clause is not None and not isinstance(clause, (Select, CompoundSelect))):
+            # Anything but a plain SELECT may write; stay on the primary from here on
+            self.info['wrote'] = True
+            if has_request_context():
+                g.db_wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def current_shard_key():
+    """The shard bind key queries are routed to here, or None for the main database."""
+    if has_request_context():
+        return g.get('db_shard')
+    return _shard_key.get()
+
+@contextlib.contextmanager
+def shard_scope(key):
+    """Routes the queries made in this block, outside a request, to shard bind `key` (None: main)."""
+    token = _shard_key.set(key)
+    try:
+        yield
+    finally:
+        _shard_key.reset(token)
+
+def _replica_key():
+    """The replica bind for this request, chosen once per request, or None."""
+    if not has_request_context():
+        return None
+    if 'db_replica' not in g:
+        replicas = current_app.config.get('DATABASE_REPLICA_BINDS') or []
+        if not replicas or request.method not in READ_ONLY_METHODS \
+                or session.get('_db_primary_until', 0) > time.time():
+            g.db_replica = None
+        else:
+            g.db_replica = random.choice(replicas)
+    return g.db_replica
+
+def use_primary():
+    """Sends the rest of this request's queries to the primary (e.g. a GET that writes)."""
+    if has_request_context():
+        g.db_replica = None
+
+def _is_memory(url):
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+def engine_options(config):
+    """Default create_engine() options for the configured database."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and _is_memory(url):
+        # In-memory databases live in a single connection; keep SQLAlchemy's pool
+        return {}
+    options = {
+        'pool_size': config.get('DATABASE_POOL_SIZE', 10),
+        'max_overflow': config.get('DATABASE_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 30)
+    }
+    if url.get_backend_name() != 'sqlite':
+        # Server connections can be dropped by the server or a proxy while idle
+        options['pool_recycle'] = config.get('DATABASE_POOL_RECYCLE', 1800)
+        options['pool_pre_ping'] = True
+    return options
+
+def sqlite_pragmas(config):
+    """PRAGMA (name, value) pairs run on every new SQLite connection."""
+    if config.get('SQLITE_PROFILE', 'production') != 'production':
+        return []
+    return [
+        ('journal_mode', 'WAL'),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT', 5000))),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 268435456))),
+        # Negative sizes are in KiB rather than pages
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 65536))),
+        ('foreign_keys', 'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF')
+    ]
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+def _replica_binds(app):
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    urls = [url.strip() for url in (app.config.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    keys = []
+    for index, url in enumerate(urls):
+        keys.append(f'{REPLICA_PREFIX}{index}')
+        binds[keys[-1]] = url
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.config['DATABASE_REPLICA_BINDS'] = keys
+    return keys
+
+def _shard_binds(app):
+    """Parses DATABASE_SHARDS ('name=url,name=url') into shard binds."""
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    shards = {}
+    for item in (app.config.get('DATABASE_SHARDS') or '').split(','):
+        if not item.strip():
+            continue
+        name, _, url = item.partition('=')
+        if not url.strip():
+            raise ValueError(f"DATABASE_SHARDS entry {item!r} must look like name=url")
+        shards[name.strip()] = f'{SHARD_PREFIX}{name.strip()}'
+        binds[shards[name.strip()]] = url.strip()
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.config['DATABASE_SHARD_BINDS'] = shards
+    return shards
+
+def init_app(app):
+    """Initializes `db` for the app with tuned engine options, SQLite pragmas, replica and shard binds."""
+    from app import db
+
+    options = engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    replicas = _replica_binds(app)
+    _shard_binds(app)
+    db.init_app(app)
+
+    if replicas:
+        @app.after_request
+        def stick_to_primary(response):
+            # Keep this user's reads on the primary until replicas have caught up
+            sticky = app.config.get('REPLICA_STICKY_SECONDS', 5)
+            if g.get('db_wrote') and sticky:
+                session['_db_primary_until'] = time.time() + sticky
+            return response
+
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _pragma_listener(pragmas))
@@ -0,0 +1,47 @@
+# app/encryption.py
+"""
+Encryption at rest for secrets kept in the database (calendar OAuth tokens).
+
+Values are Fernet tokens. CREDENTIALS_KEY holds one or more comma-separated
+Fernet keys: the first encrypts, any of them decrypts, so a key is rotated by
+putting the new one first. Without CREDENTIALS_KEY a key is derived from
+SECRET_KEY, and changing SECRET_KEY then makes stored credentials unreadable.
+"""
+
+import base64
+import hashlib
+import threading
+from flask import current_app
+
+class DecryptionError(ValueError):
+    """Raised when a value was not encrypted with any configured key"""
+
+_lock = threading.Lock()
+_fernets = {}
+
+def _keys(config):
+    keys = tuple(key.strip() for key in (config.get('CREDENTIALS_KEY') or '').split(',') if key.strip())
+    if keys:
+        return keys
+    digest = hashlib.sha256(f"calendar-credentials:{config['SECRET_KEY']}".encode()).digest()
+    return (base64.urlsafe_b64encode(digest).decode(),)
+
+def _fernet():
+    # cryptography is loaded on first use, not at app startup
+    from cryptography.fernet import Fernet, MultiFernet
+    keys = _keys(current_app.config)
+    with _lock:
+        fernet = _fernets.get(keys)
+        if fernet is None:
+            fernet = _fernets[keys] = MultiFernet([Fernet(key) for key in keys])
+    return fernet
+
+def encrypt(text):
+    return _fernet().encrypt(text.encode()).decode()
+
+def decrypt(token):
+    from cryptography.fernet import InvalidToken
+    try:
+        return _fernet().decrypt(token.encode()).decode()
+    except InvalidToken:
+        raise DecryptionError('Not encrypted with a configured CREDENTIALS_KEY') from None
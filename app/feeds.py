@@ -0,0 +1,159 @@
+# app/feeds.py
+
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context, url_for
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import func, select
+from app import db
+from app import ical
+from app import permissions
+from app import sharding
+from app import queries
+from app.models import Booking, Company, Room, new_feed_secret
+from app.permissions import admin_required, company_required, room_management_required
+
+bp = Blueprint('feeds', __name__)
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='ics-feed')
+
+def make_feed_token(scope, owner):
+    """Signed token for the feed of a Room ('room') or Company ('company'), valid until its secret is rotated."""
+    data = {'s': scope, 'id': owner.id, 'v': owner.feed_secret}
+    if sharding.current_shard() != sharding.DEFAULT_SHARD:
+        # Ids are only unique per shard
+        data['db'] = sharding.current_shard()
+    return _serializer().dumps(data)
+
+def load_feed_token(token):
+    """Returns (scope, object_id, shard, secret), or None when the token is not ours."""
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        return None
+    if data.get('s') not in ('room', 'company') or not isinstance(data.get('v'), str):
+        return None
+    return data['s'], data['id'], data.get('db', sharding.DEFAULT_SHARD), data['v']
+
+def _feed_window():
+    # Whole days, so the window (and the ETag) only moves once a day
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    config = current_app.config
+    return (today - timedelta(days=config.get('ICS_FEED_PAST_DAYS', 30)),
+            today + timedelta(days=config.get('ICS_FEED_FUTURE_DAYS', 365)))
+
+def _feed_filter(scope, object_id, start, end):
+    scope_filter = Booking.room_id == object_id if scope == 'room' else Booking.company_id == object_id
+    return (scope_filter, Booking.start_time < end, Booking.end_time > start)
+
+def _feed_validators(scope, object_id, start, end):
+    """
+    ETag and Last-Modified for a feed, from one aggregate query. Any insert
+    or update raises max(updated_at) and any delete lowers the count.
+    """
+    count, last_modified = db.session.execute(
+        select(func.count(Booking.id), func.max(func.coalesce(Booking.updated_at, Booking.created_at)))
+        .where(*_feed_filter(scope, object_id, start, end))
+    ).one()
+    last_modified = last_modified or start
+    digest = hashlib.sha1(f"{scope}:{object_id}:{start.date()}:{count}:{last_modified.isoformat()}".encode())
+    # HTTP dates only carry whole seconds; the ETag keeps the full precision
+    return digest.hexdigest(), last_modified.replace(microsecond=0)
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # Weak comparison: compressed responses carry the ETag as W/"..."
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+@bp.route('/feeds/<token>.ics')
+def calendar_feed(token):
+    """Public .ics feed for a room or a company, authenticated by its token"""
+    loaded = load_feed_token(token)
+    if not loaded:
+        abort(404)
+    scope, object_id, shard, secret = loaded
+    if shard != sharding.DEFAULT_SHARD:
+        if shard not in sharding.shard_names():
+            abort(404)
+        sharding.route_request(shard, remember=False)
+    owner = db.session.get(Room if scope == 'room' else Company, object_id)
+    # A rotated secret revokes every URL issued before
+    if not owner or not owner.feed_secret or not hmac.compare_digest(owner.feed_secret, secret):
+        abort(404)
+
+    start, end = _feed_window()
+    etag, last_modified = _feed_validators(scope, object_id, start, end)
+    headers = {'Cache-Control': 'private, no-cache'}
+    if _not_modified(etag, last_modified):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        return response
+
+    statement = select(Booking.id, Booking.title, Booking.start_time, Booking.end_time, Booking.is_public,
+                       Booking.created_at, Booking.updated_at, Room.name)\
+        .outerjoin(Room, Booking.room_id == Room.id)\
+        .where(*_feed_filter(scope, object_id, start, end))\
+        .order_by(Booking.start_time)\
+        .execution_options(yield_per=current_app.config.get('ICS_FEED_BATCH_SIZE', 500))
+    uid_domain = request.host.split(':')[0]
+
+    def generate():
+        yield ical.calendar_header(owner.name)
+        # Rows are fetched in batches, so memory stays flat however long the feed is
+        for booking_id, title, start_time, end_time, is_public, created_at, updated_at, room_name \
+                in db.session.execute(statement):
+            yield ical.format_event(
+                f'booking-{booking_id}@{uid_domain}', start_time, end_time,
+                title if is_public is not False else 'Unavailable',
+                location=room_name, last_modified=updated_at or created_at
+            )
+        yield ical.calendar_footer()
+
+    response = Response(stream_with_context(generate()), mimetype='text/calendar', headers=headers)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+def _feed_url(scope, owner):
+    return url_for('feeds.calendar_feed', token=make_feed_token(scope, owner), _external=True)
+
+@bp.route('/api/calendar/feed-links')
+@company_required
+def get_feed_links():
+    """Subscription URLs for the company feed and every room visible to it"""
+    rooms = Room.query.filter(permissions.visible_rooms(current_user.company_id))\
+        .order_by(Room.name, Room.id).all()
+    return jsonify({
+        'success': True,
+        'company': _feed_url('company', db.session.get(Company, current_user.company_id)),
+        'rooms': [{'id': room.id, 'name': room.name, 'url': _feed_url('room', room)} for room in rooms]
+    })
+
+@bp.route('/api/calendar/feed-links/company/rotate', methods=['POST'])
+@company_required
+@admin_required
+def rotate_company_feed():
+    """Replaces the company feed URL; the old one stops working"""
+    company = db.session.get(Company, current_user.company_id)
+    company.feed_secret = new_feed_secret()
+    db.session.commit()
+    return jsonify({'success': True, 'url': _feed_url('company', company)})
+
+@bp.route('/api/calendar/feed-links/rooms/<int:room_id>/rotate', methods=['POST'])
+@company_required
+@room_management_required
+def rotate_room_feed(room_id):
+    """Replaces one of the company's room feed URLs, for every company subscribed to it"""
+    room = queries.company_room(current_user.company_id, room_id).first()
+    if not room:
+        return jsonify({'success': False, 'error': 'Room not found'}), 404
+    room.feed_secret = new_feed_secret()
+    db.session.commit()
+    return jsonify({'success': True, 'url': _feed_url('room', room)})
@@ -0,0 +1,290 @@
+# app/ical.py
+
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+PRODID = '-//Boardroom Booker//Calendar Feed//EN'
+
+def escape_text(value):
+    """Escapes a TEXT value (RFC 5545 3.3.11)."""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')\
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+def format_datetime(value):
+    """Formats a naive UTC datetime as a UTC DATE-TIME."""
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+def fold_line(line):
+    """Folds a content line at 75 octets and adds the CRLF terminator."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74  # continuation lines start with a space
+        chunk = encoded[:limit]
+        # Never split a multi-byte character
+        while chunk and len(chunk) < len(encoded) and (encoded[len(chunk)] & 0xC0) == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode('utf-8'))
+        encoded = encoded[len(chunk):]
+    return '\r\n '.join(parts) + '\r\n'
+
+def calendar_header(name):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        'X-PUBLISHED-TTL:PT15M'
+    ]
+    return ''.join(fold_line(line) for line in lines)
+
+def calendar_footer():
+    return fold_line('END:VCALENDAR')
+
+def format_event(uid, start, end, summary, location=None, last_modified=None, busy=True):
+    """One VEVENT block as a string."""
+    stamp = format_datetime(last_modified or datetime.utcnow())
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{stamp}',
+        f'LAST-MODIFIED:{stamp}',
+        f'DTSTART:{format_datetime(start)}',
+        f'DTEND:{format_datetime(end)}',
+        f'SUMMARY:{escape_text(summary)}'
+    ]
+    if location:
+        lines.append(f'LOCATION:{escape_text(location)}')
+    lines.append('TRANSP:' + ('OPAQUE' if busy else 'TRANSPARENT'))
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) for line in lines)
+
+# --- Parsing ---
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+def unescape_text(value):
+    """Reverses escape_text."""
+    out = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            out.append('\n' if char in ('n', 'N') else char)
+        else:
+            out.append(char)
+    return ''.join(out)
+
+def iter_content_lines(lines):
+    """Unfolds physical lines (str or bytes) into logical content lines."""
+    current = None
+    for raw in lines:
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8', errors='replace')
+        raw = raw.rstrip('\r\n')
+        if raw[:1] in (' ', '\t') and current is not None:
+            current += raw[1:]
+            continue
+        if current:
+            yield current
+        current = raw
+    if current:
+        yield current
+
+def parse_content_line(line):
+    """Splits 'NAME;PARAM=x:value' into (NAME, {PARAM: x}, value)."""
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        raise ValueError(f"Malformed content line: {line[:40]}")
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+def iter_events(lines):
+    """
+    Yields each VEVENT as {NAME: [(params, value), ...]}, holding only one
+    event in memory at a time. Nested components (VALARM) are skipped.
+    """
+    event = None
+    depth = 0
+    for line in iter_content_lines(lines):
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError:
+            continue
+        if name == 'BEGIN':
+            if event is not None:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                event = {}
+        elif name == 'END':
+            if depth:
+                depth -= 1
+            elif event is not None and value.upper() == 'VEVENT':
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+def parse_datetime(params, value, default_tz=None):
+    """
+    Parses a DATE or DATE-TIME value.
+    Returns (naive local datetime, tzinfo or None, is_date); a tzinfo of None
+    means the value is already UTC. Floating times use default_tz.
+    """
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d'), default_tz, True
+    if value.endswith('Z'):
+        return datetime.strptime(value[:-1], '%Y%m%dT%H%M%S'), None, False
+    tz = default_tz
+    if params.get('TZID'):
+        try:
+            tz = ZoneInfo(params['TZID'])
+        except (KeyError, ValueError):
+            # Non-IANA names (e.g. Windows zones); VTIMEZONE blocks are not parsed
+            tz = default_tz
+    return datetime.strptime(value, '%Y%m%dT%H%M%S'), tz, False
+
+def to_utc(local, tz):
+    """Converts a naive local time in tz to naive UTC."""
+    if tz is None:
+        return local
+    return local.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_duration(value):
+    """Parses a DURATION such as PT1H30M or P1D."""
+    match = re.fullmatch(r'([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', value.strip())
+    if not match:
+        raise ValueError(f"Unsupported duration: {value}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == '-' else duration
+
+def parse_rrule(value):
+    """Parses an RRULE into a dict of its parts."""
+    rule = {}
+    for part in value.split(';'):
+        key, _, part_value = part.partition('=')
+        rule[key.upper()] = part_value.upper()
+    return rule
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    try:
+        return value.replace(year=year, month=month)
+    except ValueError:
+        return None  # e.g. the 31st in a 30-day month: no occurrence
+
+def iter_recurrence(start, rule):
+    """
+    Local start times generated by an RRULE (before COUNT/UNTIL/EXDATE).
+    Supports FREQ=DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, and BYDAY
+    (plain weekdays) for WEEKLY. Anything else raises ValueError.
+    """
+    freq = rule.get('FREQ')
+    interval = int(rule.get('INTERVAL') or 1)
+    unsupported = set(rule) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'WKST'}
+    if unsupported or (rule.get('BYDAY') and freq != 'WEEKLY'):
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported)) or 'BYDAY'}")
+
+    if freq == 'DAILY':
+        step = 0
+        while True:
+            yield start + timedelta(days=step)
+            step += interval
+    elif freq == 'WEEKLY':
+        days = sorted(WEEKDAYS[day] for day in rule['BYDAY'].split(',')) if rule.get('BYDAY') \
+            else [start.weekday()]
+        week_start = start - timedelta(days=(start.weekday() - WEEKDAYS.get(rule.get('WKST'), 0)) % 7)
+        while True:
+            for day in days:
+                occurrence = week_start + timedelta(days=(day - week_start.weekday()) % 7)
+                if occurrence >= start:
+                    yield occurrence
+            week_start += timedelta(weeks=interval)
+    elif freq in ('MONTHLY', 'YEARLY'):
+        months = interval if freq == 'MONTHLY' else interval * 12
+        step = 0
+        while True:
+            occurrence = _add_months(start, step)
+            if occurrence is not None:
+                yield occurrence
+            step += months
+    else:
+        raise ValueError(f"Unsupported RRULE frequency: {freq}")
+
+def expand_event(event, default_tz=None, horizon=None, max_occurrences=1000, since=None):
+    """
+    Yields (start, end) in naive UTC for every occurrence of a parsed VEVENT,
+    applying RRULE, COUNT, UNTIL and EXDATE. Occurrences of a rule that end
+    before `since` are left out (they still count towards COUNT). Rules
+    without COUNT or UNTIL stop at the horizon; any rule stops after
+    max_occurrences yielded. The generator returns (occurrences left out
+    before since, 'horizon' or 'limit' if it stopped early, else None).
+    """
+    params, value = event['DTSTART'][0]
+    start, tz, is_date = parse_datetime(params, value, default_tz)
+    if 'DTEND' in event:
+        end_params, end_value = event['DTEND'][0]
+        end_local, end_tz, _ = parse_datetime(end_params, end_value, default_tz)
+        duration = to_utc(end_local, end_tz) - to_utc(start, tz)
+    elif 'DURATION' in event:
+        duration = parse_duration(event['DURATION'][0][1])
+    else:
+        duration = timedelta(days=1) if is_date else timedelta(0)
+
+    if 'RRULE' not in event:
+        first = to_utc(start, tz)
+        yield first, first + duration
+        return 0, None
+
+    rule = parse_rrule(event['RRULE'][0][1])
+    count = int(rule['COUNT']) if rule.get('COUNT') else None
+    until = None
+    if rule.get('UNTIL'):
+        until_local, until_tz, _ = parse_datetime({}, rule['UNTIL'], tz)
+        until = to_utc(until_local, until_tz)
+    if count is not None or until is not None:
+        horizon = None
+    excluded = set()
+    for exdate_params, exdate_value in event.get('EXDATE', []):
+        for item in exdate_value.split(','):
+            excluded_local, excluded_tz, _ = parse_datetime(exdate_params, item, tz)
+            excluded.add(to_utc(excluded_local, excluded_tz))
+
+    generated = 0
+    yielded = 0
+    before = 0
+    for occurrence in iter_recurrence(start, rule):
+        occurrence_utc = to_utc(occurrence, tz)
+        if (count is not None and generated >= count) or (until and occurrence_utc > until):
+            return before, None
+        if horizon and occurrence_utc > horizon:
+            return before, 'horizon'
+        if yielded >= max_occurrences:
+            return before, 'limit'
+        generated += 1
+        if occurrence_utc in excluded:
+            continue
+        if since and occurrence_utc + duration <= since:
+            before += 1
+            continue
+        yielded += 1
+        yield occurrence_utc, occurrence_utc + duration
@@ -0,0 +1,235 @@
+# app/logging_setup.py
+"""
+Structured logging through a background queue.
+
+init_app() puts a single QueueHandler on the root logger. The request id,
+method, path, user and company of the current request are attached to each
+record on the thread that logs it. A QueueListener thread then formats the
+record as one JSON line and writes it to stdout, so requests never wait on
+stdout. The queue is bounded by LOG_QUEUE_SIZE. When stdout cannot keep up,
+new records are dropped and counted rather than blocking requests.
+
+LOG_SAMPLING ('logger=rate,...') keeps only that share of a noisy logger's
+records below WARNING, matched by logger name prefix. With LOG_REQUESTS, the
+'app.access' logger logs each request once with its status and duration.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import current_app, g, has_request_context, request, session
+from app import metrics
+
+access_logger = logging.getLogger('app.access')
+
+# Incoming X-Request-ID values are reused when they look like an id
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# LogRecord attributes that are not `extra` fields
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+_lock = threading.Lock()
+_stats = {'dropped': 0}
+_handler = None
+_listener = None
+_exception_formatter = logging.Formatter()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request context and extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        if record.stack_info:
+            entry['stack_info'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keeps `rate` of the records below WARNING from each configured logger (and its children)."""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first, so 'app.access' wins over 'app'
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + '.'):
+                return rate >= 1 or random.random() < rate
+        return True
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, method, path, user_id and company_id while handling a request."""
+
+    def filter(self, record):
+        if has_request_context():
+            context = {
+                'request_id': g.get('request_id'),
+                'method': request.method,
+                'path': request.path,
+                'user_id': session.get('_user_id'),
+                'company_id': _company_id()
+            }
+            for key, value in context.items():
+                # Explicit extra={...} values win
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        return True
+
+def _company_id():
+    if 'log_company_id' not in g:
+        user = g.get('_login_user')  # set by Flask-Login once current_user is used
+        if user is None or not getattr(user, 'is_authenticated', False):
+            return None
+        # Read the loaded value only; an expired attribute would query from inside logging
+        g.log_company_id = vars(user).get('company_id')
+    return g.log_company_id
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking."""
+
+    def prepare(self, record):
+        # Render the message and traceback now; arguments and frames may change
+        # before the listener thread gets to the record
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _lock:
+                _stats['dropped'] += 1
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when shutting down with a full queue
+        self.queue.put(self._sentinel)
+
+def parse_sampling(value):
+    """'app.access=0.1,werkzeug=0' -> {'app.access': 0.1, 'werkzeug': 0.0}"""
+    rates = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            raise ValueError(f"LOG_SAMPLING entry {item!r} must look like logger=rate")
+    return rates
+
+def get_stats():
+    return {'dropped': _stats['dropped'], 'queued': _handler.queue.qsize() if _handler else 0}
+
+def _output_handler(fmt):
+    output = logging.StreamHandler(sys.stdout)
+    if fmt == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    return output
+
+def _start_listener(output, queue_size):
+    global _listener
+    log_queue = queue.Queue(maxsize=queue_size)
+    _handler.queue = log_queue
+    _listener = _Listener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown():
+    """Stops the listener thread after it has written everything queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure(level='INFO', fmt='json', queue_size=10000, sampling=None):
+    """(Re)installs the queue handler on the root logger and starts its listener."""
+    global _handler
+    shutdown()
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    _handler = DroppingQueueHandler(None)  # the listener gives it its queue
+    if sampling:
+        _handler.addFilter(SamplingFilter(sampling))
+    _handler.addFilter(RequestContextFilter())
+    _start_listener(_output_handler(fmt), queue_size)
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+def _after_fork_in_child():
+    # The listener thread doesn't survive fork (e.g. gunicorn's preloaded
+    # workers); give the child its own queue and thread
+    if _listener is not None:
+        _start_listener(_listener.handlers[0], _handler.queue.maxsize)
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(shutdown)
+
+def _start_request():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+    g.log_started = time.perf_counter()
+
+def _finish_request(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    started = g.pop('log_started', None)
+    if started is not None and current_app.config.get('LOG_REQUESTS', True):
+        access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'endpoint': request.endpoint
+        })
+    return response
+
+@metrics.register_collector
+def _logging_metrics():
+    stats = get_stats()
+    return [
+        '# TYPE boardroom_log_records_dropped_total counter',
+        f'boardroom_log_records_dropped_total {stats["dropped"]}',
+        '# TYPE boardroom_log_queue_size gauge',
+        f'boardroom_log_queue_size {stats["queued"]}'
+    ]
+
+def init_app(app):
+    """Configures logging from the app config and adds request ids and the access log."""
+    configure(
+        level=app.config.get('LOG_LEVEL', 'INFO'),
+        fmt=app.config.get('LOG_FORMAT', 'json'),
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000),
+        sampling=parse_sampling(app.config.get('LOG_SAMPLING'))
+    )
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,349 @@
+# app/metrics.py
+"""
+Prometheus metrics at /metrics.
+
+Counters live in each process. With METRICS_DIR set (run.py serve sets it),
+every worker writes its exposition to <METRICS_DIR>/<pid>.prom at most every
+METRICS_FLUSH_SECONDS, and /metrics merges the files: counters and
+histograms are summed across workers (including ones that have exited),
+gauges are reported per live worker with a pid label.
+"""
+
+import logging
+import os
+import threading
+import time
+from flask import Response, abort, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_requests = {}   # (endpoint, method, status) -> count
+_latency = {}    # (endpoint, method) -> [bucket counts..., +Inf count, sum]
+_db = {}         # endpoint -> [queries, seconds]
+
+# Extra sections appended to /metrics, registered by other modules
+_collectors = []
+
+def register_collector(fn):
+    """Adds fn() -> iterable of exposition lines to the /metrics output."""
+    _collectors.append(fn)
+    return fn
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    # Only queries made while handling a request are attributed to an endpoint
+    if has_app_context() and 'metrics_started' in g:
+        g.metrics_queries += 1
+        g.metrics_db_seconds += time.perf_counter() - started
+
+def _handle_error(context):
+    # after_cursor_execute is skipped when a statement fails
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_seconds = 0.0
+
+def _record(status):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+    method = request.method
+    with _lock:
+        key = (endpoint, method, status)
+        _requests[key] = _requests.get(key, 0) + 1
+        histogram = _latency.get((endpoint, method))
+        if histogram is None:
+            histogram = _latency[(endpoint, method)] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                histogram[index] += 1
+                break
+        else:
+            histogram[len(LATENCY_BUCKETS)] += 1
+        histogram[-1] += elapsed
+        db_totals = _db.setdefault(endpoint, [0, 0.0])
+        db_totals[0] += g.metrics_queries
+        db_totals[1] += g.metrics_db_seconds
+
+def _after_request(response):
+    _record(str(response.status_code))
+    _mark_dirty()
+    return response
+
+def _teardown_request(exc):
+    # Catches requests that failed before after_request could record them
+    if exc is not None:
+        _record('500')
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + '}'
+
+def _format_float(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def render():
+    """This process's metrics in Prometheus text exposition format."""
+    with _lock:
+        requests_snapshot = dict(_requests)
+        latency_snapshot = {key: list(value) for key, value in _latency.items()}
+        db_snapshot = {key: list(value) for key, value in _db.items()}
+
+    lines = [
+        '# HELP boardroom_http_requests_total HTTP requests by endpoint, method and status.',
+        '# TYPE boardroom_http_requests_total counter'
+    ]
+    for (endpoint, method, status), count in sorted(requests_snapshot.items()):
+        lines.append(f'boardroom_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP boardroom_http_request_duration_seconds Request latency by endpoint and method.',
+        '# TYPE boardroom_http_request_duration_seconds histogram'
+    ]
+    for (endpoint, method), histogram in sorted(latency_snapshot.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram):
+            cumulative += count
+            lines.append('boardroom_http_request_duration_seconds_bucket'
+                         f'{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+        cumulative += histogram[len(LATENCY_BUCKETS)]
+        lines.append('boardroom_http_request_duration_seconds_bucket'
+                     f'{_labels(endpoint=endpoint, method=method, le="+Inf")} {cumulative}')
+        lines.append(f'boardroom_http_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method)} '
+                     f'{_format_float(histogram[-1])}')
+        lines.append(f'boardroom_http_request_duration_seconds_count{_labels(endpoint=endpoint, method=method)} '
+                     f'{cumulative}')
+
+    lines += [
+        '# HELP boardroom_db_queries_total SQL statements executed while handling requests.',
+        '# TYPE boardroom_db_queries_total counter'
+    ]
+    lines += [f'boardroom_db_queries_total{_labels(endpoint=endpoint)} {queries}'
+              for endpoint, (queries, _) in sorted(db_snapshot.items())]
+    lines += [
+        '# HELP boardroom_db_query_seconds_total Time spent in SQL while handling requests.',
+        '# TYPE boardroom_db_query_seconds_total counter'
+    ]
+    lines += [f'boardroom_db_query_seconds_total{_labels(endpoint=endpoint)} {_format_float(seconds)}'
+              for endpoint, (_, seconds) in sorted(db_snapshot.items())]
+
+    for collector in _collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
+
+@register_collector
+def _calendar_provider_metrics():
+    from app.services import resilience
+    lines = []
+    snapshot = resilience.get_metrics()
+    counter_names = sorted({name for counters in snapshot.values() for name in counters if name != 'circuit_state'})
+    for name in counter_names:
+        metric = f'boardroom_calendar_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for provider, counters in sorted(snapshot.items()):
+            if name in counters:
+                lines.append(f'{metric}{_labels(provider=provider)} {_format_float(counters[name])}')
+    lines.append('# TYPE boardroom_calendar_circuit_state gauge')
+    for provider, counters in sorted(snapshot.items()):
+        if 'circuit_state' in counters:
+            for state in ('closed', 'open', 'half_open'):
+                value = 1 if counters['circuit_state'] == state else 0
+                lines.append(f'boardroom_calendar_circuit_state{_labels(provider=provider, state=state)} {value}')
+    return lines
+
+@register_collector
+def _event_cache_metrics():
+    from app.services import event_cache
+    stats = event_cache.cache.get_stats()
+    lines = ['# TYPE boardroom_calendar_cache_lookups_total counter']
+    for result in ('hits', 'stale_hits', 'misses', 'coalesced'):
+        lines.append(f'boardroom_calendar_cache_lookups_total{_labels(result=result)} {stats[result]}')
+    for name in ('refreshes', 'errors', 'evictions'):
+        lines.append(f'# TYPE boardroom_calendar_cache_{name}_total counter')
+        lines.append(f'boardroom_calendar_cache_{name}_total {stats[name]}')
+    lines.append('# TYPE boardroom_calendar_cache_entries gauge')
+    lines.append(f'boardroom_calendar_cache_entries {stats["size"]}')
+    return lines
+
+@register_collector
+def _room_catalog_metrics():
+    from app.services import room_catalog
+    stats = room_catalog.get_stats()
+    lines = ['# TYPE boardroom_room_catalog_lookups_total counter']
+    for result in ('hits', 'misses'):
+        lines.append(f'boardroom_room_catalog_lookups_total{_labels(result=result)} {stats[result]}')
+    lines.append('# TYPE boardroom_room_catalog_invalidations_total counter')
+    lines.append(f'boardroom_room_catalog_invalidations_total {stats["invalidations"]}')
+    return lines
+
+@register_collector
+def _compression_metrics():
+    from app import compression
+    stats = compression.get_stats()
+    lines = ['# TYPE boardroom_compressed_responses_total counter']
+    for encoding, (responses, _, _) in sorted(stats.items()):
+        lines.append(f'boardroom_compressed_responses_total{_labels(encoding=encoding)} {responses}')
+    lines.append('# TYPE boardroom_compression_bytes_total counter')
+    for encoding, (_, size_in, size_out) in sorted(stats.items()):
+        lines.append(f'boardroom_compression_bytes_total{_labels(encoding=encoding, stage="in")} {size_in}')
+        lines.append(f'boardroom_compression_bytes_total{_labels(encoding=encoding, stage="out")} {size_out}')
+    return lines
+
+# --- Aggregation across workers ---
+
+_dirty = threading.Event()
+_flusher = {'pid': None, 'directory': None, 'interval': 1.0}
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f'{pid}.prom')
+
+def _write_snapshot(directory):
+    path = _snapshot_path(directory, os.getpid())
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        f.write(render())
+    os.replace(temporary, path)
+
+def _flush_loop():
+    while True:
+        _dirty.wait()
+        time.sleep(_flusher['interval'])
+        _dirty.clear()
+        try:
+            _write_snapshot(_flusher['directory'])
+        except OSError:
+            logger.exception('Could not write metrics to %s', _flusher['directory'])
+
+def _mark_dirty():
+    directory = current_app.config.get('METRICS_DIR')
+    if not directory:
+        return
+    if _flusher['directory'] != directory:
+        os.makedirs(directory, exist_ok=True)
+        _flusher['directory'] = directory
+    _flusher['interval'] = current_app.config.get('METRICS_FLUSH_SECONDS', 1.0)
+    _dirty.set()
+    # One flusher per process; a forked worker starts its own
+    if _flusher['pid'] != os.getpid():
+        with _lock:
+            if _flusher['pid'] != os.getpid():
+                threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+                _flusher['pid'] = os.getpid()
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _parse(text):
+    """[(family, type, help, sample name, labels, value)] from exposition text."""
+    samples = []
+    family = kind = help_text = None
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            help_text = line
+        elif line.startswith('# TYPE '):
+            family, kind = line[len('# TYPE '):].split(' ', 1)
+            if help_text and not help_text.startswith(f'# HELP {family} '):
+                help_text = None
+        elif line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            name, brace, labels = series.partition('{')
+            samples.append((family, kind, help_text, name, brace + labels, float(value)))
+    return samples
+
+def _with_pid(labels, pid):
+    return f'{labels[:-1]},pid="{pid}"}}' if labels else f'{{pid="{pid}"}}'
+
+def merge(snapshots):
+    """
+    Merges {pid: exposition text} into one exposition: counter and histogram
+    samples are summed, gauge samples of live processes get a pid label.
+    """
+    families = {}
+    for pid, text in sorted(snapshots.items()):
+        alive = None
+        for family, kind, help_text, name, labels, value in _parse(text):
+            entry = families.setdefault(family, {'type': kind, 'help': help_text, 'samples': {}})
+            if kind in ('counter', 'histogram'):
+                key = (name, labels)
+                entry['samples'][key] = entry['samples'].get(key, 0) + value
+                continue
+            if alive is None:
+                alive = pid == os.getpid() or _alive(pid)
+            if alive:
+                entry['samples'][(name, _with_pid(labels, pid))] = value
+
+    lines = []
+    for family, entry in families.items():
+        if entry['help']:
+            lines.append(entry['help'])
+        lines.append(f'# TYPE {family} {entry["type"]}')
+        lines += [f'{name}{labels} {_format_float(value)}' for (name, labels), value in entry['samples'].items()]
+    return '\n'.join(lines) + '\n'
+
+def render_all(directory):
+    """This process's metrics merged with the other workers' snapshots in directory."""
+    snapshots = {}
+    for filename in os.listdir(directory) if os.path.isdir(directory) else ():
+        pid, _, extension = filename.partition('.')
+        if extension != 'prom' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots[int(pid)] = f.read()
+        except OSError:
+            continue
+    snapshots[os.getpid()] = render()
+    return merge(snapshots)
+
+def clear_snapshots(directory):
+    """Removes the snapshots of a previous server run; call before forking workers."""
+    for filename in os.listdir(directory) if os.path.isdir(directory) else ():
+        if filename.endswith(('.prom', '.prom.tmp')):
+            os.remove(os.path.join(directory, filename))
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        # Open only while developing
+        if not current_app.debug:
+            abort(403)
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    directory = current_app.config.get('METRICS_DIR')
+    body = render_all(directory) if directory else render()
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Hooks request timing and SQL counting into the app and adds /metrics."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,17 +1,27 @@
 # app/models.py
 
 from app import db
+from app import encryption
+from app import permissions
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 import secrets
 import string
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def new_feed_secret():
+    """Random value signed into .ics feed tokens; replacing it revokes the old feed URL"""
+    return secrets.token_urlsafe(16)
 
 class Company(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     domain = db.Column(db.String(120), nullable=False, unique=True)
+    feed_secret = db.Column(db.String(32), nullable=False, default=new_feed_secret)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -24,6 +34,15 @@ class Company(db.Model):
     def __repr__(self):
         return f'<Company {self.name}>'
 
+class CompanyShard(db.Model):
+    """Shard directory: which database a company's data lives on (sharded mode only)"""
+    company_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CompanyShard {self.company_id}:{self.shard}>'
+
 class Invitation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(16), unique=True, nullable=False)
@@ -38,6 +57,9 @@ class Invitation(db.Model):
     is_used = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Active invitations per company: company_id = ? AND is_used = 0 AND expires_at > ?
+    __table_args__ = (db.Index('ix_invitation_company_used_expires', 'company_id', 'is_used', 'expires_at'),)
+    
     # Relationships
     invited_by = db.relationship('User', backref='sent_invitations')
     
@@ -93,7 +115,7 @@ class User(UserMixin, db.Model):
     name = db.Column(db.String(120), nullable=False)
     password_hash = db.Column(db.String(255))
     role = db.Column(db.String(20), default='employee')  # 'admin', 'manager', 'employee', 'guest'
-    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True, index=True)
     external_company_access = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)  # For cross-company access
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=True)  # For guest accounts
@@ -127,19 +149,19 @@ class User(UserMixin, db.Model):
     
     def can_manage_rooms(self):
         """Check if user can manage rooms"""
-        return self.role in ['admin']
+        return permissions.has(self, permissions.MANAGE_ROOMS)
     
     def can_manage_users(self):
         """Check if user can manage users"""
-        return self.role in ['admin', 'manager']
+        return permissions.has(self, permissions.MANAGE_USERS)
     
     def can_invite_users(self):
         """Check if user can invite other users"""
-        return self.role in ['admin', 'manager']
+        return permissions.has(self, permissions.INVITE_USERS)
     
     def can_manage_company(self):
         """Check if user can manage company settings"""
-        return self.role == 'admin'
+        return permissions.has(self, permissions.MANAGE_COMPANY)
     
     def is_owner(self):
         """Check if user is an owner (admin)"""
@@ -147,7 +169,7 @@ class User(UserMixin, db.Model):
     
     def get_accessible_company_id(self):
         """Get the company ID this user has access to (own or external)"""
-        return self.company_id or self.external_company_access
+        return permissions.accessible_company_id(self)
     
     def is_external_user(self):
         """Check if this user is accessing another company's data"""
@@ -155,42 +177,19 @@ class User(UserMixin, db.Model):
     
     def can_access_company(self, company_id):
         """Check if user can access a specific company's data"""
-        accessible_company = self.get_accessible_company_id()
-        return accessible_company == company_id
+        return self.get_accessible_company_id() == company_id
     
     def can_see_user(self, other_user):
         """Check if user can see another user's information"""
-        # Users can always see themselves
-        if self.id == other_user.id:
-            return True
-            
-        # Get the company this user has access to (either their own or external)
-        user_company_id = self.company_id or self.external_company_access
-        
-        if self.role == 'admin':
-            # Admins can see users from their own company only
-            return other_user.company_id == user_company_id
-        elif self.role == 'manager':
-            # Managers can see employees and guests from their company only
-            return (other_user.company_id == user_company_id and 
-                   other_user.role in ['employee', 'guest'])
-        else:
-            return False
+        return permissions.can_see_user(self, other_user)
+    
+    def visible_users_filter(self):
+        """can_see_user() as a SQL condition on User, for filtering in the database"""
+        return permissions.visible_users(self)
     
     def can_edit_user(self, other_user):
         """Check if user can edit another user"""
-        # Get the company this user has access to (either their own or external)
-        user_company_id = self.company_id or self.external_company_access
-        
-        if self.role == 'admin':
-            # Admins can edit users from their own company only
-            return other_user.company_id == user_company_id
-        elif self.role == 'manager':
-            # Managers can only edit employees and guests from their company
-            return (other_user.company_id == user_company_id and 
-                   other_user.role in ['employee', 'guest'])
-        else:
-            return False
+        return permissions.can_manage_user(self, other_user)
     
     def get_role_display(self):
         """Get human-readable role name"""
@@ -230,11 +229,22 @@ class Room(db.Model):
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
     visibility_type = db.Column(db.String(20), default='company')  # company, specific_companies, public
     visible_companies = db.Column(db.Text, nullable=True)  # JSON string of company IDs
+    feed_secret = db.Column(db.String(32), nullable=False, default=new_feed_secret)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     bookings = db.relationship('Booking', backref='room', lazy=True)
+    equipment_items = db.relationship('RoomEquipment', backref='room', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Room lists and the unique-name check within a company
+        db.Index('ix_room_company_name', 'company_id', 'name'),
+        # Room search filters
+        db.Index('ix_room_type_capacity', 'room_type', 'capacity'),
+        db.Index('ix_room_capacity', 'capacity'),
+        db.Index('ix_room_location', 'location'),
+    )
     
     def get_equipment_list(self):
         """Get equipment as a list"""
@@ -246,8 +256,19 @@ class Room(db.Model):
         return []
     
     def set_equipment_list(self, equipment_list):
-        """Set equipment from a list"""
-        self.equipment = json.dumps(equipment_list) if equipment_list else None
+        """Set equipment from a list, keeping the room_equipment rows in sync"""
+        if isinstance(equipment_list, str):
+            equipment_list = equipment_list.split(',')
+        items = []
+        for item in equipment_list or []:
+            item = str(item).strip()
+            if item and item not in items:
+                items.append(item)
+        self.equipment = json.dumps(items) if items else None
+        
+        existing = {row.item: row for row in self.equipment_items}
+        keys = dict.fromkeys(RoomEquipment.normalize(item) for item in items)
+        self.equipment_items = [existing.get(key) or RoomEquipment(item=key) for key in keys]
     
     def get_visible_companies_list(self):
         """Get visible companies as a list of IDs"""
@@ -283,21 +304,7 @@ class Room(db.Model):
     
     def is_available_for_booking(self, user):
         """Check if room is available for booking by this user"""
-        if self.status != 'available':
-            return False
-        
-        # Role hierarchy: admin > manager > employee > guest
-        role_hierarchy = {
-            'admin': 4,
-            'manager': 3,
-            'employee': 2,
-            'guest': 1
-        }
-        
-        user_role_level = role_hierarchy.get(user.role, 0)
-        required_role_level = role_hierarchy.get(self.access_level, 0)
-        
-        return user_role_level >= required_role_level
+        return permissions.can_book_room(user, self)
     
     def get_room_type_display(self):
         """Get human-readable room type"""
@@ -325,6 +332,22 @@ class Room(db.Model):
     def __repr__(self):
         return f'<Room {self.name}>'
 
+class RoomEquipment(db.Model):
+    """One equipment item of a room, normalized for search (Room.equipment keeps the display list)"""
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='CASCADE'), primary_key=True)
+    item = db.Column(db.String(100), primary_key=True)
+    
+    # Rooms that have an item
+    __table_args__ = (db.Index('ix_room_equipment_item', 'item', 'room_id'),)
+    
+    @staticmethod
+    def normalize(item):
+        """'Video Conferencing' -> 'video_conferencing', like the room form's values"""
+        return '_'.join(str(item).lower().split())[:100]
+    
+    def __repr__(self):
+        return f'<RoomEquipment {self.room_id} {self.item}>'
+
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
@@ -337,7 +360,17 @@ class Booking(db.Model):
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)
     room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    microsoft_calendar_event_id = db.Column(db.String(255), nullable=True, unique=True)  # Set for bookings synced from Outlook
+    google_calendar_event_id = db.Column(db.String(255), nullable=True, unique=True)  # Set for bookings synced from Google
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Overlap checks (room_id = ? AND start_time < ? AND end_time > ?) and the
+    # company feeds/calendar windows; end_time is filtered inside the index
+    __table_args__ = (
+        db.Index('ix_booking_room_time', 'room_id', 'start_time', 'end_time'),
+        db.Index('ix_booking_company_time', 'company_id', 'start_time', 'end_time'),
+    )
     
     def get_visible_companies_list(self):
         """Get visible companies as a list of IDs"""
@@ -372,4 +405,61 @@ class Booking(db.Model):
         return visibility_map.get(self.visibility_type, self.visibility_type)
     
     def __repr__(self):
-        return f'<Booking {self.title}>'
\ No newline at end of file
+        return f'<Booking {self.title}>'
+
+class CalendarSyncState(db.Model):
+    """Incremental sync position for an external calendar"""
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), nullable=False)  # microsoft, google
+    calendar_id = db.Column(db.String(255), nullable=False)
+    sync_cursor = db.Column(db.Text, nullable=True)  # Graph deltaLink or Google nextSyncToken
+    last_synced_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    __table_args__ = (db.UniqueConstraint('provider', 'calendar_id', name='uq_calendar_sync_state_provider_calendar'),)
+    
+    def __repr__(self):
+        return f'<CalendarSyncState {self.provider}:{self.calendar_id}>'
+
+class CalendarCredential(db.Model):
+    """OAuth credentials for a connected external calendar, kept server-side"""
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), nullable=False)  # google
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)
+    credentials = db.Column(db.Text, nullable=False)  # Encrypted JSON of token, refresh_token, token_uri, ...
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('provider', 'user_id', name='uq_calendar_credential_provider_user'),)
+    
+    def get_credentials(self):
+        """Get credentials as a dict ({} when they cannot be decrypted or parsed)"""
+        try:
+            return json.loads(encryption.decrypt(self.credentials))
+        except (encryption.DecryptionError, json.JSONDecodeError) as e:
+            logger.warning('Unreadable %s credentials for user %s: %s', self.provider, self.user_id, e)
+            return {}
+    
+    def set_credentials(self, info):
+        """Set credentials from a dict, encrypted with CREDENTIALS_KEY"""
+        self.credentials = encryption.encrypt(json.dumps(info))
+    
+    def __repr__(self):
+        return f'<CalendarCredential {self.provider} for user {self.user_id}>'
+
+class BookingSyncState(db.Model):
+    """Outbound sync status of a booking on one external calendar"""
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, nullable=False)  # No FK: deletes are pushed after the booking row is gone
+    provider = db.Column(db.String(20), nullable=False)  # microsoft, google
+    external_event_id = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), default='pending')  # pending, synced, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('booking_id', 'provider', name='uq_booking_sync_state_booking_provider'),)
+    
+    def __repr__(self):
+        return f'<BookingSyncState {self.provider}:{self.booking_id} {self.status}>'
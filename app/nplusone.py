@@ -0,0 +1,148 @@
+# app/nplusone.py
+"""
+Development aid that spots N+1 query patterns.
+
+While handling a request, every SQL statement is normalised (whitespace and
+IN-lists collapsed) and counted. When one statement runs more than
+NPLUSONE_THRESHOLD times, the request is reported with the route and the
+line in our code that issued the first of them; NPLUSONE_ACTION = 'raise'
+turns the report into an NPlusOneError.
+
+query_budget() asserts limits around any block of code, e.g. a test client
+call. Under pytest, add `pytest_plugins = ['app.nplusone']` to a
+conftest.py to get the `query_budget` fixture.
+"""
+
+import contextlib
+import logging
+import os
+import re
+import sys
+import threading
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+class NPlusOneError(Exception):
+    """Raised when a statement repeats past the threshold in 'raise' mode"""
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block ran too many statements"""
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_THIS_FILE = os.path.abspath(__file__)
+
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+
+def normalize(statement):
+    """Collapses whitespace and IN-lists so repeated statements group together."""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+def _origin():
+    """File, line and function of the innermost frame in our own code."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_DIR) and filename != _THIS_FILE:
+            return f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+def _track(groups, key):
+    entry = groups.get(key)
+    if entry is None:
+        groups[key] = [1, _origin()]
+    else:
+        entry[0] += 1
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budgets = getattr(_local, 'budgets', None)
+    in_request = has_app_context() and 'nplusone_queries' in g
+    if not budgets and not in_request:
+        return
+    key = normalize(statement)
+    if in_request:
+        _track(g.nplusone_queries, key)
+    for groups in budgets or ():
+        _track(groups, key)
+
+def _repeats(groups, threshold):
+    return sorted(
+        ((count, statement, origin) for statement, (count, origin) in groups.items() if count > threshold),
+        reverse=True
+    )
+
+def _describe(repeats):
+    return '; '.join(f"{count}x [{origin}] {statement[:160]}" for count, statement, origin in repeats)
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+
+@contextlib.contextmanager
+def query_budget(max_queries=None, max_repeats=None):
+    """
+    Fails when the block runs more than max_queries statements in total, or
+    any single normalised statement more than max_repeats times.
+    Yields the {statement: [count, origin]} dict for further checks.
+    """
+    _listen()
+    groups = {}
+    budgets = getattr(_local, 'budgets', None)
+    if budgets is None:
+        budgets = _local.budgets = []
+    budgets.append(groups)
+    try:
+        yield groups
+    finally:
+        budgets.remove(groups)
+
+    total = sum(count for count, _ in groups.values())
+    if max_queries is not None and total > max_queries:
+        raise QueryBudgetExceeded(f"{total} queries, budget is {max_queries}: "
+                                  f"{_describe(_repeats(groups, 0)[:5])}")
+    if max_repeats is not None:
+        repeats = _repeats(groups, max_repeats)
+        if repeats:
+            raise QueryBudgetExceeded(f"Statement repeated more than {max_repeats} times: {_describe(repeats)}")
+
+def _enabled(app):
+    return bool(app.config.get('NPLUSONE_ENABLED') or app.debug or app.testing)
+
+def init_app(app):
+    """Enables per-request detection while the app is in debug/testing or NPLUSONE_ENABLED is set."""
+
+    @app.before_request
+    def start_nplusone_tracking():
+        # Checked per request: tests and `flask run --debug` switch the flags after create_app()
+        if _enabled(app):
+            _listen()
+            g.nplusone_queries = {}
+
+    @app.after_request
+    def report_nplusone(response):
+        groups = g.pop('nplusone_queries', None)
+        if not groups:
+            return response
+        repeats = _repeats(groups, app.config.get('NPLUSONE_THRESHOLD', 5))
+        if repeats:
+            route = request.url_rule.rule if request.url_rule else request.path
+            message = f"N+1 queries in {request.method} {route}: {_describe(repeats)}"
+            if app.config.get('NPLUSONE_ACTION', 'warn') == 'raise':
+                raise NPlusOneError(message)
+            logger.warning(message)
+        return response
+
+# Only when running under pytest; importing it at app startup is slow
+pytest = sys.modules.get('pytest')
+
+if pytest is not None:
+    @pytest.fixture(name='query_budget')
+    def query_budget_fixture():
+        """The query_budget context manager, for use in tests."""
+        return query_budget
@@ -0,0 +1,157 @@
+# app/permissions.py
+"""
+Role and permission policy in one place.
+
+Roles map to a level (admin > manager > employee > guest) and a permission
+bitmask, both built once at import. The same tables drive the per-request
+checks (has(), can_manage_user(), can_book_room()), the route decorators and
+the SQL filters used by list endpoints (visible_users(), bookable_rooms(),
+visible_rooms()), so a list filtered in the database matches what the
+checks would allow row by row.
+"""
+
+import functools
+import logging
+from flask import jsonify, request
+from flask_login import current_user
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Role levels: a higher level includes everything below it
+ROLE_LEVELS = {
+    'admin': 4,
+    'manager': 3,
+    'employee': 2,
+    'guest': 1
+}
+ROLES = tuple(ROLE_LEVELS)
+
+# Permission bits
+MANAGE_ROOMS = 1 << 0
+MANAGE_USERS = 1 << 1
+INVITE_USERS = 1 << 2
+MANAGE_COMPANY = 1 << 3
+MANAGE_BOOKINGS = 1 << 4  # edit and delete anyone's bookings in the company
+
+ROLE_PERMISSIONS = {
+    'admin': MANAGE_ROOMS | MANAGE_USERS | INVITE_USERS | MANAGE_COMPANY | MANAGE_BOOKINGS,
+    'manager': MANAGE_USERS | INVITE_USERS,
+    'employee': 0,
+    'guest': 0
+}
+
+# Roles whose users a role may see and edit within its company (None: all
+# of them); the same roles are the ones it may assign
+MANAGED_ROLES = {
+    'admin': None,
+    'manager': ('employee', 'guest')
+}
+
+# Room.access_level -> minimum role level; 'all', NULL and unknown values admit everyone
+ACCESS_LEVELS = dict(ROLE_LEVELS, all=0, managers_only=ROLE_LEVELS['manager'], owners_only=ROLE_LEVELS['admin'])
+
+# Per role, the access levels it does not meet (for the SQL filter)
+_DENIED_ACCESS = {
+    role: tuple(name for name, required in ACCESS_LEVELS.items() if required > level)
+    for role, level in ROLE_LEVELS.items()
+}
+_DENIED_ACCESS[None] = tuple(name for name, required in ACCESS_LEVELS.items() if required > 0)
+
+def level(role):
+    return ROLE_LEVELS.get(role, 0)
+
+def has(user, permission):
+    """True when user's role grants every bit in `permission`."""
+    return ROLE_PERMISSIONS.get(user.role, 0) & permission == permission
+
+def accessible_company_id(user):
+    """The company whose data the user works with (their own or external)."""
+    return user.company_id or user.external_company_access
+
+def can_assign_role(user, role):
+    if user.role not in MANAGED_ROLES:
+        return False
+    return role in (MANAGED_ROLES[user.role] or ROLES)
+
+def can_manage_user(user, other_user):
+    """Whether user may see and edit other_user (not counting themselves)."""
+    if user.role not in MANAGED_ROLES or other_user.company_id != accessible_company_id(user):
+        return False
+    roles = MANAGED_ROLES[user.role]
+    return roles is None or other_user.role in roles
+
+def can_see_user(user, other_user):
+    return user.id == other_user.id or can_manage_user(user, other_user)
+
+def can_book_room(user, room):
+    if room.status != 'available':
+        return False
+    return level(user.role) >= ACCESS_LEVELS.get(room.access_level, 0)
+
+def can_edit_booking(user, booking):
+    return booking.user_id == user.id or has(user, MANAGE_BOOKINGS)
+
+def visible_users(user):
+    """can_see_user() as a SQL condition on User."""
+    from app.models import User
+    if user.role not in MANAGED_ROLES:
+        return User.id == user.id
+    managed = User.company_id == accessible_company_id(user)
+    if MANAGED_ROLES[user.role] is not None:
+        managed = db.and_(managed, User.role.in_(MANAGED_ROLES[user.role]))
+    return db.or_(User.id == user.id, managed)
+
+def bookable_rooms(user):
+    """can_book_room() as a SQL condition on Room."""
+    from app.models import Room
+    denied = _DENIED_ACCESS.get(user.role, _DENIED_ACCESS[None])
+    allowed = (Room.access_level.is_(None) | Room.access_level.notin_(denied)) if denied else db.true()
+    return db.and_(Room.status == 'available', allowed)
+
+def _json_list_contains(column, value):
+    # Exact element match in a json.dumps() list like "[1, 12]"; a plain
+    # substring test would also match 1 against 12
+    return db.or_(column == f'[{value}]', column.like(f'[{value}, %'),
+                  column.like(f'%, {value}, %'), column.like(f'%, {value}]'))
+
+def shared_rooms(company_id):
+    """Room.is_visible_to_company() for other companies' rooms, as a SQL condition."""
+    from app.models import Room
+    return db.or_(Room.visibility_type == 'public',
+                  db.and_(Room.visibility_type == 'specific_companies',
+                          _json_list_contains(Room.visible_companies, company_id)))
+
+def visible_rooms(company_id):
+    """Room.is_visible_to_company() as a SQL condition."""
+    from app.models import Room
+    return db.or_(Room.company_id == company_id, shared_rooms(company_id))
+
+def _deny(status, error):
+    logger.debug('Permission denied: %s', error, extra={
+        'endpoint': request.endpoint,
+        'role': current_user.role if current_user.is_authenticated else None
+    })
+    return jsonify({'success': False, 'error': error}), status
+
+def require(check, error):
+    """Route decorator: 401 when logged out, 403 with `error` unless check(current_user)."""
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return _deny(401, 'Authentication required')
+            if not check(current_user):
+                return _deny(403, error)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def require_permission(permission, error):
+    return require(lambda user: has(user, permission), error)
+
+# Route decorators
+company_required = require(lambda user: user.company_id, 'Company membership required')
+admin_required = require(lambda user: user.role == 'admin', 'Admin access required')
+manager_required = require_permission(MANAGE_USERS, 'Manager or Admin access required')
+room_management_required = require_permission(MANAGE_ROOMS, 'Admin access required for room management')
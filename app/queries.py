@@ -0,0 +1,81 @@
+# app/queries.py
+"""
+Query builders for the busiest endpoints.
+
+The routes build these queries here rather than inline, so that
+tests/test_query_plans.py (and benchmarks/query_plans.py on a large seeded
+database) can run EXPLAIN QUERY PLAN on exactly what the routes send and
+fail when one of them stops using an index.
+"""
+
+from sqlalchemy import select
+from app import permissions
+from app.models import Booking, Invitation, Room, RoomEquipment, User
+
+def overlapping_bookings(room_id, start, end, exclude_id=None):
+    """Bookings in the room that overlap [start, end), optionally ignoring one booking."""
+    query = Booking.query.filter(
+        Booking.room_id == room_id,
+        Booking.start_time < end,
+        Booking.end_time > start
+    )
+    if exclude_id is not None:
+        query = query.filter(Booking.id != exclude_id)
+    return query
+
+def company_users(company_id):
+    return User.query.filter_by(company_id=company_id)
+
+def company_rooms(company_id):
+    return Room.query.filter_by(company_id=company_id)
+
+def company_invitations(company_id):
+    return Invitation.query.filter_by(company_id=company_id)
+
+def company_bookings(company_id, room_id=None):
+    query = Booking.query.filter_by(company_id=company_id)
+    if room_id:
+        query = query.filter_by(room_id=room_id)
+    return query
+
+def room_named(company_id, name, exclude_id=None):
+    """The company's room with this name (for the unique-name check)."""
+    query = Room.query.filter_by(company_id=company_id, name=name)
+    if exclude_id is not None:
+        query = query.filter(Room.id != exclude_id)
+    return query
+
+def company_room(company_id, room_id):
+    return Room.query.filter_by(id=room_id, company_id=company_id)
+
+def visible_users(viewer, search=None):
+    """SELECT of the users in the viewer's company they may see, by name; search matches name or email."""
+    query = select(User).where(User.company_id == viewer.company_id, permissions.visible_users(viewer))
+    if search:
+        pattern = f"%{search}%"
+        query = query.where(User.name.ilike(pattern) | User.email.ilike(pattern))
+    return query.order_by(User.name, User.id)
+
+def pending_invitation(company_id, email):
+    return Invitation.query.filter_by(email=email, company_id=company_id, is_used=False)
+
+def active_invitations(company_id, now):
+    return Invitation.query.filter_by(company_id=company_id, is_used=False).filter(Invitation.expires_at > now)
+
+def room_search_filters(company_id, equipment=(), min_capacity=None, max_capacity=None,
+                        room_type=None, location=None):
+    """Filters on Room for rooms visible to the company that match every given criterion."""
+    filters = [permissions.visible_rooms(company_id)]
+    # One indexed lookup in room_equipment per required item
+    for item in dict.fromkeys(RoomEquipment.normalize(item) for item in equipment):
+        if item:
+            filters.append(Room.id.in_(select(RoomEquipment.room_id).where(RoomEquipment.item == item)))
+    if min_capacity is not None:
+        filters.append(Room.capacity >= min_capacity)
+    if max_capacity is not None:
+        filters.append(Room.capacity <= max_capacity)
+    if room_type:
+        filters.append(Room.room_type == room_type)
+    if location:
+        filters.append(Room.location == location)
+    return filters
@@ -1,71 +1,37 @@
 # app/routes.py
 import os
 import json
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for, session
+from flask import Blueprint, render_template, jsonify, request, redirect, url_for, session, current_app
 from flask_login import login_required, current_user, login_user, logout_user
-from .models import Booking, User, Company, Room, Invitation
+from .models import Booking, User, Company, Room, RoomEquipment, Invitation, CalendarCredential
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app import db
-from datetime import datetime, timedelta
-import functools
+from app import database
+from app import sharding
+from app import permissions
+from app import queries
+from app.permissions import company_required, admin_required, manager_required, room_management_required
+from datetime import datetime, timedelta, timezone
+import logging
 
 # Import our new Microsoft service
 from app.services import microsoft_calendar
 from app.services import google_calendar
+from app.services import outbound_sync
+from app.services import providers
+from app.services import aggregator
+from app.services import event_cache
+from app.services import ics_import
+from app.services import room_catalog
 
 bp = Blueprint('main', __name__)
 
-def company_required(f):
-    """Decorator to ensure user belongs to a company"""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated:
-            return jsonify({'success': False, 'error': 'Authentication required'}), 401
-        if not current_user.company_id:
-            return jsonify({'success': False, 'error': 'Company membership required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+logger = logging.getLogger(__name__)
 
-def admin_required(f):
-    """Decorator to ensure user is an admin"""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated:
-            return jsonify({'success': False, 'error': 'Authentication required'}), 401
-        if not current_user.is_admin():
-            return jsonify({'success': False, 'error': 'Admin access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
-
-def manager_required(f):
-    """Decorator to ensure user is a manager or admin"""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        print(f"🔐 manager_required decorator called")
-        print(f"👤 Current user authenticated: {current_user.is_authenticated}")
-        if current_user.is_authenticated:
-            print(f"👤 Current user: {current_user.name} ({current_user.role})")
-            print(f"👤 Can manage users: {current_user.can_manage_users()}")
-        
-        if not current_user.is_authenticated:
-            print("❌ User not authenticated")
-            return jsonify({'success': False, 'error': 'Authentication required'}), 401
-        if not current_user.can_manage_users():
-            print("❌ User cannot manage users")
-            return jsonify({'success': False, 'error': 'Manager or Admin access required'}), 403
-        print("✅ User authorized")
-        return f(*args, **kwargs)
-    return decorated_function
-
-def room_management_required(f):
-    """Decorator to ensure user can manage rooms (admin only)"""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated:
-            return jsonify({'success': False, 'error': 'Authentication required'}), 401
-        if not current_user.can_manage_rooms():
-            return jsonify({'success': False, 'error': 'Admin access required for room management'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+# /api/users page size when paginated
+USERS_PER_PAGE = 50
+USERS_MAX_PER_PAGE = 200
 
 @bp.route('/')
 def index():
@@ -78,14 +44,14 @@ def index():
         dev_user = User.query.filter_by(email='dev@test.com').first()
         if dev_user:
             login_user(dev_user)
-            print(f"🔐 Auto-logged in as: {dev_user.name}")
+            logger.info("Dev mode: auto-logged in as %s", dev_user.email)
     # Force logout in user mode if dev user is logged in
     elif os.environ.get('DEV_MODE') == 'false' and current_user.is_authenticated and current_user.email == 'dev@test.com':
         logout_user()
-        print("🔓 Logged out dev user in user mode")
+        logger.info("User mode: logged out the dev user")
     
     is_microsoft_logged_in = "microsoft_user_token" in session
-    is_google_logged_in = "google_credentials" in session
+    is_google_logged_in = google_calendar.is_connected(current_user)
     return render_template(
         'index.html',
         title='Boardroom Booker',
@@ -134,16 +100,20 @@ def microsoft_callback():
     return redirect(url_for('main.index'))
 
 @bp.route('/login/google')
+@login_required
 def google_login():
     """Redirects the user to Google's login page."""
     auth_url = google_calendar.get_google_auth_url()
     return redirect(auth_url)
 
 @bp.route('/callback/google')
+@login_required
 def google_callback():
     """Handles the callback from Google after authentication."""
+    # Saving the credentials reads then writes; keep both on the primary
+    database.use_primary()
     try:
-        google_calendar.get_token_from_code_for_google(request.url)
+        google_calendar.get_token_from_code_for_google(request.url, current_user)
     except Exception as e:
         return f"An error occurred: {e}", 400
     return redirect(url_for('main.index'))
@@ -152,57 +122,119 @@ def google_callback():
 @bp.route('/api/rooms', methods=['GET'])
 @company_required
 def get_rooms():
-    """Get all rooms visible to the current user's company"""
-    # Get rooms that are visible to the current user's company
-    rooms = Room.query.filter(
-        (Room.company_id == current_user.company_id) |  # Own company's rooms
-        (Room.visibility_type == 'public') |  # Public rooms
-        (Room.visibility_type == 'specific_companies') &  # Rooms shared with specific companies
-        (Room.visible_companies.contains(str(current_user.company_id)))  # Current company is in the list
-    ).all()
+    """
+    Get all rooms visible to the current user's company (served from the
+    room catalog cache). With ?bookable=1, only the company's rooms the
+    current user may book.
+    """
+    if request.args.get('bookable', '').lower() in ('1', 'true', 'yes'):
+        rooms = Room.query.options(joinedload(Room.company)).filter(
+            Room.company_id == current_user.company_id,
+            permissions.bookable_rooms(current_user)
+        ).all()
+        return jsonify({'rooms': [_room_to_dict(room) for room in rooms]})
     
-    return jsonify({
-        'rooms': [{
-            'id': room.id,
-            'name': room.name,
-            'description': room.description,
-            'capacity': room.capacity,
-            'room_type': room.room_type,
-            'location': room.location,
-            'equipment': room.get_equipment_list(),
-            'status': room.status,
-            'access_level': room.access_level,
-            'operating_hours_start': room.operating_hours_start.strftime('%H:%M') if room.operating_hours_start else None,
-            'operating_hours_end': room.operating_hours_end.strftime('%H:%M') if room.operating_hours_end else None,
-            'visibility_type': room.visibility_type,
-            'visible_companies': room.get_visible_companies_list(),
-            'company_id': room.company_id,
-            'company_name': room.company.name if room.company else None,
-            'created_at': room.created_at.isoformat() if room.created_at else None,
-            'updated_at': room.updated_at.isoformat() if room.updated_at else room.created_at.isoformat() if room.created_at else None
-        } for room in rooms]
-    })
+    company_id = current_user.company_id
+    body = room_catalog.get(company_id, lambda: _room_catalog_json(company_id))
+    return current_app.response_class(body, mimetype='application/json')
+
+def _room_catalog_json(company_id):
+    """The /api/rooms body for a company, as stored in the room catalog cache"""
+    # A lagging replica could put pre-write rooms into the new generation
+    database.use_primary()
+    rooms = Room.query.options(joinedload(Room.company)).filter(permissions.visible_rooms(company_id)).all()
+    result = [_room_to_dict(room) for room in rooms]
+    
+    # Sharded mode: public/shared rooms of tenants on other shards. Their ids
+    # are only unique per shard, so they are listed as "<shard>:<id>" and
+    # can't be booked from this shard
+    for shard, room in sharding.shared_rooms_elsewhere(company_id):
+        result.append(dict(_room_to_dict(room), id=f'{shard}:{room.id}', shard=shard, bookable=False))
+    
+    return current_app.json.dumps({'rooms': result})
+
+def warm_room_catalogs():
+    """Builds every company's /api/rooms catalog, on every shard (run.py serve does this before forking)."""
+    if current_app.config.get('ROOM_CACHE_TYPE', 'filesystem') == 'null':
+        return
+    for shard in sharding.shard_names():
+        with current_app.test_request_context():
+            sharding.route_request(shard, remember=False)
+            for company_id in db.session.scalars(select(Company.id)).all():
+                room_catalog.get(company_id, lambda: _room_catalog_json(company_id))
+            db.session.remove()
+
+def _room_to_dict(room):
+    return {
+        'id': room.id,
+        'name': room.name,
+        'description': room.description,
+        'capacity': room.capacity,
+        'room_type': room.room_type,
+        'location': room.location,
+        'equipment': room.get_equipment_list(),
+        'status': room.status,
+        'access_level': room.access_level,
+        'operating_hours_start': room.operating_hours_start.strftime('%H:%M') if room.operating_hours_start else None,
+        'operating_hours_end': room.operating_hours_end.strftime('%H:%M') if room.operating_hours_end else None,
+        'visibility_type': room.visibility_type,
+        'visible_companies': room.get_visible_companies_list(),
+        'company_id': room.company_id,
+        'company_name': room.company.name if room.company else None,
+        'created_at': room.created_at.isoformat() if room.created_at else None,
+        'updated_at': room.updated_at.isoformat() if room.updated_at else room.created_at.isoformat() if room.created_at else None
+    }
+
+@bp.route('/api/rooms/search', methods=['GET'])
+@company_required
+def search_rooms():
+    """
+    Rooms visible to the current user's company that match every given
+    filter: equipment (comma-separated, all required), min_capacity,
+    max_capacity, room_type and location. bookable=1 narrows it to the
+    company's rooms the current user may book, as in /api/rooms.
+    """
+    capacity = {}
+    for name in ('min_capacity', 'max_capacity'):
+        if request.args.get(name):
+            capacity[name] = request.args.get(name, type=int)
+            if capacity[name] is None:
+                return jsonify({'success': False, 'error': f'{name} must be a whole number'}), 400
+    
+    filters = queries.room_search_filters(
+        current_user.company_id,
+        equipment=[item for value in request.args.getlist('equipment') for item in value.split(',')],
+        room_type=request.args.get('room_type'),
+        location=request.args.get('location'),
+        **capacity
+    )
+    if request.args.get('bookable', '').lower() in ('1', 'true', 'yes'):
+        filters += [Room.company_id == current_user.company_id, permissions.bookable_rooms(current_user)]
+    
+    rooms = Room.query.options(joinedload(Room.company)).filter(*filters).order_by(Room.name, Room.id).all()
+    return jsonify({'rooms': [_room_to_dict(room) for room in rooms]})
 
 # User Management Endpoints
 @bp.route('/api/users', methods=['GET'])
 @company_required
 @manager_required
 def get_users():
-    """Get all users for the current user's company (filtered by role hierarchy)"""
-    print(f"🔍 API /api/users called by user: {current_user.name} ({current_user.role})")
-    print(f"🏢 User's company ID: {current_user.company_id}")
-    
-    # Get all users in the company
-    all_users = User.query.filter_by(company_id=current_user.company_id).all()
-    print(f"👥 All users in company: {len(all_users)}")
-    for user in all_users:
-        print(f"  - {user.name} ({user.role})")
-    
-    # Filter users based on role hierarchy
-    visible_users = [user for user in all_users if current_user.can_see_user(user)]
-    print(f"👀 Visible users: {len(visible_users)}")
-    for user in visible_users:
-        print(f"  - {user.name} ({user.role}) - can_see: {current_user.can_see_user(user)}")
+    """
+    Users the current user can see in their company (filtered by role hierarchy
+    in SQL). Optional q searches name and email. With page/per_page the
+    response is a page object; without them it is the plain list.
+    """
+    search = request.args.get('q', '').strip()
+    query = queries.visible_users(current_user, search)
+    
+    paged = 'page' in request.args or 'per_page' in request.args
+    if paged:
+        page = db.paginate(query, page=request.args.get('page', 1, type=int),
+                           per_page=request.args.get('per_page', USERS_PER_PAGE, type=int),
+                           max_per_page=USERS_MAX_PER_PAGE, error_out=False)
+        users = page.items
+    else:
+        users = db.session.scalars(query).all()
     
     result = [{
         'id': user.id,
@@ -213,10 +245,21 @@ def get_users():
         'expires_at': user.expires_at.isoformat() if user.expires_at else None,
         'is_active': user.is_active_user(),
         'created_at': user.created_at.isoformat() if user.created_at else None
-    } for user in visible_users]
+    } for user in users]
     
-    print(f"📤 Returning {len(result)} users")
-    return jsonify(result)
+    logger.debug('get_users returned %d users', len(result),
+                 extra={'user_id': current_user.id, 'role': current_user.role,
+                        'company_id': current_user.company_id, 'search': bool(search)})
+    if not paged:
+        return jsonify(result)
+    return jsonify({
+        'success': True,
+        'users': result,
+        'page': page.page,
+        'per_page': page.per_page,
+        'total': page.total,
+        'pages': page.pages
+    })
 
 @bp.route('/api/users/invite', methods=['POST'])
 @company_required
@@ -249,11 +292,11 @@ def update_user(user_id):
     if not all([name, email, role]):
         return jsonify({'success': False, 'error': 'All fields are required'}), 400
     
-    if role not in ['admin', 'manager', 'employee', 'guest']:
+    if role not in permissions.ROLES:
         return jsonify({'success': False, 'error': 'Invalid role'}), 400
     
     # Check role hierarchy - managers can only update employees and guests
-    if current_user.is_manager() and role not in ['employee', 'guest']:
+    if not permissions.can_assign_role(current_user, role):
         return jsonify({'success': False, 'error': 'Managers can only update employees and guests'}), 403
     
     # Check if email is already taken by another user
@@ -311,6 +354,8 @@ def delete_user(user_id):
     if user.bookings:
         return jsonify({'success': False, 'error': 'Cannot delete user with existing bookings'}), 400
     
+    # Foreign keys are enforced, so stored calendar credentials go first
+    CalendarCredential.query.filter_by(user_id=user.id).delete()
     db.session.delete(user)
     db.session.commit()
     
@@ -325,7 +370,7 @@ def delete_user(user_id):
 @manager_required
 def get_invitations():
     """Get all invitations for the company"""
-    invitations = Invitation.query.filter_by(company_id=current_user.company_id).all()
+    invitations = queries.company_invitations(current_user.company_id).all()
     
     return jsonify({
         'success': True,
@@ -366,14 +411,14 @@ def create_invitation():
     if not all([role, invitation_type]):
         return jsonify({'success': False, 'error': 'Role and invitation type are required'}), 400
     
-    if role not in ['admin', 'manager', 'employee', 'guest']:
+    if role not in permissions.ROLES:
         return jsonify({'success': False, 'error': 'Invalid role'}), 400
     
     if invitation_type not in ['internal', 'external']:
         return jsonify({'success': False, 'error': 'Invalid invitation type'}), 400
     
     # Check role hierarchy - managers can only invite employees and guests
-    if current_user.is_manager() and role not in ['employee', 'guest']:
+    if not permissions.can_assign_role(current_user, role):
         return jsonify({'success': False, 'error': 'Managers can only invite employees and guests'}), 403
     
     # For external invitations, only allow manager role for security
@@ -391,11 +436,7 @@ def create_invitation():
             return jsonify({'success': False, 'error': 'User with this email already exists'}), 400
     
     # Check if invitation already exists
-    existing_invitation = Invitation.query.filter_by(
-        email=email,
-        company_id=current_user.company_id,
-        is_used=False
-    ).first()
+    existing_invitation = queries.pending_invitation(current_user.company_id, email).first()
     
     if existing_invitation and not existing_invitation.is_expired():
         return jsonify({'success': False, 'error': 'Invitation already exists for this email'}), 400
@@ -460,6 +501,8 @@ def accept_invitation(invitation_code):
     if not password:
         return jsonify({'success': False, 'error': 'Password is required'}), 400
     
+    # In sharded mode, continue on the shard that issued the invitation
+    sharding.route_to(select(Invitation).filter_by(code=invitation_code))
     invitation = Invitation.query.filter_by(code=invitation_code).first()
     
     if not invitation:
@@ -536,6 +579,7 @@ def accept_invitation(invitation_code):
 @bp.route('/api/invitations/<invitation_code>/validate', methods=['GET'])
 def validate_invitation(invitation_code):
     """Validate an invitation code"""
+    sharding.route_to(select(Invitation).filter_by(code=invitation_code))
     invitation = Invitation.query.filter_by(code=invitation_code).first()
     
     if not invitation:
@@ -569,10 +613,7 @@ def create_room():
         return jsonify({'success': False, 'error': 'Room name is required'}), 400
     
     # Check if room with same name already exists in company
-    existing_room = Room.query.filter_by(
-        company_id=current_user.company_id,
-        name=name
-    ).first()
+    existing_room = queries.room_named(current_user.company_id, name).first()
     
     if existing_room:
         return jsonify({'success': False, 'error': 'Room with this name already exists'}), 400
@@ -589,9 +630,9 @@ def create_room():
         operating_hours_start=datetime.strptime(data['operating_hours_start'], '%H:%M').time() if data.get('operating_hours_start') and data['operating_hours_start'].strip() and data['operating_hours_start'] != '' else None,
         operating_hours_end=datetime.strptime(data['operating_hours_end'], '%H:%M').time() if data.get('operating_hours_end') and data['operating_hours_end'].strip() and data['operating_hours_end'] != '' else None,
         company_id=current_user.company_id,
-        visibility_type=data.get('visibility_type', 'company'),
-        visible_companies=data.get('visible_companies')
+        visibility_type=data.get('visibility_type', 'company')
     )
+    room.set_visible_companies_list(data.get('visible_companies'))
     
     # Set equipment
     if data.get('equipment'):
@@ -599,6 +640,7 @@ def create_room():
     
     db.session.add(room)
     db.session.commit()
+    room_catalog.invalidate()
     
     return jsonify({
         'success': True,
@@ -636,10 +678,7 @@ def update_room(room_id):
         return jsonify({'success': False, 'error': 'Room name is required'}), 400
     
     # Check if room with same name already exists in company
-    existing_room = Room.query.filter_by(
-        company_id=current_user.company_id,
-        name=name
-    ).filter(Room.id != room_id).first()
+    existing_room = queries.room_named(current_user.company_id, name, exclude_id=room_id).first()
     
     if existing_room:
         return jsonify({'success': False, 'error': 'Room with this name already exists'}), 400
@@ -674,6 +713,7 @@ def update_room(room_id):
         room.set_equipment_list(data['equipment'])
     
     db.session.commit()
+    room_catalog.invalidate()
     
     return jsonify({'success': True})
 
@@ -692,6 +732,7 @@ def delete_room(room_id):
     
     db.session.delete(room)
     db.session.commit()
+    room_catalog.invalidate()
     
     return jsonify({'success': True})
 
@@ -702,56 +743,50 @@ def get_bookings():
     """Get all bookings for the current user's company"""
     room_id = request.args.get('room_id', type=int)
     
-    query = Booking.query.filter_by(company_id=current_user.company_id)
-    
-    if room_id:
-        query = query.filter_by(room_id=room_id)
-    
-    bookings = query.all()
-    
-    events = []
-    for booking in bookings:
-        # Only show public bookings or user's own bookings
-        if booking.is_public or booking.user_id == current_user.id:
-            events.append({
-                'title': booking.title,
-                'start': booking.start_time.isoformat(),
-                'end': booking.end_time.isoformat(),
-                'id': booking.id,
-                'room_id': booking.room_id,
-                'room_name': booking.room.name,
-                'is_public': booking.is_public,
-                'user_id': booking.user_id,
-                'user_name': booking.user.name,
-                'can_edit': booking.user_id == current_user.id or current_user.is_admin(),
-                'extendedProps': {
-                    'organizer': booking.user.name,
-                    'room': booking.room.name
-                }
-            })
-        else:
-            # Show private booking as "Unavailable"
-            events.append({
-                'title': 'Unavailable',
-                'start': booking.start_time.isoformat(),
-                'end': booking.end_time.isoformat(),
-                'id': f'private_{booking.id}',
-                'room_id': booking.room_id,
-                'room_name': booking.room.name,
-                'is_public': False,
-                'user_id': booking.user_id,
-                'user_name': booking.user.name,
-                'can_edit': False,
-                'backgroundColor': '#6B7280',
-                'borderColor': '#6B7280',
-                'extendedProps': {
-                    'organizer': 'Private',
-                    'room': booking.room.name
-                }
-            })
+    bookings = queries.company_bookings(current_user.company_id, room_id)\
+        .options(joinedload(Booking.room), joinedload(Booking.user)).all()
+    
+    events = [providers.booking_to_event(booking, current_user.id, current_user.is_admin()) for booking in bookings]
     
     return jsonify(events)
 
+def _parse_window_param(value):
+    """Parses an ISO date/datetime query param into naive UTC."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@bp.route('/api/calendar/feed')
+@company_required
+def get_calendar_feed():
+    """Merged feed of local bookings and connected external calendars"""
+    room_id = request.args.get('room_id', type=int)
+    try:
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = _parse_window_param(request.args['start']) if request.args.get('start') else today - timedelta(days=7)
+        end = _parse_window_param(request.args['end']) if request.args.get('end') else start + timedelta(days=42)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid date format provided.'}), 400
+    # Whole hours, widened outwards, so repeated loads share event cache keys
+    start = start.replace(minute=0, second=0, microsecond=0)
+    if end.minute or end.second or end.microsecond:
+        end = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    
+    local = providers.LocalSource(current_user.company_id, current_user.id, current_user.is_admin(), room_id)
+    external = [
+        provider for provider in providers.get_connected_providers(current_user.company_id)
+        if not room_id or current_app.config.get(provider.room_config_key) == room_id
+    ]
+    feed = aggregator.get_merged_feed(local, external, start, end)
+    return jsonify({'success': True, **feed})
+
+@bp.route('/api/calendar/cache-stats')
+@admin_required
+def get_calendar_cache_stats():
+    """Hit/miss counters for the external calendar event cache"""
+    return jsonify({'success': True, 'stats': event_cache.cache.get_stats()})
+
 @bp.route('/api/bookings/new', methods=['POST'])
 @company_required
 def new_booking():
@@ -801,20 +836,13 @@ def new_booking():
             return jsonify({'success': False, 'error': 'End time must be after start time.'}), 400
         
         # Verify room belongs to user's company
-        room = Room.query.filter_by(
-            id=room_id,
-            company_id=current_user.company_id
-        ).first()
+        room = queries.company_room(current_user.company_id, room_id).first()
         
         if not room:
             return jsonify({'success': False, 'error': 'Invalid room selected.'}), 400
         
         # Check for overlapping bookings in the same room
-        overlapping_booking = Booking.query.filter(
-            Booking.room_id == room_id,
-            Booking.start_time < end_time,
-            Booking.end_time > start_time
-        ).first()
+        overlapping_booking = queries.overlapping_bookings(room_id, start_time, end_time).first()
 
         if overlapping_booking:
             return jsonify({'success': False, 'error': 'This time slot is already booked.'}), 409
@@ -833,6 +861,7 @@ def new_booking():
         
         db.session.add(new_booking)
         db.session.commit()
+        outbound_sync.enqueue_booking(new_booking)
         
         return jsonify({
             'success': True, 
@@ -842,9 +871,9 @@ def new_booking():
 
     except ValueError:
         return jsonify({'success': False, 'error': 'Invalid date format provided.'}), 400
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error creating booking: {e}")
+        logger.exception("Error creating booking")
         return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
 
 @bp.route('/api/bookings/<int:booking_id>/update', methods=['POST'])
@@ -857,7 +886,7 @@ def update_booking(booking_id):
     ).first_or_404()
     
     # Check if user can edit this booking
-    if booking.user_id != current_user.id and not current_user.is_admin():
+    if not permissions.can_edit_booking(current_user, booking):
         return jsonify({'success': False, 'error': 'You can only edit your own bookings.'}), 403
     
     try:
@@ -903,25 +932,19 @@ def update_booking(booking_id):
         
         # Verify room belongs to user's company
         if room_id != booking.room_id:
-            room = Room.query.filter_by(
-                id=room_id,
-                company_id=current_user.company_id
-            ).first()
+            room = queries.company_room(current_user.company_id, room_id).first()
             
             if not room:
                 return jsonify({'success': False, 'error': 'Invalid room selected.'}), 400
         
         # Check for overlapping bookings in the same room (excluding current booking)
-        overlapping_booking = Booking.query.filter(
-            Booking.room_id == room_id,
-            Booking.id != booking_id,
-            Booking.start_time < end_time,
-            Booking.end_time > start_time
-        ).first()
+        overlapping_booking = queries.overlapping_bookings(room_id, start_time, end_time,
+                                                           exclude_id=booking_id).first()
 
         if overlapping_booking:
             return jsonify({'success': False, 'error': 'This time slot is already booked.'}), 409
         
+        previous_room_id = booking.room_id
         booking.title = title
         booking.start_time = start_time
         booking.end_time = end_time
@@ -931,13 +954,14 @@ def update_booking(booking_id):
         booking.visible_companies = json.dumps(selected_companies) if selected_companies else None
         
         db.session.commit()
+        outbound_sync.enqueue_booking(booking, previous_room_id)
         return jsonify({'success': True})
         
     except ValueError:
         return jsonify({'success': False, 'error': 'Invalid date format provided.'}), 400
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating booking: {e}")
+        logger.exception("Error updating booking")
         return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
 
 @bp.route('/api/bookings/<int:booking_id>/delete', methods=['POST'])
@@ -950,13 +974,40 @@ def delete_booking(booking_id):
     ).first_or_404()
     
     # Check if user can delete this booking
-    if booking.user_id != current_user.id and not current_user.is_admin():
+    if not permissions.can_edit_booking(current_user, booking):
         return jsonify({'success': False, 'error': 'You can only delete your own bookings.'}), 403
     
     db.session.delete(booking)
     db.session.commit()
+    outbound_sync.enqueue_booking_delete(booking)
     return jsonify({'success': True})
 
+@bp.route('/api/bookings/import', methods=['POST'])
+@company_required
+@admin_required
+def import_bookings():
+    """Bulk import bookings from an uploaded .ics file"""
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({'success': False, 'error': 'No .ics file uploaded.'}), 400
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    
+    try:
+        report = ics_import.import_ics(
+            upload.stream,
+            current_user.company_id,
+            user_id=current_user.id,
+            room_id=request.values.get('room_id', type=int),
+            dry_run=dry_run
+        )
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception:
+        logger.exception("Error importing bookings")
+        return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
+    
+    return jsonify({'success': True, 'report': report})
+
 @bp.route('/api/current-user', methods=['GET'])
 @company_required
 def get_current_user():
@@ -1035,11 +1086,12 @@ def update_company():
         company.domain = domain
         
         db.session.commit()
+        room_catalog.invalidate()
         return jsonify({'success': True})
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating company: {e}")
+        logger.exception("Error updating company")
         return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
 
 @bp.route('/api/company/stats', methods=['GET'])
@@ -1050,20 +1102,17 @@ def get_company_stats():
     company_id = current_user.company_id
     
     # Get counts
-    user_count = User.query.filter_by(company_id=company_id).count()
-    room_count = Room.query.filter_by(company_id=company_id).count()
-    booking_count = Booking.query.filter_by(company_id=company_id).count()
-    active_invitation_count = Invitation.query.filter_by(
-        company_id=company_id,
-        is_used=False
-    ).filter(Invitation.expires_at > datetime.utcnow()).count()
+    user_count = queries.company_users(company_id).count()
+    room_count = queries.company_rooms(company_id).count()
+    booking_count = queries.company_bookings(company_id).count()
+    active_invitation_count = queries.active_invitations(company_id, datetime.utcnow()).count()
     
     # Get recent activity
-    recent_bookings = Booking.query.filter_by(company_id=company_id)\
+    recent_bookings = queries.company_bookings(company_id)\
         .order_by(Booking.created_at.desc())\
         .limit(5).all()
     
-    recent_users = User.query.filter_by(company_id=company_id)\
+    recent_users = queries.company_users(company_id)\
         .order_by(User.created_at.desc())\
         .limit(5).all()
     
@@ -1098,19 +1147,19 @@ def get_companies_overview():
     """Get overview of all companies (admin only sees their own company)"""
     admin_company_id = current_user.company_id
     
-    # Get all companies but admin only sees their own company's data
-    companies = Company.query.all()
+    # Get all companies (across shards) but admin only sees their own company's data
+    companies = sharding.all_companies()
     
     companies_data = []
     for company in companies:
         # Only show detailed stats for admin's own company
         if company.id == admin_company_id:
             # Get detailed stats for admin's company
-            user_count = User.query.filter_by(company_id=company.id).count()
-            booking_count = Booking.query.filter_by(company_id=company.id).count()
+            user_count = queries.company_users(company.id).count()
+            booking_count = queries.company_bookings(company.id).count()
             
             # Get upcoming bookings (next 7 days)
-            upcoming_bookings = Booking.query.filter_by(company_id=company.id)\
+            upcoming_bookings = queries.company_bookings(company.id)\
                 .filter(Booking.start_time >= datetime.utcnow())\
                 .filter(Booking.start_time <= datetime.utcnow() + timedelta(days=7))\
                 .order_by(Booking.start_time.asc())\
@@ -1156,7 +1205,7 @@ def get_companies_overview():
 @admin_required
 def get_all_companies():
     """Get all companies (admin only)"""
-    companies = Company.query.all()
+    companies = sharding.all_companies()
     
     return jsonify({
         'success': True,
@@ -1189,15 +1238,13 @@ def create_company():
         if '@' not in domain:
             return jsonify({'success': False, 'error': 'Domain must contain an @ symbol (e.g., @company.com).'}), 400
         
-        # Check if domain is already taken
-        existing_company = Company.query.filter_by(domain=domain).first()
+        # Check if domain is already taken (on any shard)
+        existing_company = sharding.first(select(Company).filter_by(domain=domain))
         if existing_company:
             return jsonify({'success': False, 'error': 'Domain is already in use by another company.'}), 409
         
-        # Create new company
-        new_company = Company(name=name, domain=domain)
-        db.session.add(new_company)
-        db.session.commit()
+        # Create new company (on its assigned shard in sharded mode)
+        new_company = sharding.create_company(name, domain)
         
         return jsonify({
             'success': True,
@@ -1209,9 +1256,9 @@ def create_company():
             }
         })
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error creating company: {e}")
+        logger.exception("Error creating company")
         return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
 
 @bp.route('/api/companies/<int:company_id>', methods=['GET'])
@@ -1219,7 +1266,8 @@ def create_company():
 @admin_required
 def get_company_by_id(company_id):
     """Get a specific company by ID (admin only)"""
-    company = Company.query.get(company_id)
+    sharding.route_to_company(company_id)
+    company = db.session.get(Company, company_id)
     
     if not company:
         return jsonify({'success': False, 'error': 'Company not found'}), 404
@@ -1239,7 +1287,8 @@ def get_company_by_id(company_id):
 @admin_required
 def update_company_by_id(company_id):
     """Update a specific company by ID (admin only)"""
-    company = Company.query.get(company_id)
+    sharding.route_to_company(company_id)
+    company = db.session.get(Company, company_id)
     
     if not company:
         return jsonify({'success': False, 'error': 'Company not found'}), 404
@@ -1261,10 +1310,10 @@ def update_company_by_id(company_id):
             return jsonify({'success': False, 'error': 'Domain must contain an @ symbol (e.g., @company.com).'}), 400
         
         # Check if domain is already taken by another company
-        existing_company = Company.query.filter(
+        existing_company = sharding.first(select(Company).where(
             Company.domain == domain,
             Company.id != company_id
-        ).first()
+        ))
         
         if existing_company:
             return jsonify({'success': False, 'error': 'Domain is already in use by another company.'}), 409
@@ -1273,18 +1322,19 @@ def update_company_by_id(company_id):
         company.domain = domain
         
         db.session.commit()
+        room_catalog.invalidate()
         return jsonify({'success': True})
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating company: {e}")
+        logger.exception("Error updating company")
         return jsonify({'success': False, 'error': 'An unexpected error occurred.'}), 500
 
 @bp.route('/api/companies/list', methods=['GET'])
 @company_required
 def get_companies_list():
     """Get a simple list of all companies for dropdowns"""
-    companies = Company.query.all()
+    companies = sharding.all_companies()
     return jsonify({
         'companies': [{
             'id': company.id,
@@ -1298,7 +1348,8 @@ def get_companies_list():
 @admin_required
 def delete_company_by_id(company_id):
     """Delete a specific company by ID (admin only)"""
-    company = Company.query.get(company_id)
+    sharding.route_to_company(company_id)
+    company = db.session.get(Company, company_id)
     
     if not company:
         return jsonify({'success': False, 'error': 'Company not found'}), 404
@@ -1309,19 +1360,37 @@ def delete_company_by_id(company_id):
     
     try:
         # Get counts for warning purposes
-        user_count = User.query.filter_by(company_id=company_id).count()
-        room_count = Room.query.filter_by(company_id=company_id).count()
-        booking_count = Booking.query.filter_by(company_id=company_id).count()
+        user_count = queries.company_users(company_id).count()
+        room_count = queries.company_rooms(company_id).count()
+        booking_count = queries.company_bookings(company_id).count()
         
-        # Delete all related data first (cascade delete)
-        # Delete bookings
-        Booking.query.filter_by(company_id=company_id).delete()
+        # Delete all related data first (cascade delete); foreign keys are
+        # enforced, so rows in other companies that point here go too
+        room_ids = db.session.query(Room.id).filter_by(company_id=company_id)
+        user_ids = db.session.query(User.id).filter_by(company_id=company_id)
         
-        # Delete rooms
+        # Delete bookings, including other companies' bookings in these rooms
+        Booking.query.filter(
+            (Booking.company_id == company_id) | Booking.room_id.in_(room_ids) | Booking.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+        
+        # Delete rooms and their equipment
+        RoomEquipment.query.filter(RoomEquipment.room_id.in_(room_ids)).delete(synchronize_session=False)
         Room.query.filter_by(company_id=company_id).delete()
         
         # Delete invitations
-        Invitation.query.filter_by(company_id=company_id).delete()
+        Invitation.query.filter(
+            (Invitation.company_id == company_id) | Invitation.invited_by_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+        
+        # Delete stored calendar credentials
+        CalendarCredential.query.filter(
+            (CalendarCredential.company_id == company_id) | CalendarCredential.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+        
+        # Revoke cross-company access granted to other companies' users
+        User.query.filter_by(external_company_access=company_id).update(
+            {'external_company_access': None}, synchronize_session=False)
         
         # Delete users (this will cascade to any other related data)
         User.query.filter_by(company_id=company_id).delete()
@@ -1329,13 +1398,15 @@ def delete_company_by_id(company_id):
         # Finally delete the company
         db.session.delete(company)
         db.session.commit()
+        sharding.forget_company(company_id)
+        room_catalog.invalidate()
         
         return jsonify({
             'success': True,
             'message': f'Company "{company.name}" deleted successfully. Removed {user_count} users, {room_count} rooms, and {booking_count} bookings.'
         })
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting company: {e}")
+        logger.exception("Error deleting company")
         return jsonify({'success': False, 'error': 'An unexpected error occurred while deleting the company.'}), 500
\ No newline at end of file
@@ -0,0 +1,286 @@
+# app/seeding.py
+
+import itertools
+import json
+import random
+from datetime import datetime, timedelta, time
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import Booking, Company, Invitation, Room, RoomEquipment, User
+from app.services import room_catalog
+
+CHUNK_SIZE = 20000
+
+# Relative booking demand per half-hour slot from 08:00 to 18:00:
+# a morning peak, a lunch dip and a smaller afternoon peak
+SLOT_WEIGHTS = [0.3, 0.5, 0.9, 1.0, 1.0, 0.9, 0.7, 0.5, 0.3, 0.3,
+                0.6, 0.8, 0.9, 0.9, 0.8, 0.7, 0.5, 0.4, 0.3, 0.2]
+DAY_START = time(8, 0)
+
+# Monday..Friday demand; weekends get no bookings
+WEEKDAY_WEIGHTS = [0.8, 1.0, 1.1, 1.0, 0.6]
+
+ROOM_TYPES = ['meeting', 'meeting', 'conference', 'huddle', 'boardroom', 'training']
+# The room form's equipment values
+EQUIPMENT = ['projector', 'whiteboard', 'video_conferencing', 'audio_system', 'computer', 'tv', 'phone', 'wifi']
+MEETING_TITLES = ['Team Standup', 'Client Meeting', 'Project Review', 'Planning', 'One-on-one',
+                  'Design Review', 'Sprint Retro', 'Interview', 'Budget Review', 'Workshop']
+RECURRING_TITLES = ['Weekly Sync', 'Team Standup', 'Leadership Meeting', 'All Hands', 'Sales Pipeline']
+
+def _chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+def _user_roles(count):
+    """One admin, ~10% managers, ~5% guests, the rest employees."""
+    managers = max(1, count // 10) if count > 1 else 0
+    guests = count // 20
+    return ['admin'] + ['manager'] * managers + ['employee'] * (count - 1 - managers - guests) + ['guest'] * guests
+
+def _room_days(rng, room, start_day, occupancy, recurring, public_share, company_ids, now):
+    """
+    Yields one list of booking rows per calendar day for one room, forever.
+    Recurring series are laid down first; ad-hoc meetings then fill free
+    half-hour slots with probability shaped by time of day and weekday.
+    """
+    series = []
+    for _ in range(recurring):
+        series.append({
+            'weekday': rng.randrange(5),
+            'slot': rng.randrange(len(SLOT_WEIGHTS) - 2),
+            'length': rng.choice([1, 2, 2, 3]),
+            'title': rng.choice(RECURRING_TITLES),
+            'user_id': rng.choice(room['user_ids'])
+        })
+
+    for day_index in itertools.count():
+        day = start_day + timedelta(days=day_index)
+        weekday = day.weekday()
+        if weekday >= 5:
+            yield []
+            continue
+        day_start = datetime.combine(day, DAY_START)
+        taken = [False] * len(SLOT_WEIGHTS)
+
+        meetings = []
+        for item in series:
+            if item['weekday'] == weekday and not any(taken[item['slot']:item['slot'] + item['length']]):
+                for s in range(item['slot'], item['slot'] + item['length']):
+                    taken[s] = True
+                meetings.append((item['slot'], item['length'], item['title'], item['user_id']))
+
+        slot = 0
+        while slot < len(SLOT_WEIGHTS):
+            if not taken[slot] and rng.random() < occupancy * SLOT_WEIGHTS[slot] * WEEKDAY_WEIGHTS[weekday]:
+                wanted = rng.choice([1, 1, 2, 2, 2, 3, 4])
+                # Stop short of the next taken slot or the end of the day
+                length = next((n for n in range(1, wanted)
+                               if slot + n >= len(SLOT_WEIGHTS) or taken[slot + n]), wanted)
+                meetings.append((slot, length, rng.choice(MEETING_TITLES), rng.choice(room['user_ids'])))
+                slot += length
+            else:
+                slot += 1
+
+        rows = []
+        for slot, length, title, user_id in meetings:
+            start = day_start + timedelta(minutes=30 * slot)
+            roll = rng.random()
+            if roll < public_share:
+                visibility, is_public, visible = 'all_companies', True, None
+            elif roll < public_share + (1 - public_share) / 2 or len(company_ids) < 2:
+                visibility, is_public, visible = 'owner_company', False, None
+            else:
+                visibility, is_public = 'select_companies', False
+                visible = json.dumps(rng.sample(company_ids, 2))
+            rows.append({
+                'title': title,
+                'start_time': start,
+                'end_time': start + timedelta(minutes=30 * length),
+                'organizer_name': None,
+                'is_public': is_public,
+                'visibility_type': visibility,
+                'visible_companies': visible,
+                'company_id': room['company_id'],
+                'room_id': room['id'],
+                'user_id': user_id,
+                'created_at': now,
+                'updated_at': now
+            })
+        yield rows
+
+def generate(companies=10, rooms_per_company=5, users_per_company=20, years=1, start=None, bookings=None,
+             occupancy=0.15, recurring_per_room=1, public_share=0.7, invitations_per_company=0,
+             password='password', seed=42, progress=None):
+    """
+    Bulk-inserts a synthetic dataset and returns counts of what was created.
+    - Output depends only on the arguments, so the same seed gives the same data.
+    - Bookings cover `years` of working days from `start` (default: Jan 1 of
+      the current year); pass `bookings` to stop at exactly that many instead.
+    - occupancy scales ad-hoc demand (roughly the share of peak slots booked).
+    - Every user shares one password hash, since hashing dominates otherwise.
+    progress(count) is called after each inserted chunk of bookings.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    start = start or datetime(now.year, 1, 1)
+    start_day = start.date() if isinstance(start, datetime) else start
+    password_hash = generate_password_hash(password)
+
+    company_id = _next_id(Company)
+    user_id = _next_id(User)
+    room_id = _next_id(Room)
+
+    company_rows, user_rows, room_rows, equipment_rows, invitation_rows = [], [], [], [], []
+    for c in range(companies):
+        cid = company_id + c
+        company_rows.append({'id': cid, 'name': f'Company {cid}', 'domain': f'company{cid}.example.com',
+                             'created_at': now})
+        user_ids = []
+        for u, role in enumerate(_user_roles(users_per_company)):
+            uid = user_id + c * users_per_company + u
+            user_ids.append(uid)
+            user_rows.append({'id': uid, 'email': f'user{u + 1}@company{cid}.example.com',
+                              'name': f'User {cid}-{u + 1}', 'password_hash': password_hash, 'role': role,
+                              'company_id': cid, 'created_at': now,
+                              'expires_at': now + timedelta(days=30) if role == 'guest' else None})
+        for r in range(rooms_per_company):
+            roll = rng.random()
+            visibility = 'company' if roll < 0.7 else 'public' if roll < 0.85 or companies < 2 else 'specific_companies'
+            rid = room_id + c * rooms_per_company + r
+            equipment = rng.sample(EQUIPMENT, rng.randint(0, 4))
+            equipment_rows.extend({'room_id': rid, 'item': item} for item in equipment)
+            room_rows.append({
+                'id': rid,
+                'name': f'Room {r + 1}',
+                'capacity': rng.choice([4, 6, 8, 12, 20, 40]),
+                'room_type': rng.choice(ROOM_TYPES),
+                'location': f'Floor {r // 4 + 1}',
+                'equipment': json.dumps(equipment) if equipment else None,
+                'status': 'available',
+                'access_level': 'all' if rng.random() < 0.9 else 'manager',
+                'company_id': cid,
+                'visibility_type': visibility,
+                'visible_companies': json.dumps(rng.sample([company_id + i for i in range(companies) if i != c],
+                                                           min(2, companies - 1)))
+                                     if visibility == 'specific_companies' else None,
+                'created_at': now,
+                'updated_at': now
+            })
+        for i in range(invitations_per_company):
+            invitation_rows.append({
+                'code': f'{cid:04X}{i:04X}'[-8:], 'email': f'invitee{i + 1}@company{cid}.example.com',
+                'name': f'Invitee {cid}-{i + 1}', 'role': 'employee', 'company_id': cid,
+                'invited_by_id': user_ids[0], 'expires_at': now + timedelta(days=7), 'is_used': False,
+                'created_at': now
+            })
+
+    for model, rows in ((Company, company_rows), (User, user_rows), (Room, room_rows), (RoomEquipment, equipment_rows),
+                        (Invitation, invitation_rows)):
+        for chunk in _chunks(rows):
+            db.session.execute(insert(model), chunk)
+    db.session.commit()
+    room_catalog.invalidate()
+
+    users_by_company = {}
+    for row in user_rows:
+        if row['role'] != 'guest':
+            users_by_company.setdefault(row['company_id'], []).append(row['id'])
+    company_ids = [row['id'] for row in company_rows]
+    rooms = [{'id': row['id'], 'company_id': row['company_id'], 'user_ids': users_by_company[row['company_id']]}
+             for row in room_rows]
+
+    days = int(365.25 * years) if bookings is None else None
+    days_used = 0
+
+    def booking_rows():
+        nonlocal days_used
+        # One stream per room seeded from (seed, room), interleaved day by day
+        # so a booking target spreads evenly over every room
+        streams = [_room_days(random.Random(f'{seed}:{room["id"]}'), room, start_day, occupancy,
+                              recurring_per_room, public_share, company_ids, now) for room in rooms]
+        produced = 0
+        for day_index in itertools.count():
+            if (days is not None and day_index >= days) or (bookings is not None and produced >= bookings):
+                return
+            days_used = day_index + 1
+            for stream in streams:
+                for row in next(stream):
+                    if bookings is not None and produced >= bookings:
+                        return
+                    produced += 1
+                    yield row
+
+    total = 0
+    for chunk in _chunks(booking_rows()):
+        db.session.execute(insert(Booking), chunk)
+        db.session.commit()
+        total += len(chunk)
+        if progress:
+            progress(total)
+
+    return {
+        'companies': len(company_rows),
+        'users': len(user_rows),
+        'rooms': len(room_rows),
+        'invitations': len(invitation_rows),
+        'bookings': total,
+        'days': days_used
+    }
+
+def seed_demo():
+    """
+    The small Acme dataset used for local development: one company, an admin
+    and a regular user, five rooms and three bookings today. Returns False
+    when data already exists.
+    """
+    if Company.query.first():
+        return False
+    now = datetime.now()
+    today = now.replace(second=0, microsecond=0)
+
+    company_id = _next_id(Company)
+    db.session.execute(insert(Company), [{'id': company_id, 'name': 'Acme Corporation', 'domain': 'acme.com',
+                                          'created_at': now}])
+    admin_id, user_id = _next_id(User), _next_id(User) + 1
+    db.session.execute(insert(User), [
+        {'id': admin_id, 'email': 'admin@acme.com', 'name': 'Admin User',
+         'password_hash': generate_password_hash('admin123'), 'role': 'admin', 'company_id': company_id,
+         'created_at': now},
+        {'id': user_id, 'email': 'user@acme.com', 'name': 'Regular User',
+         'password_hash': generate_password_hash('user123'), 'role': 'employee', 'company_id': company_id,
+         'created_at': now}
+    ])
+    first_room = _next_id(Room)
+    names = ['Conference Room A', 'Conference Room B', 'Board Room', 'Meeting Room 1', 'Meeting Room 2']
+    db.session.execute(insert(Room), [{'id': first_room + i, 'name': name, 'company_id': company_id,
+                                       'created_at': now, 'updated_at': now} for i, name in enumerate(names)])
+    samples = [
+        ('Team Standup', 9, 0, 9, 30, 'Admin User', True, 0, admin_id),
+        ('Client Meeting', 14, 0, 15, 0, 'Regular User', False, 1, user_id),
+        ('Project Review', 16, 0, 17, 0, 'Admin User', True, 2, admin_id)
+    ]
+    db.session.execute(insert(Booking), [{
+        'title': title,
+        'start_time': today.replace(hour=start_hour, minute=start_minute),
+        'end_time': today.replace(hour=end_hour, minute=end_minute),
+        'organizer_name': organizer,
+        'is_public': is_public,
+        'company_id': company_id,
+        'room_id': first_room + room_index,
+        'user_id': owner,
+        'created_at': now,
+        'updated_at': now
+    } for title, start_hour, start_minute, end_hour, end_minute, organizer, is_public, room_index, owner in samples])
+    db.session.commit()
+    room_catalog.invalidate()
+    return True
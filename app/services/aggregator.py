@@ -0,0 +1,111 @@
+# app/services/aggregator.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from app import db
+from app import database
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    # Created on first use so each worker process builds its own pool after fork
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('CALENDAR_FEED_WORKERS', 8),
+                thread_name_prefix='calendar-feed'
+            )
+        return _executor
+
+def _in_app_context(app, fn, *args):
+    # Pool threads have no request, so carry the caller's shard over
+    shard = database.current_shard_key()
+
+    def run():
+        with app.app_context(), database.shard_scope(shard):
+            try:
+                return fn(*args)
+            finally:
+                db.session.remove()
+    return run
+
+def merge_events(local_events, provider_events):
+    """
+    Local bookings win. Provider events are dropped when a local booking
+    already carries their id (synced either way), or when another provider
+    already returned an event with the same title and times.
+    """
+    merged = []
+    seen_external = set()
+    for event in local_events:
+        for provider, external_id in event.pop('external_ids', []):
+            if external_id:
+                seen_external.add((provider, external_id))
+        merged.append(event)
+
+    seen_keys = set()
+    for events in provider_events:
+        for event in events:
+            if (event['provider'], event['external_id']) in seen_external:
+                continue
+            key = ((event['title'] or '').strip().lower(), event['start'], event['end'])
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            merged.append(event)
+
+    merged.sort(key=lambda event: event['start'])
+    return merged
+
+def get_merged_feed(local, providers, start, end, budget=None):
+    """
+    Fetches local bookings on the request thread while the providers are
+    fetched on the pool, and merges them. A provider that has not answered
+    within the latency budget (seconds) is left out and listed in 'partial',
+    along with sources that raised.
+    """
+    app = current_app._get_current_object()
+    if budget is None:
+        budget = app.config.get('CALENDAR_FEED_BUDGET', 2.0)
+
+    started = time.monotonic()
+    executor = _get_executor()
+    futures = {executor.submit(_in_app_context(app, provider.fetch_events, start, end)): provider
+               for provider in providers}
+
+    results = {}
+    errors = {}
+    # Never queued behind provider calls stuck in retries
+    try:
+        results[local.name] = local.fetch_events(start, end)
+    except Exception:
+        logger.exception('Calendar source %s failed', local.name)
+        errors[local.name] = 'Unavailable'
+
+    done, not_done = wait(futures, timeout=max(0.0, budget - (time.monotonic() - started)))
+    for future in done:
+        provider = futures[future]
+        try:
+            results[provider.name] = future.result()
+        except Exception:
+            logger.exception('Calendar source %s failed', provider.name)
+            errors[provider.name] = 'Unavailable'
+    for future in not_done:
+        # Still running; its own HTTP timeouts will end it, we just stop waiting
+        future.cancel()
+        errors[futures[future].name] = 'Timed out'
+
+    return {
+        'events': merge_events(results.get(local.name, []),
+                               [results.get(p.name, []) for p in providers]),
+        'sources': [local.name] + [provider.name for provider in providers],
+        'partial': sorted(errors),
+        'errors': errors
+    }
@@ -0,0 +1,206 @@
+# app/services/calendar_sync.py
+
+import logging
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Booking, Room, CalendarSyncState, CalendarCredential
+from app.services import microsoft_calendar
+from app.services import google_calendar
+from app.services import event_cache
+
+logger = logging.getLogger(__name__)
+
+# Booking column that holds each provider's event id
+EVENT_ID_COLUMNS = {
+    'microsoft': Booking.microsoft_calendar_event_id,
+    'google': Booking.google_calendar_event_id
+}
+
+def get_sync_state(provider, calendar_id):
+    """Returns the stored sync position for a calendar, creating it if needed."""
+    state = CalendarSyncState.query.filter_by(provider=provider, calendar_id=calendar_id).first()
+    if not state:
+        state = CalendarSyncState(provider=provider, calendar_id=calendar_id)
+        db.session.add(state)
+        db.session.flush()
+    return state
+
+def apply_external_changes(provider, room, changed, removed_ids):
+    """
+    Upserts and deletes bookings for one page of provider changes.
+    - changed maps event id -> Booking field values
+    - removed_ids is an iterable of event ids deleted upstream
+    Existing rows are loaded with a single IN query per page.
+    """
+    column = EVENT_ID_COLUMNS[provider]
+    removed_ids = set(removed_ids) - set(changed)
+    event_ids = set(changed) | removed_ids
+    if not event_ids:
+        return {'created': 0, 'updated': 0, 'deleted': 0}
+
+    existing = {
+        getattr(booking, column.key): booking
+        for booking in Booking.query.filter(column.in_(event_ids)).all()
+    }
+
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    for event_id, fields in changed.items():
+        booking = existing.get(event_id)
+        if booking is None:
+            booking = Booking(room_id=room.id, company_id=room.company_id)
+            setattr(booking, column.key, event_id)
+            db.session.add(booking)
+            counts['created'] += 1
+        else:
+            counts['updated'] += 1
+        for name, value in fields.items():
+            setattr(booking, name, value)
+
+    for event_id in removed_ids:
+        booking = existing.get(event_id)
+        if booking is not None:
+            db.session.delete(booking)
+            counts['deleted'] += 1
+
+    return counts
+
+def _run_sync(provider, calendar_id, room, fetch_pages, to_fields, is_removed, cursor_expired):
+    """
+    Shared sync loop: applies every page from fetch_pages(cursor), stores the
+    new cursor once the last page is in, and falls back to a full pull when
+    the provider rejects the stored cursor.
+    """
+    state = get_sync_state(provider, calendar_id)
+    totals = {'created': 0, 'updated': 0, 'deleted': 0}
+
+    def apply_pages(pages):
+        for events, next_cursor in pages:
+            changed = {}
+            removed = []
+            for event in events:
+                if is_removed(event):
+                    removed.append(event['id'])
+                else:
+                    changed[event['id']] = to_fields(event)
+            counts = apply_external_changes(provider, room, changed, removed)
+            for key, value in counts.items():
+                totals[key] += value
+            if next_cursor:
+                # Only advance the cursor once the final page has been applied
+                state.sync_cursor = next_cursor
+
+    try:
+        try:
+            apply_pages(fetch_pages(state.sync_cursor))
+        except cursor_expired:
+            # The provider dropped our cursor; start over with a full pull
+            db.session.rollback()
+            state = get_sync_state(provider, calendar_id)
+            state.sync_cursor = None
+            for key in totals:
+                totals[key] = 0
+            apply_pages(fetch_pages(None))
+
+        state.last_synced_at = datetime.utcnow()
+        state.last_error = None
+        db.session.commit()
+        if any(totals.values()):
+            # The upstream calendar changed, so cached event windows are out of date
+            event_cache.cache.invalidate(provider)
+    except Exception as e:
+        db.session.rollback()
+        state = get_sync_state(provider, calendar_id)
+        state.last_error = str(e)
+        db.session.commit()
+        logger.exception("Error syncing %s calendar", provider)
+        return None
+
+    return totals
+
+def _get_sync_room(config_key):
+    room_id = current_app.config.get(config_key)
+    if not room_id:
+        return None
+    room = Room.query.get(room_id)
+    if not room:
+        logger.warning("Calendar sync skipped: room %s not found", room_id)
+    return room
+
+def get_google_credential(room):
+    """The most recently connected Google account in the room's company."""
+    return CalendarCredential.query.filter_by(provider='google', company_id=room.company_id)\
+        .order_by(CalendarCredential.updated_at.desc()).first()
+
+def sync_microsoft_calendar(access_token=None):
+    """
+    Pulls changes from the Outlook boardroom calendar into local bookings.
+    The first run walks the whole sync window; later runs resume from the
+    stored delta link and only receive what changed since.
+    """
+    calendar_id = current_app.config.get('MICROSOFT_CALENDAR_ID')
+    room = _get_sync_room('MICROSOFT_SYNC_ROOM_ID')
+    if not calendar_id or not room:
+        return None
+
+    return _run_sync(
+        'microsoft', calendar_id, room,
+        fetch_pages=lambda cursor: microsoft_calendar.iter_event_changes(cursor, access_token),
+        to_fields=microsoft_calendar.event_to_booking_fields,
+        is_removed=lambda event: '@removed' in event or event.get('isCancelled'),
+        cursor_expired=microsoft_calendar.SyncCursorExpired
+    )
+
+def sync_google_calendar():
+    """
+    Pulls changes from the shared Google calendar into local bookings.
+    The first run is a full pull; later runs pass the stored syncToken and
+    only receive what changed since, including cancellations.
+    """
+    calendar_id = current_app.config.get('GOOGLE_CALENDAR_ID')
+    room = _get_sync_room('GOOGLE_SYNC_ROOM_ID')
+    if not calendar_id or not room:
+        return None
+
+    record = get_google_credential(room)
+    if not record:
+        logger.warning("Google sync skipped: no connected Google account for this company")
+        return None
+
+    return _run_sync(
+        'google', calendar_id, room,
+        fetch_pages=lambda cursor: google_calendar.iter_event_changes(record, calendar_id, cursor),
+        to_fields=google_calendar.event_to_booking_fields,
+        is_removed=lambda event: event.get('status') == 'cancelled',
+        cursor_expired=google_calendar.SyncCursorExpired
+    )
+
+def run_all_syncs():
+    """Runs every configured inbound calendar sync once."""
+    return {
+        'microsoft': sync_microsoft_calendar(),
+        'google': sync_google_calendar()
+    }
+
+def start_scheduler(app, interval):
+    """
+    Starts a daemon thread that runs all syncs every `interval` seconds.
+    Only one process should run this; with several workers use cron and
+    sync_calendars.py instead.
+    """
+    def loop():
+        while True:
+            with app.app_context():
+                try:
+                    run_all_syncs()
+                except Exception:
+                    logger.exception("Calendar sync failed")
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name='calendar-sync', daemon=True)
+    thread.start()
+    return thread
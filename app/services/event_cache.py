@@ -0,0 +1,145 @@
+# app/services/event_cache.py
+
+import threading
+import time
+from flask import current_app
+from app import database
+
+class _Flight:
+    """One in-progress upstream load that other callers can wait on"""
+
+    def __init__(self, generation):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        # Cache generation when the load started; stale if invalidated since
+        self.generation = generation
+
+class EventCache:
+    """
+    In-process cache for external calendar events.
+    - Fresh entries (younger than ttl) are returned directly.
+    - Stale entries (younger than ttl + stale_ttl) are returned immediately
+      while one background thread reloads them.
+    - Misses are single-flight: concurrent callers for the same key wait on
+      the first caller's upstream request instead of issuing their own.
+    - invalidate() bumps a generation counter (as room_catalog does), so a
+      load that started before it is returned to its waiters but not stored,
+      and later callers start a new load instead of joining it.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._flights = {}
+        self._generations = {}  # provider -> invalidation count; None: invalidate()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                      'refreshes': 0, 'errors': 0, 'evictions': 0}
+
+    def _count(self, name):
+        # Callers already hold self._lock
+        self.stats[name] += 1
+
+    def _generation(self, provider):
+        # Callers already hold self._lock
+        return self._generations.get(None, 0), self._generations.get(provider, 0)
+
+    def get(self, key, loader):
+        config = current_app.config
+        ttl = config.get('CALENDAR_CACHE_TTL', 60)
+        stale_ttl = config.get('CALENDAR_CACHE_STALE_TTL', 300)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < ttl:
+                    self._count('hits')
+                    return entry[1]
+                if age < ttl + stale_ttl:
+                    self._count('stale_hits')
+                    if key not in self._flights:
+                        flight = self._flights[key] = _Flight(self._generation(key[0]))
+                        self._count('refreshes')
+                        app = current_app._get_current_object()
+                        threading.Thread(target=self._refresh,
+                                         args=(app, database.current_shard_key(), key, loader, flight),
+                                         name='calendar-cache-refresh', daemon=True).start()
+                    return entry[1]
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._count('coalesced')
+                leader = False
+            else:
+                self._count('misses')
+                flight = self._flights[key] = _Flight(self._generation(key[0]))
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._load(key, loader, flight)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key, loader, flight):
+        try:
+            flight.value = loader()
+            with self._lock:
+                if flight.generation == self._generation(key[0]):
+                    self._store(key, flight.value)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._count('errors')
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _refresh(self, app, shard, key, loader, flight):
+        with app.app_context(), database.shard_scope(shard):
+            # A failed refresh keeps serving the stale copy until it expires
+            self._load(key, loader, flight)
+
+    def _store(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        limit = current_app.config.get('CALENDAR_CACHE_MAX_ENTRIES', 512)
+        while len(self._entries) > limit:
+            # Dicts keep insertion order, so this drops the least recently stored
+            self._entries.pop(next(iter(self._entries)))
+            self._count('evictions')
+
+    def invalidate(self, provider=None):
+        """Drops every entry, or just those for one provider, and fences loads in flight."""
+        with self._lock:
+            self._generations[provider] = self._generations.get(provider, 0) + 1
+            if provider is None:
+                self._entries.clear()
+                self._flights.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == provider]:
+                    del self._entries[key]
+                for key in [k for k in self._flights if k[0] == provider]:
+                    del self._flights[key]
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries))
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else None
+        return stats
+
+cache = EventCache()
+
+def cached_events(provider, calendar_id, start, end, loader):
+    """Looks up a provider's events for a calendar and time window."""
+    return cache.get((provider, calendar_id, start, end), loader)
@@ -1,14 +1,32 @@
 import os
+import json
+import uuid
+from functools import partial
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from urllib.parse import quote, urlparse
 from flask import current_app, url_for, session, request
-from google_auth_oauthlib.flow import Flow
+from app import db
+from app.models import CalendarCredential
+from app.services import resilience
+from app.services import event_cache
 
 # The permissions we request from the user for their calendar.
 SCOPES = ['https://www.googleapis.com/auth/calendar.events']
 
+# Google recommends keeping batches at 50 requests or fewer
+BATCH_LIMIT = 50
+
+class SyncCursorExpired(Exception):
+    """Raised when Google invalidates a stored sync token (HTTP 410)"""
+
 def get_google_auth_flow():
     """
     Initializes and returns the Google OAuth 2.0 Flow object.
     """
+    # The Google SDKs are imported on first use so startup doesn't pay for
+    # them when Google calendar integration is unused
+    from google_auth_oauthlib.flow import Flow
     client_secrets_info = {
         "web": {
             "client_id": current_app.config['GOOGLE_CLIENT_ID'],
@@ -37,7 +55,7 @@ def get_google_auth_url():
     session['google_auth_state'] = state
     return authorization_url
 
-def get_token_from_code_for_google(authorization_response):
+def get_token_from_code_for_google(authorization_response, user):
     """
     Exchanges the authorization code for a user access token.
     """
@@ -50,13 +68,246 @@ def get_token_from_code_for_google(authorization_response):
 
     flow.fetch_token(authorization_response=authorization_response)
     
-    # Store the credentials in the session.
-    credentials = flow.credentials
-    session['google_credentials'] = {
+    # Store the credentials server-side so the sync worker can use them.
+    save_credentials(user, flow.credentials)
+
+def _credentials_to_dict(credentials):
+    return {
         'token': credentials.token,
         'refresh_token': credentials.refresh_token,
         'token_uri': credentials.token_uri,
         'client_id': credentials.client_id,
         'client_secret': credentials.client_secret,
-        'scopes': credentials.scopes
-    }
\ No newline at end of file
+        'scopes': credentials.scopes,
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
+    }
+
+def save_credentials(user, credentials):
+    """Stores (or replaces) a user's Google credentials."""
+    record = CalendarCredential.query.filter_by(provider='google', user_id=user.id).first()
+    if not record:
+        record = CalendarCredential(provider='google', user_id=user.id)
+        db.session.add(record)
+    record.company_id = user.company_id
+    record.set_credentials(_credentials_to_dict(credentials))
+    db.session.commit()
+    return record
+
+def load_credentials(record):
+    """Builds google Credentials from a stored record, refreshing if expired."""
+    from google.oauth2.credentials import Credentials
+    info = record.get_credentials()
+    # google-auth keeps expiry as a naive UTC datetime
+    info['expiry'] = datetime.fromisoformat(info['expiry']) if info.get('expiry') else None
+    credentials = Credentials(**info)
+    if not credentials.valid and credentials.refresh_token:
+        _refresh(record, credentials)
+    return credentials
+
+def _refresh(record, credentials):
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+    credentials.refresh(partial(GoogleAuthRequest(), timeout=resilience.get_timeout()))
+    record.set_credentials(_credentials_to_dict(credentials))
+    db.session.commit()
+
+def is_connected(user):
+    """Check if the user has connected a Google account"""
+    return CalendarCredential.query.filter_by(provider='google', user_id=user.id).first() is not None
+
+def _api_url(path):
+    return current_app.config.get('GOOGLE_CALENDAR_API_URL', 'https://www.googleapis.com/calendar/v3').rstrip('/') + path
+
+def _is_rate_limited(response):
+    """Quota errors come back as 403 with a rate limit reason."""
+    if response.status_code != 403:
+        return False
+    try:
+        reasons = [e.get('reason') for e in response.json()['error'].get('errors', [])]
+    except (ValueError, KeyError, AttributeError):
+        return False
+    return any(r in ('rateLimitExceeded', 'userRateLimitExceeded') for r in reasons)
+
+def _authorized_request(record, credentials, method, url, **kwargs):
+    """Sends a request through the resilience layer, refreshing once on 401."""
+    for attempt in range(2):
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers['Authorization'] = f'Bearer {credentials.token}'
+        # The refresh token outlives access tokens, so fallbacks survive a refresh
+        response = resilience.request('google', method, url, is_retryable=_is_rate_limited,
+                                      credential=credentials.refresh_token or credentials.token,
+                                      headers=headers, **kwargs)
+        if response.status_code != 401 or attempt or not credentials.refresh_token:
+            return response
+        _refresh(record, credentials)
+        kwargs['headers'] = headers
+    return response
+
+def iter_event_changes(record, calendar_id, sync_token=None):
+    """
+    Lists events on a Google calendar.
+    Without a sync token this is a full pull; with one, only changes since
+    it (including cancelled events) are returned.
+    Yields (events, next_sync_token) per page; the token is only set on the
+    last page.
+    """
+    credentials = load_credentials(record)
+    url = _api_url(f"/calendars/{quote(calendar_id, safe='')}/events")
+    # singleEvents must match between the full pull and incremental syncs
+    base_params = {'singleEvents': 'true', 'maxResults': 250}
+    if sync_token:
+        base_params['syncToken'] = sync_token
+
+    page_token = None
+    while True:
+        params = dict(base_params)
+        if page_token:
+            params['pageToken'] = page_token
+        # Never answer a sync walk from the stale cache
+        response = _authorized_request(record, credentials, 'GET', url, params=params, use_fallback=False)
+        if response.status_code == 410:
+            raise SyncCursorExpired(response.text)
+        response.raise_for_status()
+        payload = response.json()
+        page_token = payload.get('nextPageToken')
+        yield payload.get('items', []), payload.get('nextSyncToken')
+        if not page_token:
+            break
+
+def list_events(record, calendar_id, start, end):
+    """Lists event occurrences between start and end (naive UTC datetimes)."""
+    credentials = load_credentials(record)
+    url = _api_url(f"/calendars/{quote(calendar_id, safe='')}/events")
+    params = {
+        'singleEvents': 'true',
+        'orderBy': 'startTime',
+        'maxResults': 250,
+        'timeMin': start.isoformat() + 'Z',
+        'timeMax': end.isoformat() + 'Z'
+    }
+    events = []
+    while True:
+        response = _authorized_request(record, credentials, 'GET', url, params=params)
+        response.raise_for_status()
+        payload = response.json()
+        events.extend(payload.get('items', []))
+        if not payload.get('nextPageToken'):
+            return events
+        params = dict(params, pageToken=payload['nextPageToken'])
+
+def cached_list_events(record, calendar_id, start, end):
+    """list_events behind the shared event cache."""
+    record_id = record.id
+    # Background refreshes run in another thread, so reload the credential there
+    return event_cache.cached_events(
+        'google', calendar_id, start, end,
+        lambda: list_events(CalendarCredential.query.get(record_id), calendar_id, start, end)
+    )
+
+def parse_google_time(value):
+    """Converts an event start/end object to a naive UTC datetime."""
+    if 'dateTime' in value:
+        parsed = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    # All-day events only carry a date
+    return datetime.fromisoformat(value['date'])
+
+def event_to_booking_fields(event):
+    """Maps a Google event onto Booking column values."""
+    is_public = event.get('visibility', 'default') in ('default', 'public')
+    organizer = event.get('organizer') or {}
+    return {
+        'title': (event.get('summary') or 'Busy')[:120],
+        'start_time': parse_google_time(event['start']),
+        'end_time': parse_google_time(event['end']),
+        'organizer_name': organizer.get('displayName') or organizer.get('email'),
+        'is_public': is_public,
+        'visibility_type': 'all_companies' if is_public else 'owner_company'
+    }
+
+def booking_to_event_body(event):
+    """Builds a Google event body from an outbound booking snapshot."""
+    return {
+        'summary': event['title'],
+        'start': {'dateTime': event['start_time'].isoformat() + 'Z'},
+        'end': {'dateTime': event['end_time'].isoformat() + 'Z'},
+        'visibility': 'default' if event['is_public'] else 'private'
+    }
+
+def _parse_batch_response(response):
+    """Splits a multipart/mixed batch response into {content_id: (status, headers, body)}."""
+    header = f"Content-Type: {response.headers.get('Content-Type')}\r\n\r\n".encode()
+    message = BytesParser().parsebytes(header + response.content)
+    parts = {}
+    for part in message.get_payload():
+        content_id = (part.get('Content-ID') or '').strip('<>').replace('response-', '')
+        raw = part.get_payload(decode=True) or part.get_payload().encode()
+        head, _, body = raw.replace(b'\r\n', b'\n').partition(b'\n\n')
+        lines = head.decode().split('\n')
+        status = int(lines[0].split()[1])
+        headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+        try:
+            payload = json.loads(body) if body.strip() else {}
+        except ValueError:
+            payload = {}
+        parts[content_id] = (status, headers, payload)
+    return parts
+
+def batch_write(record, calendar_id, operations):
+    """
+    Sends event writes to a Google calendar through the batch endpoint.
+    Takes the same operations and returns the same results as
+    microsoft_calendar.batch_write.
+    """
+    import requests
+    credentials = load_credentials(record)
+    api_url = current_app.config.get('GOOGLE_CALENDAR_API_URL', 'https://www.googleapis.com/calendar/v3').rstrip('/')
+    parsed = urlparse(api_url)
+    # https://www.googleapis.com/calendar/v3 -> https://www.googleapis.com/batch/calendar/v3
+    batch_url = f"{parsed.scheme}://{parsed.netloc}/batch{parsed.path}"
+    events_path = f"{parsed.path}/calendars/{quote(calendar_id, safe='')}/events"
+
+    results = []
+    for offset in range(0, len(operations), BATCH_LIMIT):
+        chunk = operations[offset:offset + BATCH_LIMIT]
+        boundary = f"batch_{uuid.uuid4().hex}"
+        body = []
+        for index, operation in enumerate(chunk):
+            if operation['action'] == 'create':
+                request_line = f"POST {events_path}"
+            elif operation['action'] == 'update':
+                request_line = f"PATCH {events_path}/{operation['event_id']}"
+            else:
+                request_line = f"DELETE {events_path}/{operation['event_id']}"
+            part = [f"--{boundary}", "Content-Type: application/http", f"Content-ID: <{index}>", "", request_line]
+            if operation['action'] != 'delete':
+                part += ["Content-Type: application/json", "", json.dumps(booking_to_event_body(operation['event']))]
+            else:
+                part += [""]
+            body.append("\r\n".join(part))
+        body.append(f"--{boundary}--")
+
+        try:
+            response = _authorized_request(
+                record, credentials, 'POST', batch_url,
+                headers={'Content-Type': f'multipart/mixed; boundary={boundary}'},
+                data="\r\n".join(body).encode()
+            )
+            response.raise_for_status()
+            parts = _parse_batch_response(response)
+        except (requests.exceptions.RequestException, resilience.CircuitOpenError, ValueError, IndexError) as e:
+            results.extend({'status': None, 'event_id': op.get('event_id'), 'error': str(e), 'retry_after': None}
+                           for op in chunk)
+            continue
+
+        for index, operation in enumerate(chunk):
+            status, headers, payload = parts.get(str(index), (None, {}, {}))
+            retry_after = headers.get('Retry-After')
+            results.append({
+                'status': status,
+                'event_id': payload.get('id') or operation.get('event_id'),
+                'error': (payload.get('error') or {}).get('message') if status is None or status >= 400 else None,
+                'retry_after': int(retry_after) if retry_after and retry_after.isdigit() else None
+            })
+    return results
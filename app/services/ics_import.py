@@ -0,0 +1,201 @@
+# app/services/ics_import.py
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from flask import current_app
+from sqlalchemy import insert, select
+from app import db
+from app import ical
+from app.models import Booking, Room
+
+def _new_report(dry_run):
+    return {
+        'dry_run': dry_run,
+        'events': 0,        # VEVENTs read from the file
+        'occurrences': 0,   # bookings they expanded to
+        'imported': 0,
+        'conflicts': 0,
+        'skipped': 0,       # cancelled, unknown room, unsupported or invalid
+        'truncated': 0,     # recurring events cut off at the horizon or occurrence limit
+        'before_window': 0, # occurrences that ended more than ICS_IMPORT_PAST_DAYS ago
+        'unknown_rooms': {},
+        'issues': []
+    }
+
+def _add_issue(report, reason, uid, title, start=None, end=None, room=None):
+    # Keep the report bounded; the counters above stay exact
+    if len(report['issues']) < current_app.config.get('ICS_IMPORT_REPORT_LIMIT', 1000):
+        report['issues'].append({
+            'reason': reason,
+            'uid': uid,
+            'title': title,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            'room': room
+        })
+
+def _first_value(event, name, default=''):
+    values = event.get(name)
+    return ical.unescape_text(values[0][1]).strip() if values else default
+
+def _event_rows(event, room, company_id, user_id, default_tz, horizon, since, now):
+    """
+    Booking rows for every occurrence of one parsed event, plus what
+    ical.expand_event() left out: (occurrences before since, stop reason).
+    """
+    title = _first_value(event, 'SUMMARY')[:120] or 'Imported event'
+    is_public = _first_value(event, 'CLASS', 'PUBLIC').upper() == 'PUBLIC'
+    organizer = event.get('ORGANIZER', [({}, '')])[0][0].get('CN')
+    max_occurrences = current_app.config.get('ICS_IMPORT_MAX_OCCURRENCES', 1000)
+    occurrences = ical.expand_event(event, default_tz, horizon, max_occurrences, since)
+    rows = []
+    while True:
+        try:
+            start, end = next(occurrences)
+        except StopIteration as stop:
+            return rows, stop.value
+        rows.append({
+            'title': title,
+            'start_time': start,
+            'end_time': end,
+            'room_id': room.id,
+            'company_id': company_id,
+            'user_id': user_id,
+            'organizer_name': organizer[:120] if organizer else None,
+            'is_public': is_public,
+            'visibility_type': 'all_companies' if is_public else 'owner_company',
+            'created_at': now,
+            'updated_at': now
+        })
+
+def _flush(batch, report, room_names):
+    """
+    Conflict-checks one batch and inserts what is left. Each room needs one
+    query for the bookings overlapping the batch's span in that room; the
+    candidates are then swept in start order against those and each other.
+    """
+    by_room = {}
+    for row, uid in batch:
+        by_room.setdefault(row['room_id'], []).append((row, uid))
+
+    accepted = []
+    for room_id, rows in by_room.items():
+        rows.sort(key=lambda item: item[0]['start_time'])
+        existing = db.session.execute(
+            select(Booking.start_time, Booking.end_time)
+            .where(Booking.room_id == room_id,
+                   Booking.start_time < max(row['end_time'] for row, _ in rows),
+                   Booking.end_time > rows[0][0]['start_time'])
+            .order_by(Booking.start_time)
+        ).all()
+
+        position = 0
+        existing_end = None
+        imported_end = None
+        for row, uid in rows:
+            start, end = row['start_time'], row['end_time']
+            while position < len(existing) and existing[position].start_time <= start:
+                if existing_end is None or existing[position].end_time > existing_end:
+                    existing_end = existing[position].end_time
+                position += 1
+            clashes_existing = (existing_end is not None and existing_end > start) or \
+                (position < len(existing) and existing[position].start_time < end)
+            if clashes_existing or (imported_end is not None and imported_end > start):
+                report['conflicts'] += 1
+                _add_issue(report, 'overlaps existing booking' if clashes_existing else 'overlaps another imported event',
+                           uid, row['title'], start, end, room_names[room_id])
+                continue
+            imported_end = end if imported_end is None else max(imported_end, end)
+            accepted.append(row)
+
+    if accepted:
+        db.session.execute(insert(Booking), accepted)
+    report['imported'] += len(accepted)
+
+def import_ics(lines, company_id, user_id=None, room_id=None, dry_run=False):
+    """
+    Imports bookings from an iterable of .ics lines (e.g. an open file).
+    Events are mapped to the company's rooms by LOCATION (case-insensitive
+    name match) unless room_id forces one room. Recurring events are expanded
+    from ICS_IMPORT_PAST_DAYS ago; open-ended ones up to ICS_IMPORT_HORIZON_DAYS
+    ahead, and none past ICS_IMPORT_MAX_OCCURRENCES occurrences. What that
+    leaves out is counted in the report ('before_window', 'truncated'). Work is done in batches of
+    ICS_IMPORT_BATCH_SIZE occurrences, so memory does not grow with the file.
+    A dry run goes through the same steps and rolls everything back.
+    Returns the report dict.
+    """
+    config = current_app.config
+    batch_size = config.get('ICS_IMPORT_BATCH_SIZE', 1000)
+    default_tz = ZoneInfo(config.get('ICS_IMPORT_TIMEZONE', 'UTC'))
+    now = datetime.utcnow()
+    horizon = now + timedelta(days=config.get('ICS_IMPORT_HORIZON_DAYS', 365))
+    since = now - timedelta(days=config.get('ICS_IMPORT_PAST_DAYS', 365))
+
+    rooms = {room.name.strip().lower(): room for room in Room.query.filter_by(company_id=company_id).all()}
+    room_names = {room.id: room.name for room in rooms.values()}
+    forced_room = None
+    if room_id:
+        forced_room = next((room for room in rooms.values() if room.id == room_id), None)
+        if not forced_room:
+            raise LookupError(f"Room {room_id} not found in this company")
+
+    report = _new_report(dry_run)
+    batch = []
+    try:
+        for event in ical.iter_events(lines):
+            report['events'] += 1
+            uid = _first_value(event, 'UID') or None
+            title = _first_value(event, 'SUMMARY')
+            if 'DTSTART' not in event or _first_value(event, 'STATUS').upper() == 'CANCELLED':
+                report['skipped'] += 1
+                continue
+
+            location = _first_value(event, 'LOCATION')
+            room = forced_room or rooms.get(location.lower())
+            if room is None:
+                report['skipped'] += 1
+                report['unknown_rooms'][location] = report['unknown_rooms'].get(location, 0) + 1
+                _add_issue(report, 'unknown room', uid, title, room=location)
+                continue
+
+            try:
+                rows, (before, stopped) = _event_rows(event, room, company_id, user_id,
+                                                      default_tz, horizon, since, now)
+            except ValueError as e:
+                report['skipped'] += 1
+                _add_issue(report, f'unsupported: {e}', uid, title, room=room.name)
+                continue
+            if before:
+                report['before_window'] += before
+                _add_issue(report, f'{before} occurrences before the import window left out', uid, title,
+                           room=room.name)
+            if stopped:
+                report['truncated'] += 1
+                _add_issue(report, 'recurrence stopped at the import horizon' if stopped == 'horizon'
+                           else 'recurrence stopped at the occurrence limit', uid, title,
+                           rows[-1]['start_time'] if rows else None, rows[-1]['end_time'] if rows else None,
+                           room.name)
+
+            for row in rows:
+                if row['end_time'] <= row['start_time']:
+                    report['skipped'] += 1
+                    _add_issue(report, 'invalid time', uid, title, row['start_time'], row['end_time'], room.name)
+                    continue
+                report['occurrences'] += 1
+                batch.append((row, uid))
+                if len(batch) >= batch_size:
+                    _flush(batch, report, room_names)
+                    batch = []
+                    if not dry_run:
+                        db.session.commit()
+
+        if batch:
+            _flush(batch, report, room_names)
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return report
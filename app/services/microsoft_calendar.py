@@ -1,9 +1,14 @@
 # app/services/microsoft_calendar.py
 
+import logging
 import os
-import msal
-import requests
+import time
+from datetime import datetime, timedelta
 from flask import current_app, session, url_for
+from app.services import resilience
+from app.services import event_cache
+
+logger = logging.getLogger(__name__)
 
 # This scope is for the app-only authentication
 APP_ONLY_SCOPE = ["https://graph.microsoft.com/.default"]
@@ -12,7 +17,10 @@ APP_ONLY_SCOPE = ["https://graph.microsoft.com/.default"]
 USER_SCOPES = ["Calendars.ReadWrite"]
 
 # A simple in-memory cache for the app-only token
-app_cache = {"access_token": None}
+app_cache = {"access_token": None, "expires_at": 0}
+
+class SyncCursorExpired(Exception):
+    """Raised when Graph no longer accepts a stored delta link"""
 
 def _build_msal_app(for_user=False):
     """
@@ -20,12 +28,16 @@ def _build_msal_app(for_user=False):
     - If for_user is True, it builds an app for the user-delegated flow.
     - Otherwise, it builds an app for the app-only (client credentials) flow.
     """
+    # Imported on first use: msal is slow to import and unused unless
+    # Microsoft calendar integration is configured
+    import msal
     if for_user:
         # This is the flow we had before, for user login
         return msal.ConfidentialClientApplication(
             client_id=current_app.config['MICROSOFT_CLIENT_ID'],
             authority=f"https://login.microsoftonline.com/{current_app.config['MICROSOFT_TENANT_ID']}",
             client_credential=current_app.config['MICROSOFT_CLIENT_SECRET'],
+            timeout=resilience.get_timeout(),
         )
     else:
         # This is the app-only flow
@@ -33,6 +45,7 @@ def _build_msal_app(for_user=False):
             client_id=current_app.config['MICROSOFT_CLIENT_ID'],
             authority=f"https://login.microsoftonline.com/{current_app.config['MICROSOFT_TENANT_ID']}",
             client_credential=current_app.config['MICROSOFT_CLIENT_SECRET'],
+            timeout=resilience.get_timeout(),
         )
 
 def _get_app_only_token():
@@ -41,7 +54,7 @@ def _get_app_only_token():
     It caches the token in memory to avoid unnecessary requests.
     """
     # If we have a valid token in our simple cache, return it
-    if app_cache.get("access_token"):
+    if app_cache.get("access_token") and time.time() < app_cache["expires_at"]:
         return app_cache["access_token"]
 
     # Otherwise, acquire a new one
@@ -55,45 +68,209 @@ def _get_app_only_token():
     if "access_token" in result:
         # Cache the new token and return it
         app_cache["access_token"] = result["access_token"]
+        # Refresh a minute early so long-running syncs never send a stale token
+        app_cache["expires_at"] = time.time() + int(result.get("expires_in", 3600)) - 60
         return result["access_token"]
     else:
         # Throw an error if we can't get a token
         raise Exception("Could not acquire app-only token: " + result.get("error_description"))
 
-def get_calendar_events():
+def _graph_url(path):
+    return current_app.config.get("MICROSOFT_GRAPH_URL", "https://graph.microsoft.com/v1.0").rstrip("/") + path
+
+def _calendar_path():
+    boardroom_email = current_app.config.get("MICROSOFT_BOARDROOM_EMAIL")
+    calendar_id = current_app.config.get("MICROSOFT_CALENDAR_ID")
+    if not all([boardroom_email, calendar_id]):
+        return None
+    # The Graph API endpoint uses the boardroom's email (User Principal Name)
+    return f"/users/{boardroom_email}/calendars/{calendar_id}"
+
+def parse_graph_datetime(value):
+    """Parses a Graph dateTime, which carries 7 fractional digits."""
+    return datetime.fromisoformat(value[:26])
+
+def list_events(start=None, end=None):
     """
-    Fetches events from the central boardroom calendar using an app-only token.
+    Lists events on the boardroom calendar, following @odata.nextLink.
+    With a start/end window this reads calendarView, which expands
+    recurring meetings into occurrences. Raises on transport errors.
     """
+    calendar_path = _calendar_path()
+    if not calendar_path:
+        raise ValueError("Missing Microsoft config in .env file (email, calendar id)")
+
     access_token = _get_app_only_token()
-    boardroom_email = current_app.config.get("MICROSOFT_BOARDROOM_EMAIL")
-    calendar_id = current_app.config.get("MICROSOFT_CALENDAR_ID")
+    headers = {'Authorization': f'Bearer {access_token}', 'Prefer': 'outlook.timezone="UTC"'}
+    params = {'$select': 'id,subject,start,end,sensitivity', '$top': 100}
+    if start and end:
+        url = _graph_url(f"{calendar_path}/calendarView")
+        params['startDateTime'] = start.strftime('%Y-%m-%dT%H:%M:%SZ')
+        params['endDateTime'] = end.strftime('%Y-%m-%dT%H:%M:%SZ')
+    else:
+        url = _graph_url(f"{calendar_path}/events")
+
+    events = []
+    # Follow @odata.nextLink until every page has been read
+    while url:
+        response = resilience.request('microsoft', 'GET', url, headers=headers, params=params)
+        response.raise_for_status()
+        payload = response.json()
+        events.extend(payload.get('value', []))
+        # nextLink already carries the query string
+        url = payload.get('@odata.nextLink')
+        params = None
+    return events
 
-    if not all([access_token, boardroom_email, calendar_id]):
-        print("Error: Missing Microsoft config in .env file (email, calendar id)")
+def cached_list_events(start=None, end=None):
+    """list_events behind the shared event cache."""
+    return event_cache.cached_events('microsoft', current_app.config.get('MICROSOFT_CALENDAR_ID'),
+                                     start, end, lambda: list_events(start, end))
+
+def get_calendar_events(start=None, end=None):
+    """
+    Fetches events from the central boardroom calendar using an app-only token.
+    """
+    if not _calendar_path():
+        logger.error("Missing Microsoft config in .env file (email, calendar id)")
         return []
 
-    # The Graph API endpoint now uses the boardroom's email (User Principal Name)
-    graph_endpoint = f"https://graph.microsoft.com/v1.0/users/{boardroom_email}/calendars/{calendar_id}/events"
-    
-    headers = {'Authorization': f'Bearer {access_token}'}
+    import requests
     try:
-        response = requests.get(graph_endpoint, headers=headers)
+        return [{
+            'id': event.get('id'),
+            'title': event.get('subject'),
+            'start': event.get('start', {}).get('dateTime'),
+            'end': event.get('end', {}).get('dateTime'),
+            'color': '#0F7B6C', # A nice Microsoft Teal color
+            'borderColor': '#0F7B6C'
+        } for event in cached_list_events(start, end)]
+    except (requests.exceptions.RequestException, resilience.CircuitOpenError) as e:
+        logger.warning("Error fetching Microsoft Calendar events: %s", e)
+        return []
+
+def iter_event_changes(delta_link=None, access_token=None):
+    """
+    Walks a Graph delta query over the boardroom calendar.
+    Yields (events, delta_link) for every page; delta_link is only set on the
+    last page and should be stored to resume from on the next sync.
+    Removed events come back as {"id": ..., "@removed": {...}}.
+    """
+    calendar_path = _calendar_path()
+    if not calendar_path:
+        raise ValueError("Missing Microsoft config in .env file (email, calendar id)")
+
+    access_token = access_token or _get_app_only_token()
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Prefer': 'odata.maxpagesize=100, outlook.timezone="UTC"'
+    }
+
+    if delta_link:
+        url, params = delta_link, None
+    else:
+        # calendarView delta needs a fixed window; it is baked into the delta link
+        config = current_app.config
+        lookback = timedelta(days=config.get("MICROSOFT_SYNC_LOOKBACK_DAYS", 30))
+        window = timedelta(days=config.get("MICROSOFT_SYNC_WINDOW_DAYS", 365))
+        now = datetime.utcnow()
+        url = _graph_url(f"{calendar_path}/calendarView/delta")
+        params = {
+            'startDateTime': (now - lookback).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'endDateTime': (now + window).strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
+
+    while url:
+        # Never answer a delta walk from the stale cache
+        response = resilience.request('microsoft', 'GET', url, headers=headers, params=params, use_fallback=False)
+        if response.status_code == 410:
+            # syncStateNotFound / resyncRequired: the delta token is no longer valid
+            raise SyncCursorExpired(response.text)
         response.raise_for_status()
-        ms_events = response.json().get('value', [])
-        
-        formatted_events = []
-        for event in ms_events:
-            formatted_events.append({
-                'title': event.get('subject'),
-                'start': event.get('start', {}).get('dateTime'),
-                'end': event.get('end', {}).get('dateTime'),
-                'color': '#0F7B6C', # A nice Microsoft Teal color
-                'borderColor': '#0F7B6C'
+        payload = response.json()
+        next_link = payload.get('@odata.nextLink')
+        yield payload.get('value', []), payload.get('@odata.deltaLink')
+        url, params = next_link, None
+
+def event_to_booking_fields(event):
+    """Maps a Graph event onto Booking column values."""
+    is_public = event.get('sensitivity', 'normal') == 'normal'
+    organizer = (event.get('organizer') or {}).get('emailAddress') or {}
+    return {
+        'title': (event.get('subject') or 'Busy')[:120],
+        'start_time': parse_graph_datetime(event['start']['dateTime']),
+        'end_time': parse_graph_datetime(event['end']['dateTime']),
+        'organizer_name': organizer.get('name'),
+        'is_public': is_public,
+        'visibility_type': 'all_companies' if is_public else 'owner_company'
+    }
+
+# Graph JSON batching accepts at most 20 requests per call
+BATCH_LIMIT = 20
+
+def booking_to_event_body(event):
+    """Builds a Graph event body from an outbound booking snapshot."""
+    return {
+        'subject': event['title'],
+        'start': {'dateTime': event['start_time'].isoformat(), 'timeZone': 'UTC'},
+        'end': {'dateTime': event['end_time'].isoformat(), 'timeZone': 'UTC'},
+        'sensitivity': 'normal' if event['is_public'] else 'private'
+    }
+
+def batch_write(operations, access_token=None):
+    """
+    Sends event writes to the boardroom calendar through Graph $batch.
+    Each operation is {'action': 'create'|'update'|'delete', 'event_id', 'event'}.
+    Returns one result per operation, in order:
+    {'status': int or None, 'event_id': str, 'error': str, 'retry_after': seconds}
+    A status of None means the whole batch failed in transit.
+    """
+    import requests
+    calendar_path = _calendar_path()
+    if not calendar_path:
+        raise ValueError("Missing Microsoft config in .env file (email, calendar id)")
+
+    access_token = access_token or _get_app_only_token()
+    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+    results = []
+    for offset in range(0, len(operations), BATCH_LIMIT):
+        chunk = operations[offset:offset + BATCH_LIMIT]
+        requests_payload = []
+        for index, operation in enumerate(chunk):
+            item = {'id': str(index)}
+            if operation['action'] == 'create':
+                item.update(method='POST', url=f"{calendar_path}/events")
+            elif operation['action'] == 'update':
+                item.update(method='PATCH', url=f"{calendar_path}/events/{operation['event_id']}")
+            else:
+                item.update(method='DELETE', url=f"{calendar_path}/events/{operation['event_id']}")
+            if operation['action'] != 'delete':
+                item['headers'] = {'Content-Type': 'application/json'}
+                item['body'] = booking_to_event_body(operation['event'])
+            requests_payload.append(item)
+
+        try:
+            response = resilience.request('microsoft', 'POST', _graph_url('/$batch'), headers=headers,
+                                          json={'requests': requests_payload})
+            response.raise_for_status()
+            responses = {r['id']: r for r in response.json().get('responses', [])}
+        except (requests.exceptions.RequestException, resilience.CircuitOpenError, ValueError) as e:
+            results.extend({'status': None, 'event_id': op.get('event_id'), 'error': str(e), 'retry_after': None}
+                           for op in chunk)
+            continue
+
+        for index, operation in enumerate(chunk):
+            item = responses.get(str(index), {})
+            status = item.get('status')
+            body = item.get('body') or {}
+            retry_after = (item.get('headers') or {}).get('Retry-After')
+            results.append({
+                'status': status,
+                'event_id': body.get('id') or operation.get('event_id'),
+                'error': (body.get('error') or {}).get('message') if status is None or status >= 400 else None,
+                'retry_after': int(retry_after) if retry_after and str(retry_after).isdigit() else None
             })
-        return formatted_events
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching Microsoft Calendar events: {e}")
-        return []
+    return results
 
 
 # --- User Login Functions (we will use these later) ---
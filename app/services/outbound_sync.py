@@ -0,0 +1,321 @@
+# app/services/outbound_sync.py
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_
+from app import db
+from app import database
+from app.models import Booking, BookingSyncState, Room
+from app.services import microsoft_calendar
+from app.services import google_calendar
+from app.services import event_cache
+from app.services.calendar_sync import EVENT_ID_COLUMNS, get_google_credential
+
+logger = logging.getLogger(__name__)
+
+# Statuses that are worth retrying: throttling, server errors, transport failures
+RETRYABLE_STATUSES = {None, 408, 429, 500, 502, 503, 504}
+
+def _target_providers(room_id):
+    """Providers whose synced calendar belongs to this room."""
+    config = current_app.config
+    providers = []
+    if room_id and room_id == config.get('MICROSOFT_SYNC_ROOM_ID') and config.get('MICROSOFT_CALENDAR_ID'):
+        providers.append('microsoft')
+    if room_id and room_id == config.get('GOOGLE_SYNC_ROOM_ID') and config.get('GOOGLE_CALENDAR_ID'):
+        providers.append('google')
+    return providers
+
+class OutboundSyncQueue:
+    """
+    Per-process queue of bookings waiting to be written to external calendars.
+    Entries are keyed by (shard, provider, booking_id), so several edits to
+    the same booking inside the flush delay collapse into one write. The
+    shard is the caller's database shard (None for the main database); the
+    worker processes each shard's entries inside that shard's scope. The payload is
+    read from the database when the batch is sent, which means the last
+    committed version always wins.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._app = None
+        # CLI scripts turn this off and call drain() themselves
+        self.background = True
+
+    def enqueue(self, provider, booking_id, remove=False, event_id=None, attempts=0, delay=None):
+        if delay is None:
+            delay = current_app.config.get('OUTBOUND_SYNC_DELAY', 2.0)
+        shard = database.current_shard_key()
+        key = (shard, provider, booking_id)
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = {'shard': shard, 'provider': provider, 'booking_id': booking_id, 'remove': remove,
+                         'event_id': event_id, 'attempts': attempts,
+                         'not_before': time.monotonic() + delay}
+                self._pending[key] = entry
+            else:
+                entry['event_id'] = event_id or entry['event_id']
+                entry['remove'] = remove
+                entry['attempts'] = max(entry['attempts'], attempts)
+                if remove and not entry['event_id']:
+                    # A create that never reached the provider: nothing to undo
+                    del self._pending[key]
+            if self.background:
+                self._ensure_worker()
+            self._cond.notify()
+
+    def _ensure_worker(self):
+        # Started lazily so every forked worker process gets its own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._run, name='outbound-sync', daemon=True)
+            self._thread.start()
+
+    def _take_ready(self):
+        now = time.monotonic()
+        ready = [key for key, entry in self._pending.items() if entry['not_before'] <= now]
+        return [self._pending.pop(key) for key in ready]
+
+    def _run(self):
+        tick = self._app.config.get('OUTBOUND_SYNC_DELAY', 2.0)
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Flush on a fixed tick so everything that became ready in the
+            # same interval goes out in one batch
+            time.sleep(tick)
+            with self._cond:
+                entries = self._take_ready()
+            for shard, shard_entries in _by_shard(entries).items():
+                with self._app.app_context(), database.shard_scope(shard):
+                    try:
+                        process(shard_entries)
+                    except Exception:
+                        db.session.rollback()
+                        logger.exception("Outbound calendar sync failed")
+                        self._requeue(shard_entries)
+                    finally:
+                        db.session.remove()
+
+    def _requeue(self, entries):
+        max_attempts = self._app.config.get('OUTBOUND_SYNC_MAX_ATTEMPTS', 5)
+        for entry in entries:
+            attempts = entry['attempts'] + 1
+            if attempts < max_attempts:
+                self.enqueue(entry['provider'], entry['booking_id'], remove=entry['remove'],
+                             event_id=entry['event_id'], attempts=attempts,
+                             delay=random.uniform(0, min(300, 2 ** attempts)))
+
+    def drain(self):
+        """Sends everything queued right now in the calling thread (CLI use)."""
+        with self._cond:
+            entries = list(self._pending.values())
+            self._pending.clear()
+        for shard, shard_entries in _by_shard(entries).items():
+            with database.shard_scope(shard):
+                try:
+                    process(shard_entries)
+                finally:
+                    # Objects from another database must not share an identity map
+                    db.session.close()
+        return len(entries)
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+def _by_shard(entries):
+    by_shard = {}
+    for entry in entries:
+        by_shard.setdefault(entry['shard'], []).append(entry)
+    return by_shard
+
+queue = OutboundSyncQueue()
+
+def _persist_and_enqueue(booking_id, writes):
+    """
+    Records each (provider, remove, event_id) write as a pending
+    booking_sync_state row before queueing it, so a write lost with this
+    process (restart, crash) is picked up again by retry_failed().
+    """
+    if not writes:
+        return
+    states = {
+        state.provider: state for state in
+        BookingSyncState.query.filter(BookingSyncState.booking_id == booking_id,
+                                      BookingSyncState.provider.in_([provider for provider, _, _ in writes])).all()
+    }
+    for provider, remove, event_id in writes:
+        state = states.get(provider)
+        if state is None:
+            state = BookingSyncState(provider=provider, booking_id=booking_id, attempts=0)
+            db.session.add(state)
+        state.status = 'pending'
+        state.updated_at = datetime.utcnow()
+        if remove and event_id:
+            state.external_event_id = event_id
+    db.session.commit()
+    for provider, remove, event_id in writes:
+        queue.enqueue(provider, booking_id, remove=remove, event_id=event_id)
+
+def enqueue_booking(booking, previous_room_id=None):
+    """Queues a created or updated booking for write-through."""
+    targets = _target_providers(booking.room_id)
+    writes = [(provider, False, None) for provider in targets]
+    # Moved out of a synced room: take it off that calendar
+    if previous_room_id and previous_room_id != booking.room_id:
+        for provider in _target_providers(previous_room_id):
+            if provider not in targets:
+                writes.append((provider, True, getattr(booking, EVENT_ID_COLUMNS[provider].key)))
+    _persist_and_enqueue(booking.id, writes)
+
+def enqueue_booking_delete(booking):
+    """Queues removal of a just-deleted booking from its external calendars."""
+    _persist_and_enqueue(booking.id, [(provider, True, getattr(booking, EVENT_ID_COLUMNS[provider].key))
+                                      for provider in _target_providers(booking.room_id)])
+
+def retry_failed():
+    """
+    Requeues every booking whose last write-through attempt failed, and
+    those left 'pending' for over OUTBOUND_SYNC_STALE_SECONDS (queued by a
+    process that went away before sending them).
+    """
+    stale = datetime.utcnow() - timedelta(seconds=current_app.config.get('OUTBOUND_SYNC_STALE_SECONDS', 900))
+    states = BookingSyncState.query.filter(or_(
+        BookingSyncState.status == 'failed',
+        and_(BookingSyncState.status == 'pending', BookingSyncState.updated_at < stale)
+    )).all()
+    rooms = {
+        booking_id: room_id for booking_id, room_id in
+        db.session.query(Booking.id, Booking.room_id).filter(Booking.id.in_([s.booking_id for s in states])).all()
+    } if states else {}
+    for state in states:
+        # Deleted, or moved out of the room this calendar belongs to
+        remove = state.booking_id not in rooms or state.provider not in _target_providers(rooms[state.booking_id])
+        queue.enqueue(state.provider, state.booking_id, remove=remove,
+                      event_id=state.external_event_id, delay=0)
+    return len(states)
+
+def _snapshot(booking):
+    return {
+        'title': booking.title,
+        'start_time': booking.start_time,
+        'end_time': booking.end_time,
+        'is_public': booking.is_public if booking.is_public is not None else True
+    }
+
+def _send(provider, operations):
+    if provider == 'microsoft':
+        return microsoft_calendar.batch_write(operations)
+    room = Room.query.get(current_app.config['GOOGLE_SYNC_ROOM_ID'])
+    record = get_google_credential(room) if room else None
+    if not record:
+        # Not retryable until someone connects a Google account
+        return [{'status': 401, 'event_id': op.get('event_id'), 'error': 'No connected Google account',
+                 'retry_after': None} for op in operations]
+    return google_calendar.batch_write(record, current_app.config['GOOGLE_CALENDAR_ID'], operations)
+
+def process(entries):
+    """Turns queued entries into provider batches and records the outcome."""
+    max_attempts = current_app.config.get('OUTBOUND_SYNC_MAX_ATTEMPTS', 5)
+    booking_ids = {entry['booking_id'] for entry in entries}
+    bookings = {b.id: b for b in Booking.query.filter(Booking.id.in_(booking_ids)).all()}
+    states = {
+        (s.provider, s.booking_id): s
+        for s in BookingSyncState.query.filter(BookingSyncState.booking_id.in_(booking_ids)).all()
+    }
+
+    by_provider = {}
+    for entry in entries:
+        by_provider.setdefault(entry['provider'], []).append(entry)
+
+    for provider, provider_entries in by_provider.items():
+        column = EVENT_ID_COLUMNS[provider].key
+        operations = []
+        for entry in provider_entries:
+            booking = bookings.get(entry['booking_id'])
+            event_id = entry['event_id'] or (getattr(booking, column) if booking else None)
+            if booking is None or entry['remove']:
+                if not event_id:
+                    # Never reached the provider: nothing to remove
+                    state = states.get((provider, entry['booking_id']))
+                    if state is not None and state.status != 'synced':
+                        state.status = 'synced'
+                        state.attempts = 0
+                        state.last_error = None
+                    continue
+                operations.append({'action': 'delete', 'event_id': event_id, 'entry': entry})
+            elif event_id:
+                operations.append({'action': 'update', 'event_id': event_id, 'event': _snapshot(booking), 'entry': entry})
+            else:
+                operations.append({'action': 'create', 'event_id': None, 'event': _snapshot(booking), 'entry': entry})
+
+        if not operations:
+            continue
+
+        try:
+            results = _send(provider, operations)
+        except Exception as e:
+            results = [{'status': None, 'event_id': op['event_id'], 'error': str(e), 'retry_after': None}
+                       for op in operations]
+
+        if any(result['status'] is not None and result['status'] < 400 for result in results):
+            # Cached windows for this provider no longer match the calendar
+            event_cache.cache.invalidate(provider)
+
+        for operation, result in zip(operations, results):
+            entry = operation['entry']
+            booking = bookings.get(entry['booking_id'])
+            key = (provider, entry['booking_id'])
+            state = states.get(key)
+            if state is None:
+                state = BookingSyncState(provider=provider, booking_id=entry['booking_id'], attempts=0)
+                db.session.add(state)
+                states[key] = state
+
+            status = result['status']
+            gone = operation['action'] != 'create' and status in (404, 410)
+            if status is not None and (status < 400 or (gone and operation['action'] == 'delete')):
+                state.status = 'synced'
+                state.attempts = 0
+                state.last_error = None
+                if operation['action'] == 'delete':
+                    state.external_event_id = None
+                    if booking is not None:
+                        setattr(booking, column, None)
+                else:
+                    state.external_event_id = result['event_id']
+                    if booking is not None:
+                        setattr(booking, column, result['event_id'])
+                    else:
+                        # Deleted while the create was in flight; remove it again
+                        queue.enqueue(provider, entry['booking_id'], remove=True, event_id=result['event_id'])
+            elif gone:
+                # Deleted upstream; recreate it on the next pass
+                if booking is not None:
+                    setattr(booking, column, None)
+                state.external_event_id = None
+                queue.enqueue(provider, entry['booking_id'])
+            else:
+                state.attempts = (state.attempts or 0) + 1
+                state.last_error = result['error'] or f"HTTP {status}"
+                if status in RETRYABLE_STATUSES and state.attempts < max_attempts:
+                    state.status = 'pending'
+                    delay = result['retry_after'] or random.uniform(0, min(300, 2 ** state.attempts))
+                    queue.enqueue(provider, entry['booking_id'], remove=entry['remove'],
+                                  event_id=entry['event_id'], attempts=state.attempts, delay=delay)
+                else:
+                    state.status = 'failed'
+                    if operation['action'] == 'delete':
+                        state.external_event_id = operation['event_id']
+
+    db.session.commit()
@@ -0,0 +1,212 @@
+# app/services/providers.py
+
+import abc
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from app.models import Booking, Room
+from app.services import microsoft_calendar
+from app.services import google_calendar
+from app.services.calendar_sync import get_google_credential
+
+def booking_to_event(booking, viewer_id, viewer_is_admin):
+    """Serializes a booking the way the calendar expects it."""
+    room_name = booking.room.name if booking.room else None
+    organizer = booking.user.name if booking.user else booking.organizer_name
+    # Only show public bookings or user's own bookings
+    if booking.is_public or booking.user_id == viewer_id:
+        return {
+            'title': booking.title,
+            'start': booking.start_time.isoformat(),
+            'end': booking.end_time.isoformat(),
+            'id': booking.id,
+            'room_id': booking.room_id,
+            'room_name': room_name,
+            'is_public': booking.is_public,
+            'user_id': booking.user_id,
+            'user_name': organizer,
+            'can_edit': booking.user_id == viewer_id or viewer_is_admin,
+            'extendedProps': {
+                'organizer': organizer,
+                'room': room_name
+            }
+        }
+    # Show private booking as "Unavailable"
+    return {
+        'title': 'Unavailable',
+        'start': booking.start_time.isoformat(),
+        'end': booking.end_time.isoformat(),
+        'id': f'private_{booking.id}',
+        'room_id': booking.room_id,
+        'room_name': room_name,
+        'is_public': False,
+        'user_id': booking.user_id,
+        'user_name': organizer,
+        'can_edit': False,
+        'backgroundColor': '#6B7280',
+        'borderColor': '#6B7280',
+        'extendedProps': {
+            'organizer': 'Private',
+            'room': room_name
+        }
+    }
+
+class CalendarProvider(abc.ABC):
+    """
+    Common interface over an external calendar.
+    - fetch_events(start, end): events overlapping a window, as calendar dicts
+    - push(operations): creates/updates/deletes, see microsoft_calendar.batch_write
+    - delta(cursor): iterates (events, next_cursor) pages of upstream changes
+    Events from external providers carry 'provider' and 'external_id' so
+    the aggregator can drop ones that already exist as local bookings.
+    """
+    name = None
+    color = None
+
+    def is_connected(self):
+        return False
+
+    @abc.abstractmethod
+    def fetch_events(self, start, end):
+        """Events overlapping [start, end), as calendar dicts."""
+
+    @abc.abstractmethod
+    def push(self, operations):
+        """Applies creates/updates/deletes upstream."""
+
+    @abc.abstractmethod
+    def delta(self, cursor=None):
+        """Iterates (events, next_cursor) pages of upstream changes."""
+
+    def _room(self):
+        room_id = current_app.config.get(self.room_config_key)
+        return Room.query.get(room_id) if room_id else None
+
+    def is_visible_to(self, company_id):
+        """Whether the company may see this calendar: it owns or can see the synced room."""
+        room = self._room()
+        return room is not None and (room.company_id == company_id or room.is_visible_to_company(company_id))
+
+    def _to_event(self, external_id, fields, room):
+        return {
+            'id': f'{self.name}_{external_id}',
+            'external_id': external_id,
+            'provider': self.name,
+            'title': fields['title'] if fields['is_public'] else 'Busy',
+            'start': fields['start_time'].isoformat(),
+            'end': fields['end_time'].isoformat(),
+            'room_id': room.id if room else None,
+            'room_name': room.name if room else None,
+            'is_public': fields['is_public'],
+            'can_edit': False,
+            'color': self.color,
+            'borderColor': self.color,
+            'extendedProps': {
+                'organizer': fields.get('organizer_name'),
+                'room': room.name if room else None,
+                'source': self.name
+            }
+        }
+
+class LocalSource:
+    """
+    Bookings stored in our own database, as seen by one user. Only a feed
+    source: pushes and deltas go to the CalendarProvider subclasses.
+    """
+    name = 'local'
+
+    def __init__(self, company_id, viewer_id, viewer_is_admin, room_id=None):
+        self.company_id = company_id
+        self.viewer_id = viewer_id
+        self.viewer_is_admin = viewer_is_admin
+        self.room_id = room_id
+
+    def is_connected(self):
+        return True
+
+    def fetch_events(self, start, end):
+        query = Booking.query.options(joinedload(Booking.room), joinedload(Booking.user))\
+            .filter(Booking.company_id == self.company_id,
+                    Booking.start_time < end,
+                    Booking.end_time > start)
+        if self.room_id:
+            query = query.filter(Booking.room_id == self.room_id)
+
+        events = []
+        for booking in query.all():
+            event = booking_to_event(booking, self.viewer_id, self.viewer_is_admin)
+            # Used by the aggregator to de-duplicate synced events; stripped before returning
+            event['external_ids'] = [
+                ('microsoft', booking.microsoft_calendar_event_id),
+                ('google', booking.google_calendar_event_id)
+            ]
+            events.append(event)
+        return events
+
+class MicrosoftProvider(CalendarProvider):
+    """The Outlook boardroom calendar, read with an app-only Graph token"""
+    name = 'microsoft'
+    color = '#0F7B6C'
+    room_config_key = 'MICROSOFT_SYNC_ROOM_ID'
+
+    def is_connected(self):
+        config = current_app.config
+        return bool(config.get('MICROSOFT_CLIENT_ID') and config.get('MICROSOFT_BOARDROOM_EMAIL')
+                    and config.get('MICROSOFT_CALENDAR_ID'))
+
+    def fetch_events(self, start, end):
+        room = self._room()
+        return [
+            self._to_event(event['id'], microsoft_calendar.event_to_booking_fields(event), room)
+            for event in microsoft_calendar.cached_list_events(start, end)
+        ]
+
+    def push(self, operations):
+        return microsoft_calendar.batch_write(operations)
+
+    def delta(self, cursor=None):
+        return microsoft_calendar.iter_event_changes(cursor)
+
+class GoogleProvider(CalendarProvider):
+    """The shared Google calendar, read with a connected user's credentials"""
+    name = 'google'
+    color = '#4285F4'
+    room_config_key = 'GOOGLE_SYNC_ROOM_ID'
+
+    def is_connected(self):
+        config = current_app.config
+        return bool(config.get('GOOGLE_CLIENT_ID') and config.get('GOOGLE_CALENDAR_ID')
+                    and config.get('GOOGLE_SYNC_ROOM_ID'))
+
+    def _credential(self, room):
+        record = get_google_credential(room) if room else None
+        if not record:
+            raise LookupError("No connected Google account for the synced room's company")
+        return record
+
+    def fetch_events(self, start, end):
+        room = self._room()
+        record = self._credential(room)
+        calendar_id = current_app.config['GOOGLE_CALENDAR_ID']
+        return [
+            self._to_event(event['id'], google_calendar.event_to_booking_fields(event), room)
+            for event in google_calendar.cached_list_events(record, calendar_id, start, end)
+            if event.get('status') != 'cancelled'
+        ]
+
+    def push(self, operations):
+        record = self._credential(self._room())
+        return google_calendar.batch_write(record, current_app.config['GOOGLE_CALENDAR_ID'], operations)
+
+    def delta(self, cursor=None):
+        record = self._credential(self._room())
+        return google_calendar.iter_event_changes(record, current_app.config['GOOGLE_CALENDAR_ID'], cursor)
+
+PROVIDER_CLASSES = [MicrosoftProvider, GoogleProvider]
+
+def get_connected_providers(company_id=None):
+    """
+    External providers that are configured for this deployment; with
+    company_id, only those whose synced room that company may see.
+    """
+    return [provider for provider in (cls() for cls in PROVIDER_CLASSES)
+            if provider.is_connected() and (company_id is None or provider.is_visible_to(company_id))]
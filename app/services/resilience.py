@@ -0,0 +1,228 @@
+# app/services/resilience.py
+
+import hashlib
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from flask import current_app
+
+# Statuses where the provider is telling us to come back later
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# 429 and 503 mean the request was not processed, so even POSTs can be retried
+SAFE_TO_REPLAY_STATUSES = {429, 503}
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit is open and no fallback is cached"""
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+    - closed: calls go through; consecutive failures are counted
+    - open: calls are rejected until reset_timeout has passed
+    - half_open: one trial call is let through; success closes, failure reopens
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return self.state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    _metric(self.name, 'circuit_opened')
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Last successful GET response per (provider, credential, url, params), served
+# while open; the credential part keeps one user's data from another
+_last_known_good = {}
+_last_known_good_lock = threading.Lock()
+LAST_KNOWN_GOOD_LIMIT = 256
+
+# Counters per provider; exported through get_metrics()
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def _metric(provider, name, amount=1):
+    with _metrics_lock:
+        counters = _metrics.setdefault(provider, {})
+        counters[name] = counters.get(name, 0) + amount
+
+def get_breaker(provider):
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            config = current_app.config
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=config.get('CALENDAR_BREAKER_THRESHOLD', 5),
+                reset_timeout=config.get('CALENDAR_BREAKER_RESET', 30.0)
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+def get_metrics():
+    """Snapshot of counters and breaker state for every provider."""
+    with _metrics_lock:
+        snapshot = {provider: dict(counters) for provider, counters in _metrics.items()}
+    for provider, breaker in list(_breakers.items()):
+        snapshot.setdefault(provider, {})['circuit_state'] = breaker.state
+    return snapshot
+
+def get_timeout():
+    """(connect, read) timeout tuple from config."""
+    config = current_app.config
+    return (config.get('CALENDAR_CONNECT_TIMEOUT', 3.05), config.get('CALENDAR_READ_TIMEOUT', 15.0))
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def _credential_key(credential, kwargs):
+    """A digest of whoever the request is sent as, so secrets are not kept in cache keys."""
+    if credential is None:
+        credential = (kwargs.get('headers') or {}).get('Authorization') or kwargs.get('auth')
+    if credential is None:
+        return None
+    return hashlib.sha256(repr(credential).encode()).hexdigest()
+
+def _fallback(provider, cache_key):
+    """The last good response for cache_key as a response object, or None."""
+    with _last_known_good_lock:
+        entry = _last_known_good.get(cache_key)
+    if entry is None:
+        return None
+    import requests
+    _metric(provider, 'stale_served')
+    response = requests.Response()
+    response.status_code, response.headers, response._content, response.url = entry
+    response.from_cache = True
+    return response
+
+def _remember(cache_key, response):
+    with _last_known_good_lock:
+        _last_known_good.pop(cache_key, None)
+        _last_known_good[cache_key] = (response.status_code, response.headers, response.content, response.url)
+        while len(_last_known_good) > LAST_KNOWN_GOOD_LIMIT:
+            # Dicts keep insertion order, so this drops the oldest entry
+            del _last_known_good[next(iter(_last_known_good))]
+
+def _backoff(attempt):
+    # Full jitter: uniform(0, min(cap, base * 2^attempt))
+    config = current_app.config
+    cap = config.get('CALENDAR_RETRY_MAX_DELAY', 10.0)
+    return random.uniform(0, min(cap, config.get('CALENDAR_RETRY_BASE_DELAY', 0.5) * 2 ** attempt))
+
+def request(provider, method, url, is_retryable=None, use_fallback=True, credential=None, **kwargs):
+    """
+    Sends an HTTP request to a calendar provider with timeouts, retries and a
+    circuit breaker.
+    - Retries 429/5xx and transport errors with jittered exponential backoff,
+      honouring Retry-After (capped by CALENDAR_RETRY_MAX_DELAY). Non-idempotent
+      methods are only replayed when the provider says it did not process them.
+    - is_retryable(response) can flag extra provider-specific cases.
+    - While the circuit is open, GETs are answered from the last good response
+      when one exists (response.from_cache is True); otherwise
+      CircuitOpenError is raised. Responses are only reused for the same
+      credential: the Authorization header, or `credential` when the caller
+      has a steadier identity than a short-lived token.
+    """
+    # Deferred so importing the provider modules stays cheap
+    import requests
+    method = method.upper()
+    breaker = get_breaker(provider)
+    cache_key = (provider, _credential_key(credential, kwargs), url,
+                 tuple(sorted((kwargs.get('params') or {}).items())))
+    fallback = use_fallback and method == 'GET'
+
+    if not breaker.allow():
+        _metric(provider, 'circuit_rejected')
+        cached = _fallback(provider, cache_key) if fallback else None
+        if cached is not None:
+            return cached
+        raise CircuitOpenError(f"{provider} circuit is open")
+
+    kwargs.setdefault('timeout', get_timeout())
+    max_retries = current_app.config.get('CALENDAR_MAX_RETRIES', 3)
+    idempotent = method in IDEMPOTENT_METHODS
+
+    for attempt in range(max_retries + 1):
+        _metric(provider, 'requests')
+        started = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            _metric(provider, 'latency_seconds', time.perf_counter() - started)
+            _metric(provider, 'timeouts' if isinstance(e, requests.exceptions.Timeout) else 'connection_errors')
+            # A connect failure never reached the server, so it is always safe to replay
+            replayable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+            if attempt < max_retries and replayable:
+                _metric(provider, 'retries')
+                time.sleep(_backoff(attempt))
+                continue
+            breaker.record_failure()
+            cached = _fallback(provider, cache_key) if fallback else None
+            if cached is not None:
+                return cached
+            raise
+        _metric(provider, 'latency_seconds', time.perf_counter() - started)
+
+        retryable = response.status_code in RETRYABLE_STATUSES or bool(is_retryable and is_retryable(response))
+        replayable = idempotent or response.status_code in SAFE_TO_REPLAY_STATUSES
+        if retryable and replayable and attempt < max_retries:
+            _metric(provider, 'retries')
+            delay = _retry_after_seconds(response)
+            if delay is None:
+                delay = _backoff(attempt)
+            time.sleep(min(delay, current_app.config.get('CALENDAR_RETRY_MAX_DELAY', 10.0)))
+            continue
+        break
+
+    if response.status_code >= 500:
+        _metric(provider, 'failures')
+        breaker.record_failure()
+        cached = _fallback(provider, cache_key) if fallback else None
+        if cached is not None:
+            return cached
+    else:
+        # 4xx (including throttling) is the caller's problem, not an outage
+        _metric(provider, 'successes')
+        breaker.record_success()
+        if method == 'GET' and response.ok:
+            _remember(cache_key, response)
+    return response
@@ -0,0 +1,89 @@
+# app/services/room_catalog.py
+"""
+Per-company cache of the serialized /api/rooms response.
+
+Entries live in a cachelib backend chosen by ROOM_CACHE_TYPE:
+- 'filesystem' (the default) is shared by every worker on the host
+- 'simple' is per process
+- 'null' turns caching off
+
+A company's catalog also lists other companies' public and shared rooms, so
+any room write must drop every catalog. Keys therefore include a generation
+token, and invalidate() replaces that token after the write has been
+committed. Entries under an old token are never read again and expire after
+ROOM_CACHE_TTL, which also bounds staleness after writes made outside the
+app (CLI scripts, direct SQL).
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from cachelib import FileSystemCache, NullCache, SimpleCache
+from flask import current_app
+
+_lock = threading.Lock()
+_backends = {}
+stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def _count(name):
+    with _lock:
+        stats[name] += 1
+
+def _backend():
+    config = current_app.config
+    kind = config.get('ROOM_CACHE_TYPE', 'filesystem')
+    ttl = config.get('ROOM_CACHE_TTL', 300)
+    directory = config.get('ROOM_CACHE_DIR') or os.path.join(current_app.instance_path, 'room_cache')
+    key = (kind, directory, ttl)
+    backend = _backends.get(key)
+    if backend is None:
+        if kind == 'filesystem':
+            backend = FileSystemCache(directory, threshold=config.get('ROOM_CACHE_THRESHOLD', 2000),
+                                      default_timeout=ttl)
+        elif kind == 'simple':
+            backend = SimpleCache(threshold=config.get('ROOM_CACHE_THRESHOLD', 2000), default_timeout=ttl)
+        elif kind == 'null':
+            backend = NullCache()
+        else:
+            raise ValueError(f"ROOM_CACHE_TYPE must be 'filesystem', 'simple' or 'null', not {kind!r}")
+        with _lock:
+            backend = _backends.setdefault(key, backend)
+    return backend
+
+def _namespace():
+    # Apps on different databases can share a cache directory
+    uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    return 'rooms:' + hashlib.sha1(uri.encode()).hexdigest()[:12]
+
+def _generation(cache, namespace):
+    key = f'{namespace}:generation'
+    generation = cache.get(key)
+    if generation is None:
+        # First use, or the token was pruned: start a new generation
+        cache.add(key, uuid.uuid4().hex, timeout=0)
+        generation = cache.get(key) or uuid.uuid4().hex
+    return generation
+
+def get(company_id, build):
+    """The cached catalog body for company_id; on a miss, build() is stored and returned."""
+    cache = _backend()
+    namespace = _namespace()
+    key = f'{namespace}:{_generation(cache, namespace)}:{company_id}'
+    body = cache.get(key)
+    if body is not None:
+        _count('hits')
+        return body
+    _count('misses')
+    body = build()
+    cache.set(key, body)
+    return body
+
+def invalidate():
+    """Drops every company's catalog; call after committing a room (or company) change."""
+    _count('invalidations')
+    _backend().set(f'{_namespace()}:generation', uuid.uuid4().hex, timeout=0)
+
+def get_stats():
+    with _lock:
+        return dict(stats)
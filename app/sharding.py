@@ -0,0 +1,210 @@
+# app/sharding.py
+"""
+Optional tenant sharding by company_id.
+
+DATABASE_SHARDS lists extra databases ('eu=postgresql://...,big=sqlite:///...'),
+each with the full schema. A company and everything scoped to it (users,
+rooms, bookings, invitations, credentials) lives on exactly one database. The
+company_shard directory on the main database maps company ids to shard names.
+Companies without an entry stay on the main database ('default'). New company
+ids are allocated from the directory, so they are unique across shards.
+
+A request is routed to the shard stored in the user's session at login.
+Lookups that must see every tenant go through first(), route_to() and
+each_shard(), with a separate session per database: login and registration,
+other tenants' shared rooms, and the companies overview. Without
+DATABASE_SHARDS every helper falls back to the normal db.session behaviour.
+"""
+
+import threading
+from flask import current_app, g, has_request_context, session
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, joinedload
+from app import db
+from app import permissions
+from app.models import Company, CompanyShard, Room
+
+DEFAULT_SHARD = 'default'
+
+_directory_lock = threading.Lock()
+
+def enabled():
+    return bool(current_app.config.get('DATABASE_SHARD_BINDS'))
+
+def shard_names():
+    return [DEFAULT_SHARD] + list(current_app.config.get('DATABASE_SHARD_BINDS') or {})
+
+def _bind_key(shard):
+    if shard in (None, DEFAULT_SHARD):
+        return None
+    return current_app.config['DATABASE_SHARD_BINDS'][shard]
+
+def _engine(shard):
+    return db.engines[_bind_key(shard)]
+
+def current_shard():
+    """Name of the shard this request is routed to."""
+    if has_request_context():
+        return g.get('db_shard_name') or DEFAULT_SHARD
+    return DEFAULT_SHARD
+
+def route_request(shard, remember=True):
+    """
+    Sends the rest of this request's queries to `shard`. With remember, the
+    user's later requests go there too (set when they log in or register).
+    """
+    key = _bind_key(shard)
+    if g.get('db_shard') != key:
+        # Objects loaded from another database must not share an identity map
+        db.session.close()
+    g.db_shard = key
+    g.db_shard_name = shard or DEFAULT_SHARD
+    if remember:
+        session['_db_shard'] = g.db_shard_name
+
+def each_shard():
+    """Yields (shard, session) for every database, each with its own short-lived session."""
+    for shard in shard_names():
+        with Session(_engine(shard)) as shard_session:
+            yield shard, shard_session
+
+def _find(statement):
+    shards = each_shard()
+    try:
+        for shard, shard_session in shards:
+            found = shard_session.scalars(statement).first()
+            if found is not None:
+                return shard, found
+    finally:
+        shards.close()
+    return None, None
+
+def first(statement):
+    """First result of a SELECT on any shard (detached), or None."""
+    if not enabled():
+        return db.session.scalars(statement).first()
+    return _find(statement)[1]
+
+def route_to(*statements):
+    """
+    Routes the request (and the user's session) to the shard where the first
+    of `statements` matches. Does nothing when sharding is off or nothing matches.
+    """
+    if not enabled():
+        return None
+    for statement in statements:
+        shard, found = _find(statement)
+        if found is not None:
+            route_request(shard)
+            return shard
+    return None
+
+def _allocate_company():
+    config = current_app.config
+    names = list(config['DATABASE_SHARD_BINDS'])
+    with _directory_lock, Session(_engine(DEFAULT_SHARD)) as directory:
+        company_id = max(directory.scalar(select(func.max(CompanyShard.company_id))) or 0,
+                         directory.scalar(select(func.max(Company.id))) or 0) + 1
+        setting = config.get('DATABASE_SHARD_NEW_COMPANIES', 'hash')
+        if setting == 'hash':
+            shard = names[company_id % len(names)]
+        elif setting in shard_names():
+            shard = setting
+        else:
+            raise ValueError(f"DATABASE_SHARD_NEW_COMPANIES must be 'hash' or a shard name, not {setting!r}")
+        directory.add(CompanyShard(company_id=company_id, shard=shard))
+        directory.commit()
+    return company_id, shard
+
+def new_company_id():
+    """
+    For a company created by the registering user: reserves its id, routes
+    the request to its shard and returns the id (None when sharding is off).
+    """
+    if not enabled():
+        return None
+    company_id, shard = _allocate_company()
+    route_request(shard)
+    return company_id
+
+def create_company(name, domain):
+    """Creates a company on its assigned shard without rerouting the current user."""
+    if not enabled():
+        company = Company(name=name, domain=domain)
+        db.session.add(company)
+        db.session.commit()
+        return company
+    company_id, shard = _allocate_company()
+    with Session(_engine(shard), expire_on_commit=False) as shard_session:
+        company = Company(id=company_id, name=name, domain=domain)
+        shard_session.add(company)
+        shard_session.commit()
+    return company
+
+def company_shard(company_id):
+    """Name of the shard holding company_id: its directory entry, else the main database."""
+    if not enabled():
+        return DEFAULT_SHARD
+    with Session(_engine(DEFAULT_SHARD)) as directory:
+        shard = directory.scalar(select(CompanyShard.shard).where(CompanyShard.company_id == company_id))
+    return shard if shard in shard_names() else DEFAULT_SHARD
+
+def route_to_company(company_id):
+    """
+    Sends the rest of this request to company_id's shard, e.g. for an admin
+    opening a company from the overview. The user's session stays where it is.
+    """
+    if enabled():
+        route_request(company_shard(company_id), remember=False)
+
+def forget_company(company_id):
+    """Drops a deleted company's directory entry."""
+    if not enabled():
+        return
+    with _directory_lock, Session(_engine(DEFAULT_SHARD)) as directory:
+        directory.execute(delete(CompanyShard).where(CompanyShard.company_id == company_id))
+        directory.commit()
+
+def all_companies():
+    """Every company on every shard, ordered by id."""
+    if not enabled():
+        return Company.query.order_by(Company.id).all()
+    companies = []
+    for _, shard_session in each_shard():
+        companies.extend(shard_session.scalars(select(Company)).all())
+    return sorted(companies, key=lambda company: company.id)
+
+def shared_rooms_elsewhere(company_id):
+    """
+    (shard, room) for public rooms, and rooms shared with `company_id`, on
+    every shard except the current one. room.company is loaded.
+    """
+    if not enabled():
+        return []
+    here = current_shard()
+    results = []
+    for shard, shard_session in each_shard():
+        if shard == here:
+            continue
+        rooms = shard_session.scalars(select(Room).options(joinedload(Room.company))
+                                      .where(permissions.shared_rooms(company_id))).unique().all()
+        results.extend((shard, room) for room in rooms)
+    return results
+
+def create_all():
+    """Creates the schema on every shard database (the main one is db.create_all())."""
+    if not enabled():
+        return
+    for shard in shard_names()[1:]:
+        db.metadata.create_all(_engine(shard))
+
+def init_app(app):
+    if not app.config.get('DATABASE_SHARD_BINDS'):
+        return
+
+    @app.before_request
+    def route_to_session_shard():
+        shard = session.get('_db_shard')
+        if '_user_id' in session and shard in app.config['DATABASE_SHARD_BINDS']:
+            g.db_shard = app.config['DATABASE_SHARD_BINDS'][shard]
+            g.db_shard_name = shard
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for app startup.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget 600 --top 20
+
+Runs `create_app()` in a fresh interpreter under `python -X importtime` and
+fails (exit 1) when the total import time exceeds the budget or when any
+calendar provider SDK is imported before it is first used.
+tests/test_import_time.py runs the same checks under pytest.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+STARTUP_CODE = 'from app import create_app; create_app()'
+
+DEFAULT_BUDGET_MS = 1000
+
+# Top-level packages that must only load on first use
+LAZY_PACKAGES = ['msal', 'requests', 'google', 'google_auth_oauthlib', 'googleapiclient', 'pytest']
+
+def _run_importtime(code):
+    """Returns [(module, self_us, cumulative_us, depth)] in import order."""
+    env = dict(os.environ)
+    env.setdefault('SECRET_KEY', 'import-time')
+    env['CALENDAR_SYNC_INTERVAL'] = '0'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+def measure_imports(code=STARTUP_CODE, repeat=3):
+    """
+    The fastest of `repeat` cold runs, leaving out what a bare interpreter
+    imports anyway (site, encodings, ...).
+    """
+    baseline = {m[0] for m in _run_importtime('pass')}
+    runs = [[m for m in _run_importtime(code) if m[0] not in baseline] for _ in range(repeat)]
+    return min(runs, key=lambda modules: sum(m[2] for m in modules if m[3] == 0))
+
+def total_ms(modules):
+    return sum(m[2] for m in modules if m[3] == 0) / 1000
+
+def lazy_imports(modules):
+    """Modules of LAZY_PACKAGES that were imported at startup."""
+    return sorted({m[0] for m in modules if m[0].split('.')[0] in LAZY_PACKAGES})
+
+def check(modules, budget_ms, top):
+    top_level = [m for m in modules if m[3] == 0]
+    elapsed_ms = total_ms(modules)
+    print(f"Startup imports: {len(modules)} modules, {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    for name, _, cumulative, _ in sorted(top_level, key=lambda m: -m[2])[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = elapsed_ms <= budget_ms
+    if not ok:
+        print(f"❌ Over budget by {elapsed_ms - budget_ms:.1f} ms")
+    loaded = lazy_imports(modules)
+    if loaded:
+        ok = False
+        print(f"❌ Imported at startup but should be lazy: {', '.join(loaded[:10])}"
+              f"{' ...' if len(loaded) > 10 else ''}")
+    if ok:
+        print("✓ Within budget")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup import-time budget')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS, help='Maximum total import time in ms')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the fastest of')
+    parser.add_argument('--code', default=STARTUP_CODE, help='Python code to measure')
+    args = parser.parse_args()
+    sys.exit(0 if check(measure_imports(args.code, args.repeat), args.budget, args.top) else 1)
+
+if __name__ == '__main__':
+    main()
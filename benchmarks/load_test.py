@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test against a local threaded server.
+
+    python benchmarks/load_test.py --clients 16 --duration 30
+    python benchmarks/load_test.py --bookings 100000 --users 200 --output load.json
+
+Seeds (or reuses) a benchmark database, copies it so the run can write to it,
+serves the app on 127.0.0.1, logs in synthetic users from every company and
+replays a mix of week views, room lists and booking create/update/delete,
+with a share of creates aimed at a few hot rooms to provoke conflicts.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import requests
+from werkzeug.serving import make_server
+from sqlalchemy import func
+from app import db
+from app.models import Booking, Room, User
+from benchmarks import seed as seeding
+from benchmarks.run import DATA_DIR, make_app, prepare
+
+PASSWORD = 'benchmark'
+
+# Share of each action in the replayed traffic
+MIX = [
+    ('week_view', 35),
+    ('rooms', 20),
+    ('bookings', 10),
+    ('current_user', 5),
+    ('create', 15),
+    ('update', 10),
+    ('delete', 5)
+]
+
+# New bookings land in this window; hot rooms only use its first few slots
+CREATE_FROM = datetime(2030, 1, 7, 8, 0)
+CREATE_DAYS = 60
+HOT_SLOTS = 3
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, name, elapsed, status, error=False):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+            counts = self.statuses.setdefault(name, {})
+            counts[status] = counts.get(status, 0) + 1
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, duration):
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(len(values) * fraction))]
+        endpoints = {}
+        all_latencies = []
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            all_latencies.extend(values)
+            endpoints[name] = {
+                'requests': len(values),
+                'throughput': len(values) / duration,
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+                'error_rate': self.errors.get(name, 0) / len(values),
+                'statuses': {str(status): count for status, count in sorted(self.statuses[name].items(), key=str)}
+            }
+        all_latencies.sort()
+        total_errors = sum(self.errors.values())
+        return {
+            'duration': duration,
+            'requests': len(all_latencies),
+            'throughput': len(all_latencies) / duration if duration else 0,
+            'p50': percentile(all_latencies, 0.50) if all_latencies else None,
+            'p95': percentile(all_latencies, 0.95) if all_latencies else None,
+            'p99': percentile(all_latencies, 0.99) if all_latencies else None,
+            'error_rate': total_errors / len(all_latencies) if all_latencies else 0,
+            'endpoints': endpoints
+        }
+
+class VirtualUser:
+    def __init__(self, base_url, user_id, email, company_id, rooms, seed_range):
+        self.base_url = base_url
+        self.user_id = user_id
+        self.email = email
+        self.company_id = company_id
+        self.rooms = rooms
+        self.seed_range = seed_range
+        self.http = requests.Session()
+        self.created = []
+
+    def call(self, stats, name, method, path, expected=(200,), allowed=(), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+        except requests.RequestException:
+            stats.record(name, time.perf_counter() - started, 'exception', error=True)
+            return None
+        elapsed = time.perf_counter() - started
+        # Conflicts on hot rooms are expected traffic, not failures
+        stats.record(name, elapsed, response.status_code,
+                     error=response.status_code not in expected and response.status_code not in allowed)
+        return response
+
+    def login(self, stats):
+        response = self.call(stats, 'login', 'POST', '/auth/login', json={'email': self.email, 'password': PASSWORD})
+        return response is not None and response.status_code == 200
+
+    def _new_slot(self, rng):
+        hot = rng.random() < 0.3
+        room_id = self.rooms[0] if hot else rng.choice(self.rooms)
+        if hot:
+            start = CREATE_FROM + timedelta(hours=rng.randrange(HOT_SLOTS))
+        else:
+            start = CREATE_FROM + timedelta(days=rng.randrange(CREATE_DAYS), hours=rng.randrange(10),
+                                            minutes=rng.choice([0, 15, 30, 45]))
+        end = start + timedelta(minutes=rng.choice([30, 60]))
+        return room_id, start, end
+
+    def step(self, stats, rng, action):
+        if action == 'week_view':
+            first, last = self.seed_range
+            week = first + timedelta(weeks=rng.randrange(max(1, (last - first).days // 7)))
+            self.call(stats, 'week_view', 'GET', '/api/calendar/feed',
+                      params={'start': week.isoformat(), 'end': (week + timedelta(days=7)).isoformat()})
+        elif action == 'rooms':
+            self.call(stats, 'rooms', 'GET', '/api/rooms')
+        elif action == 'bookings':
+            self.call(stats, 'bookings', 'GET', '/api/bookings', params={'room_id': rng.choice(self.rooms)})
+        elif action == 'current_user':
+            self.call(stats, 'current_user', 'GET', '/api/current-user')
+        elif action == 'create' or not self.created:
+            room_id, start, end = self._new_slot(rng)
+            response = self.call(stats, 'create', 'POST', '/api/bookings/new', expected=(201,), allowed=(409,), json={
+                'title': 'Load test', 'room_id': room_id,
+                'start_time': start.isoformat(timespec='minutes'), 'end_time': end.isoformat(timespec='minutes')
+            })
+            if response is not None and response.status_code == 201:
+                self.created.append(response.json()['id'])
+        elif action == 'update':
+            booking_id = rng.choice(self.created)
+            room_id, start, end = self._new_slot(rng)
+            self.call(stats, 'update', 'POST', f'/api/bookings/{booking_id}/update', allowed=(409,), json={
+                'title': 'Load test (moved)', 'room_id': room_id,
+                'start_time': start.isoformat(timespec='minutes'), 'end_time': end.isoformat(timespec='minutes')
+            })
+        elif action == 'delete':
+            booking_id = self.created.pop(rng.randrange(len(self.created)))
+            self.call(stats, 'delete', 'POST', f'/api/bookings/{booking_id}/delete')
+
+def build_users(app, count, base_url):
+    """One virtual user per seeded account, spread evenly over the companies."""
+    with app.app_context():
+        rooms_by_company = {}
+        for room in Room.query.order_by(Room.id).all():
+            rooms_by_company.setdefault(room.company_id, []).append(room.id)
+        first, last = db.session.query(func.min(Booking.start_time), func.max(Booking.start_time)).one()
+        users = User.query.filter(User.role != 'guest').order_by(User.company_id, User.id).all()
+    # Round-robin over companies so every tenant gets traffic
+    by_company = {}
+    for user in users:
+        by_company.setdefault(user.company_id, []).append(user)
+    ordered = []
+    while len(ordered) < min(count, len(users)):
+        for company_users in by_company.values():
+            if company_users and len(ordered) < count:
+                ordered.append(company_users.pop(0))
+    return [VirtualUser(base_url, user.id, user.email, user.company_id, rooms_by_company[user.company_id],
+                        (first or CREATE_FROM, last or CREATE_FROM)) for user in ordered]
+
+def run_load(bookings, clients, users, duration, seed_value):
+    prepare(bookings)
+    path = os.path.join(DATA_DIR, f'load_{os.getpid()}.db')
+    shutil.copy(seeding.database_path(DATA_DIR, bookings), path)
+    app = make_app(path)
+    # One access-log line per request would dominate the run
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    try:
+        stats = Stats()
+        virtual_users = build_users(app, users, base_url)
+        print(f"Logging in {len(virtual_users)} users from {len({u.company_id for u in virtual_users})} companies...")
+        login_started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            logged_in = list(executor.map(lambda user: user.login(stats), virtual_users))
+        login_report = stats.report(time.monotonic() - login_started)['endpoints'].get('login')
+        virtual_users = [user for user, ok in zip(virtual_users, logged_in) if ok]
+
+        actions = [name for name, _ in MIX]
+        weights = [weight for _, weight in MIX]
+        deadline = time.monotonic() + duration
+        load_stats = Stats()
+
+        def worker(index):
+            rng = random.Random(seed_value * 1000 + index)
+            mine = virtual_users[index::clients]
+            if not mine:
+                return
+            while time.monotonic() < deadline:
+                user = rng.choice(mine)
+                user.step(load_stats, rng, rng.choices(actions, weights)[0])
+
+        print(f"Running {clients} clients for {duration}s against {base_url}...")
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = load_stats.report(time.monotonic() - started)
+        report['login'] = login_report
+        report['config'] = {'bookings': bookings, 'clients': clients, 'users': len(virtual_users),
+                            'duration': duration, 'seed': seed_value}
+        return report
+    finally:
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+
+def print_report(report):
+    print(f"{'endpoint':<14}{'reqs':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:<14}{row['requests']:>8}{row['throughput']:>9.1f}{row['p50'] * 1000:>10.1f}"
+              f"{row['p95'] * 1000:>10.1f}{row['p99'] * 1000:>10.1f}{row['error_rate']:>9.1%}")
+    if report['requests']:
+        print(f"{'total':<14}{report['requests']:>8}{report['throughput']:>9.1f}{report['p50'] * 1000:>10.1f}"
+              f"{report['p95'] * 1000:>10.1f}{report['p99'] * 1000:>10.1f}{report['error_rate']:>9.1%}")
+    conflicts = report['endpoints'].get('create', {}).get('statuses', {}).get('409', 0)
+    print(f"Booking conflicts (409) on create: {conflicts}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local end-to-end load test')
+    parser.add_argument('--bookings', type=int, default=10000, help='Size of the seeded database')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--users', type=int, default=100, help='Synthetic users to log in')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = run_load(args.bookings, args.clients, args.users, args.duration, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Bytes transferred for one calendar page load, before and after compression
+and hashed assets.
+
+    python benchmarks/page_weight.py
+    python benchmarks/page_weight.py --bookings 100000 --verbose
+
+Builds the hashed assets, then loads the calendar page as a logged-in admin
+twice: once with compression and hashed assets turned off (the old
+behaviour), once with both on and a browser's Accept-Encoding. Each load
+fetches the page, every local script and stylesheet it links (following
+CSS @imports) and the API calls calendar.js makes on load; static files
+that are missing (node_modules not installed) are skipped. It also counts
+the requests a repeat visit makes once short cache lifetimes have run out.
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from sqlalchemy import func
+from app import assets, db
+from app.models import User
+from benchmarks.run import logged_in_client, prepare
+
+# Requests calendar.js makes once the page has loaded
+API_CALLS = ['/api/rooms', '/api/bookings']
+BROWSER_ACCEPT_ENCODING = 'gzip, deflate, br'
+
+LOCAL_ASSET = re.compile(r'''(?:src|href)="(/static/[^"]+)"''')
+CSS_IMPORT = re.compile(r'''@import\s+(?:url\(\s*)?['"]?([^'")\s;]+)['"]?''')
+
+# A repeat visit within this long reuses a cached response without asking
+REPEAT_AFTER = 24 * 3600
+
+def _body(response):
+    """The decoded body of a (possibly compressed) response, for finding linked assets."""
+    data = response.get_data()
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'br':
+        import brotli
+        data = brotli.decompress(data)
+    return data.decode('utf-8', 'replace')
+
+def page_load(client, accept_encoding):
+    """(url, transferred bytes, content encoding, cache-control) per request of one page load."""
+    headers = {'Accept-Encoding': accept_encoding}
+    requests = []
+    pending = ['/']
+    seen = set()
+    while pending:
+        url = pending.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        response = client.get(url, headers=headers)
+        if response.status_code == 404 and url.startswith('/static/'):
+            # e.g. node_modules not installed
+            print(f"  skipped missing {url}")
+            continue
+        assert response.status_code == 200, (url, response.status_code)
+        requests.append((url, len(response.get_data()), response.headers.get('Content-Encoding', ''),
+                         response.headers.get('Cache-Control', '')))
+        if response.mimetype == 'text/html':
+            pending += LOCAL_ASSET.findall(_body(response))
+            pending += API_CALLS
+        elif response.mimetype == 'text/css':
+            pending += [urljoin(url, target) for target in CSS_IMPORT.findall(_body(response))
+                        if '//' not in target]
+        response.close()
+    return requests
+
+def _cached(cache_control):
+    match = re.search(r'max-age=(\d+)', cache_control)
+    return 'immutable' in cache_control or (match is not None and int(match.group(1)) >= REPEAT_AFTER)
+
+def _report(name, requests, verbose):
+    total = sum(size for _, size, _, _ in requests)
+    repeat = sum(not _cached(cache_control) for _, _, _, cache_control in requests)
+    print(f"{name}: {len(requests)} requests, {total:,} bytes; a repeat visit makes {repeat} requests")
+    if verbose:
+        for url, size, encoding, cache_control in requests:
+            print(f"    {url:<60} {size:>9,} {encoding:<5} {cache_control}")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes transferred for one calendar page load')
+    parser.add_argument('--bookings', type=int, default=1000, help='Size of the seeded benchmark database')
+    parser.add_argument('--verbose', action='store_true', help='List every request')
+    args = parser.parse_args()
+
+    app = prepare(args.bookings)
+    assets.build(app)
+    with app.app_context():
+        admin_id = db.session.scalar(
+            db.select(func.min(User.id)).where(User.role == 'admin', User.company_id.isnot(None)))
+    client = logged_in_client(app, admin_id)
+
+    app.config.update(COMPRESSION_ENABLED=False, ASSETS_HASHED=False, SEND_FILE_MAX_AGE_DEFAULT=None)
+    before = _report('Before', page_load(client, 'identity'), args.verbose)
+    app.config.update(COMPRESSION_ENABLED=True, ASSETS_HASHED=True, SEND_FILE_MAX_AGE_DEFAULT=300)
+    after = _report('After', page_load(client, BROWSER_ACCEPT_ENCODING), args.verbose)
+    print(f"✓ {before - after:,} bytes saved ({1 - after / before:.0%})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the hot queries.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --bookings 100000 --verbose
+
+Runs EXPLAIN QUERY PLAN for each hot query against a seeded benchmark
+database and fails (exit 1) when any of them reads its table with a full
+scan instead of an index search. The queries come from app/queries.py, as
+the routes build them; tests/test_query_plans.py runs the same check on a
+small database as part of the test suite.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from sqlalchemy import func, select
+from app import db
+from app import queries
+from app.feeds import _feed_filter
+from app.models import Booking, Room, User
+from benchmarks.run import prepare
+
+WINDOW_START = datetime(2024, 3, 4)
+WINDOW_END = WINDOW_START + timedelta(days=42)
+
+def hot_queries():
+    """
+    (name, table, statement) for the queries behind the busiest endpoints,
+    built with the same helpers the routes use. Needs an app context.
+    """
+    now = datetime(2024, 3, 4, 12, 0)
+    manager = User(id=2, role='manager', company_id=1)
+    return [
+        ('booking overlap check', 'booking',
+         queries.overlapping_bookings(1, now, now + timedelta(hours=1)).limit(1).statement),
+        ('booking overlap check on update', 'booking',
+         queries.overlapping_bookings(1, now, now + timedelta(hours=1), exclude_id=5).limit(1).statement),
+        ('company feed validators', 'booking',
+         select(func.count(Booking.id), func.max(func.coalesce(Booking.updated_at, Booking.created_at)))
+         .where(*_feed_filter('company', 1, WINDOW_START, WINDOW_END))),
+        ('company feed rows', 'booking',
+         select(Booking.id, Booking.title, Booking.start_time)
+         .where(*_feed_filter('company', 1, WINDOW_START, WINDOW_END)).order_by(Booking.start_time)),
+        ('room feed rows', 'booking',
+         select(Booking.id, Booking.title, Booking.start_time)
+         .where(*_feed_filter('room', 1, WINDOW_START, WINDOW_END)).order_by(Booking.start_time)),
+        ('company bookings', 'booking', queries.company_bookings(1).statement),
+        ('company bookings in a room', 'booking', queries.company_bookings(1, room_id=1).statement),
+        ('company users', 'user', queries.company_users(1).statement),
+        ('users visible to a manager', 'user', queries.visible_users(manager).limit(50)),
+        ('active invitations', 'invitation', queries.active_invitations(1, now).statement),
+        ('pending invitation for email', 'invitation',
+         queries.pending_invitation(1, 'someone@example.com').limit(1).statement),
+        ('company invitations', 'invitation', queries.company_invitations(1).statement),
+        ('room name in company', 'room', queries.room_named(1, 'Room 1').limit(1).statement),
+        ('room name in company on update', 'room', queries.room_named(1, 'Room 1', exclude_id=1).limit(1).statement),
+        ('company room', 'room', queries.company_room(1, 1).limit(1).statement),
+        ('company rooms', 'room', queries.company_rooms(1).statement),
+        ('room search by equipment', 'room',
+         select(Room).where(*queries.room_search_filters(1, equipment=['projector', 'video conferencing']))),
+        ('room search by type and capacity', 'room',
+         select(Room).where(*queries.room_search_filters(1, room_type='meeting', min_capacity=8))),
+        ('room search by capacity range', 'room',
+         select(Room).where(*queries.room_search_filters(1, min_capacity=8, max_capacity=12))),
+        ('room search by location', 'room',
+         select(Room).where(*queries.room_search_filters(1, location='Floor 1'))),
+    ]
+
+def _bind_value(value):
+    # The sqlite3 driver gets datetimes as strings, like SQLAlchemy sends them
+    return value.isoformat(' ') if isinstance(value, datetime) else value
+
+def explain(statement):
+    """EXPLAIN QUERY PLAN detail lines for a statement on the current app's database."""
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(_bind_value(compiled.params[name]) for name in compiled.positiontup)
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    return [row[-1] for row in rows]
+
+def full_scans(plan, table):
+    """Plan steps that read every row of `table` (a search or covering index is fine)."""
+    return [step for step in plan
+            if step.startswith(f'SCAN {table}') and 'COVERING INDEX' not in step]
+
+def check(verbose=False):
+    failures = 0
+    for name, table, statement in hot_queries():
+        plan = explain(statement)
+        scans = full_scans(plan, table)
+        failures += bool(scans)
+        print(f"{'❌' if scans else '✓'} {name}")
+        if scans or verbose:
+            for step in plan:
+                print(f"      {step}")
+    if failures:
+        print(f"❌ {failures} hot queries fall back to a full table scan")
+    else:
+        print("✓ Every hot query uses an index")
+    return not failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Query-plan regression check for the hot queries')
+    parser.add_argument('--bookings', type=int, default=10000, help='Size of the seeded benchmark database')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan, not only failing ones')
+    args = parser.parse_args()
+    app = prepare(args.bookings)
+    with app.app_context():
+        ok = check(args.verbose)
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the booking hot paths.
+
+    python benchmarks/run.py                      # 1k and 100k bookings
+    python benchmarks/run.py --sizes 1000,100000,1000000
+    python benchmarks/run.py --compare old.json new.json
+
+Seeded databases are cached in benchmarks/.data; results are written to
+benchmarks/results/<commit>.json.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from sqlalchemy import func
+from config import Config
+from app import create_app, db, login_manager
+from app.models import Booking, Invitation, Room, User
+from app.seeding import EQUIPMENT
+from app.services import room_catalog
+from benchmarks import seed as seeding
+
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_SIZES = [1000, 100000]
+
+def make_app(path, **overrides):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SESSION_FILE_DIR = os.path.join(DATA_DIR, 'sessions')
+        ROOM_CACHE_DIR = os.path.join(DATA_DIR, 'room_cache')
+        CALENDAR_SYNC_INTERVAL = 0
+        # Per-request access logs would flood the benchmark output
+        LOG_LEVEL = 'WARNING'
+    for key, value in overrides.items():
+        setattr(BenchConfig, key, value)
+    return create_app(BenchConfig)
+
+def prepare(size):
+    """Returns an app bound to a seeded database with `size` bookings."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = seeding.database_path(DATA_DIR, size)
+    if not os.path.exists(path):
+        building = path + '.building'
+        if os.path.exists(building):
+            os.remove(building)
+        app = make_app(building)
+        started = time.perf_counter()
+        with app.app_context():
+            db.create_all()
+            seeding.seed(size)
+            db.session.remove()
+            db.engine.dispose()
+        os.replace(building, path)
+        print(f"  seeded {size} bookings in {time.perf_counter() - started:.1f}s")
+    return make_app(path)
+
+def measure(fn, min_iterations=5, max_iterations=200, min_time=1.0):
+    """Times fn() after a warm-up call until both minimums are met."""
+    fn()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and (len(timings) < min_iterations or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return {
+        'iterations': len(timings),
+        'min': timings[0],
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    }
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+def bench_overlap(app, rng, first, last, rooms):
+    """The overlapping-booking check from new_booking"""
+    def run():
+        with app.app_context():
+            start = first + timedelta(minutes=15 * rng.randrange(int((last - first).total_seconds() // 900)))
+            end = start + timedelta(hours=1)
+            Booking.query.filter(
+                Booking.room_id == rng.randrange(rooms) + 1,
+                Booking.start_time < end,
+                Booking.end_time > start
+            ).first()
+    return run
+
+def bench_get_bookings(app, rng, rooms):
+    """GET /api/bookings?room_id=... as a company admin (query + serialization)"""
+    with app.app_context():
+        admins = dict(db.session.query(User.company_id, func.min(User.id)).filter(User.role == 'admin')
+                      .group_by(User.company_id).all())
+    def run():
+        room_id = rng.randrange(rooms) + 1
+        with app.app_context():
+            company_id = db.session.get(Room, room_id).company_id
+        client = logged_in_client(app, admins[company_id])
+        response = client.get(f'/api/bookings?room_id={room_id}')
+        assert response.status_code == 200, response.status_code
+    return run
+
+def bench_get_rooms(app, rng, cached=True):
+    """GET /api/rooms, served from the room catalog cache or (cached=False) rebuilt every time"""
+    with app.app_context():
+        first_users = [user_id for (user_id,) in db.session.query(func.min(User.id)).group_by(User.company_id)]
+    clients = [logged_in_client(app, user_id) for user_id in first_users]
+    def run():
+        if not cached:
+            with app.app_context():
+                room_catalog.invalidate()
+        response = rng.choice(clients).get('/api/rooms')
+        assert response.status_code == 200, response.status_code
+    return run
+
+def bench_search_rooms(app, rng):
+    """GET /api/rooms/search with a random equipment and capacity filter"""
+    with app.app_context():
+        first_users = [user_id for (user_id,) in db.session.query(func.min(User.id)).group_by(User.company_id)]
+    clients = [logged_in_client(app, user_id) for user_id in first_users]
+    def run():
+        query = {'equipment': ','.join(rng.sample(EQUIPMENT, 2)), 'min_capacity': rng.choice([4, 8, 12])}
+        response = rng.choice(clients).get('/api/rooms/search', query_string=query)
+        assert response.status_code == 200, response.status_code
+    return run
+
+def bench_load_user(app, rng, users):
+    """The Flask-Login user_loader, with a fresh session like every request"""
+    def run():
+        with app.app_context():
+            login_manager._user_callback(str(rng.randrange(users) + 1))
+            db.session.remove()
+    return run
+
+def bench_generate_code(app):
+    """Invitation.generate_code() against the seeded invitations"""
+    def run():
+        with app.app_context():
+            Invitation.generate_code()
+            db.session.remove()
+    return run
+
+def run_size(size, only=None):
+    app = prepare(size)
+    rng = random.Random(size)
+    with app.app_context():
+        rooms = Room.query.count()
+        users = User.query.count()
+        first, last = db.session.query(func.min(Booking.start_time), func.max(Booking.start_time)).one()
+
+    benchmarks = {
+        'overlap_check': bench_overlap(app, rng, first, last, rooms),
+        'get_bookings': bench_get_bookings(app, rng, rooms),
+        'get_rooms': bench_get_rooms(app, rng),
+        'get_rooms_uncached': bench_get_rooms(app, rng, cached=False),
+        'search_rooms': bench_search_rooms(app, rng),
+        'load_user': bench_load_user(app, rng, users),
+        'generate_code': bench_generate_code(app)
+    }
+    results = {}
+    for name, fn in benchmarks.items():
+        if only and name not in only:
+            continue
+        results[name] = measure(fn)
+        print(f"  {name:<16} median {results[name]['median'] * 1000:9.3f} ms  "
+              f"p95 {results[name]['p95'] * 1000:9.3f} ms  ({results[name]['iterations']} runs)")
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT_DIR) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+def compare(old_path, new_path, threshold):
+    """Prints median changes; returns False when anything regressed past threshold."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old.get('revision')} -> {new.get('revision')}")
+    ok = True
+    for size, benchmarks in new['results'].items():
+        for name, result in benchmarks.items():
+            before = old['results'].get(size, {}).get(name)
+            if not before:
+                continue
+            change = result['median'] / before['median'] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                ok = False
+            elif change < -threshold:
+                flag = '  faster'
+            print(f"  {size:>8} {name:<16} {before['median'] * 1000:9.3f} -> {result['median'] * 1000:9.3f} ms "
+                  f"({change:+.1%}){flag}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Booking hot-path benchmarks')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma-separated booking counts to seed (e.g. 1000,100000,1000000)')
+    parser.add_argument('--only', help='Comma-separated benchmark names to run')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two results files')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Median slowdown counted as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(args.compare[0], args.compare[1], args.threshold) else 1)
+
+    only = set(args.only.split(',')) if args.only else None
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {}
+    }
+    for size in (int(s) for s in args.sizes.split(',')):
+        print(f"=== {size} bookings ===")
+        report['results'][str(size)] = run_size(size, only)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
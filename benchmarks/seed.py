@@ -0,0 +1,34 @@
+# benchmarks/seed.py
+"""Builds deterministic SQLite databases for the benchmarks"""
+
+import os
+from datetime import datetime
+from sqlalchemy import text
+from app import db
+from app import seeding
+
+# Bump when the seeded data or the schema changes so old cached databases are rebuilt
+SEED_VERSION = 4
+
+COMPANIES = 10
+USERS_PER_COMPANY = 20
+ROOMS_PER_COMPANY = 5
+INVITATIONS_PER_COMPANY = 100
+START = datetime(2024, 1, 1)
+
+def database_path(data_dir, bookings):
+    return os.path.join(data_dir, f'bench_{bookings}_v{SEED_VERSION}.db')
+
+def seed(bookings, seed_value=42):
+    """Fills the current app's (empty) database via app.seeding.generate()."""
+    db.session.execute(text('PRAGMA synchronous=OFF'))
+    return seeding.generate(
+        companies=COMPANIES,
+        rooms_per_company=ROOMS_PER_COMPANY,
+        users_per_company=USERS_PER_COMPANY,
+        start=START,
+        bookings=bookings,
+        invitations_per_company=INVITATIONS_PER_COMPANY,
+        password='benchmark',
+        seed=seed_value
+    )
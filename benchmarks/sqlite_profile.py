@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write throughput with and without the SQLite production profile.
+
+    python benchmarks/sqlite_profile.py
+    python benchmarks/sqlite_profile.py --bookings 100000 --readers 8 --writers 4 --duration 20
+
+Copies a seeded benchmark database once per profile, then runs reader threads
+(a room's bookings for one week, like the calendar view) next to writer
+threads (insert a booking and commit) and reports throughput, p95 latency and
+"database is locked" failures for each.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import Booking, Room
+from benchmarks import seed as seeding
+from benchmarks.run import DATA_DIR, make_app, prepare
+
+PROFILES = ['default', 'production']
+WRITE_FROM = datetime(2031, 1, 6, 8, 0)
+
+def _copy_database(size, profile):
+    path = os.path.join(DATA_DIR, f'profile_{profile}_{os.getpid()}.db')
+    shutil.copy(seeding.database_path(DATA_DIR, size), path)
+    # WAL is persistent, so start every run from SQLite's default journal
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=DELETE')
+    connection.close()
+    return path
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+def run_profile(size, profile, readers, writers, duration, seed_value):
+    path = _copy_database(size, profile)
+    app = make_app(path, SQLITE_PROFILE=profile, DATABASE_POOL_SIZE=readers + writers)
+    with app.app_context():
+        room_ids = [room_id for (room_id,) in db.session.query(Room.id)]
+        first, last = db.session.query(func.min(Booking.start_time), func.max(Booking.start_time)).one()
+    weeks = max(1, (last - first).days // 7)
+
+    lock = threading.Lock()
+    results = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    deadline = time.monotonic() + duration
+
+    def record(kind, elapsed, failed):
+        with lock:
+            if failed:
+                errors[kind] += 1
+            else:
+                results[kind].append(elapsed)
+
+    def reader(index):
+        rng = random.Random(seed_value * 1000 + index)
+        while time.monotonic() < deadline:
+            start = first + timedelta(weeks=rng.randrange(weeks))
+            started = time.perf_counter()
+            failed = False
+            with app.app_context():
+                try:
+                    Booking.query.filter(
+                        Booking.room_id == rng.choice(room_ids),
+                        Booking.start_time < start + timedelta(days=7),
+                        Booking.end_time > start
+                    ).all()
+                except OperationalError:
+                    failed = True
+                finally:
+                    db.session.remove()
+            record('read', time.perf_counter() - started, failed)
+
+    def writer(index):
+        rng = random.Random(seed_value * 1000 + 500 + index)
+        while time.monotonic() < deadline:
+            start = WRITE_FROM + timedelta(days=rng.randrange(3650), minutes=30 * rng.randrange(20))
+            started = time.perf_counter()
+            failed = False
+            with app.app_context():
+                try:
+                    db.session.add(Booking(title='Profile benchmark', start_time=start,
+                                           end_time=start + timedelta(minutes=30), room_id=rng.choice(room_ids)))
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    failed = True
+                finally:
+                    db.session.remove()
+            record('write', time.perf_counter() - started, failed)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    with app.app_context():
+        db.engine.dispose()
+    _remove_database(path)
+    return {kind: {
+        'ops': len(results[kind]),
+        'throughput': len(results[kind]) / elapsed,
+        'p50': _percentile(results[kind], 0.50),
+        'p95': _percentile(results[kind], 0.95),
+        'locked_errors': errors[kind]
+    } for kind in ('read', 'write')}
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite profile mixed read/write benchmark')
+    parser.add_argument('--bookings', type=int, default=100000, help='Size of the seeded database')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    prepare(args.bookings)
+    report = {}
+    print(f"{'profile':<12}{'kind':<7}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'locked':>8}")
+    for profile in PROFILES:
+        report[profile] = run_profile(args.bookings, profile, args.readers, args.writers, args.duration, args.seed)
+        for kind, row in report[profile].items():
+            p50 = f"{row['p50'] * 1000:10.2f}" if row['p50'] is not None else f"{'-':>10}"
+            p95 = f"{row['p95'] * 1000:10.2f}" if row['p95'] is not None else f"{'-':>10}"
+            print(f"{profile:<12}{kind:<7}{row['throughput']:>9.1f}{p50}{p95}{row['locked_errors']:>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == '__main__':
+    main()
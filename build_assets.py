@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Build content-hashed, precompressed copies of the static assets into app/static/dist"""
+
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app import assets
+from app import compression
+
+def build_assets(args):
+    app = create_app()
+    report = assets.build(app)
+    encodings = compression.available_encodings()
+
+    total = {'bytes': 0, **{encoding: 0 for encoding in encodings}}
+    for entry in report:
+        total['bytes'] += entry['bytes']
+        for encoding in encodings:
+            total[encoding] += entry[encoding] or entry['bytes']
+        if args.verbose:
+            sizes = '  '.join(f"{encoding} {entry[encoding] or entry['bytes']:>8,}" for encoding in encodings)
+            print(f"  {entry['hashed']:<48} {entry['bytes']:>8,}  {sizes}")
+
+    print(f"✓ Built {len(report)} assets into {os.path.relpath(os.path.join(app.static_folder, 'dist'))}")
+    for encoding in encodings:
+        print(f"  {encoding:<5} {total['bytes']:,} -> {total[encoding]:,} bytes "
+              f"({1 - total[encoding] / max(total['bytes'], 1):.0%} smaller)")
+    if 'br' not in encodings:
+        print("  (install the brotli package for .br variants)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verbose', action='store_true', help='List every asset with its sizes')
+    build_assets(parser.parse_args())
@@ -16,11 +16,157 @@ class Config:
         'sqlite:///' + os.path.join(basedir, 'instance', 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite connection profile (app/database.py): 'production' enables WAL,
+    # a busy timeout (ms), synchronous=NORMAL, mmap, a larger page cache and
+    # foreign keys on every connection; 'default' leaves SQLite's settings alone
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'true').lower() in ('1', 'true', 'yes')
+
+    # Connection pool per process (recycle/pre-ping only apply to server databases)
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 10))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', 20))
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT', 30))
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', 1800))
+
+    # Read replicas (comma-separated URLs): GET/HEAD requests read from one of
+    # them; after a user's own write their reads stay on the primary this long
+    DATABASE_REPLICA_URLS = os.environ.get('DATABASE_REPLICA_URLS', '')
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+    # Tenant sharding (app/sharding.py): 'name=url,...' databases that companies
+    # can live on; new companies go to 'hash' (spread by id), a shard name,
+    # or 'default' (the main database, which also holds the shard directory)
+    DATABASE_SHARDS = os.environ.get('DATABASE_SHARDS', '')
+    DATABASE_SHARD_NEW_COMPANIES = os.environ.get('DATABASE_SHARD_NEW_COMPANIES', 'hash')
+
     # --- ADD THESE THREE LINES ---
     # This explicitly loads the environment variables into the Flask config
     MICROSOFT_CLIENT_ID = os.environ.get('MICROSOFT_CLIENT_ID')
     MICROSOFT_CLIENT_SECRET = os.environ.get('MICROSOFT_CLIENT_SECRET')
     MICROSOFT_TENANT_ID = os.environ.get('MICROSOFT_TENANT_ID')
+    MICROSOFT_BOARDROOM_EMAIL = os.environ.get('MICROSOFT_BOARDROOM_EMAIL')
+    MICROSOFT_CALENDAR_ID = os.environ.get('MICROSOFT_CALENDAR_ID')
+    # Override to point the Graph client at a local stub server
+    MICROSOFT_GRAPH_URL = os.environ.get('MICROSOFT_GRAPH_URL', 'https://graph.microsoft.com/v1.0')
+    # Room that events from the boardroom calendar are synced into
+    MICROSOFT_SYNC_ROOM_ID = int(os.environ['MICROSOFT_SYNC_ROOM_ID']) if os.environ.get('MICROSOFT_SYNC_ROOM_ID') else None
+    # Delta sync window: MICROSOFT_SYNC_LOOKBACK_DAYS back and
+    # MICROSOFT_SYNC_WINDOW_DAYS ahead, fixed when a full sync starts
+    MICROSOFT_SYNC_LOOKBACK_DAYS = int(os.environ.get('MICROSOFT_SYNC_LOOKBACK_DAYS', 30))
+    MICROSOFT_SYNC_WINDOW_DAYS = int(os.environ.get('MICROSOFT_SYNC_WINDOW_DAYS', 365))
+
+    # Fernet key(s) encrypting stored calendar credentials, comma-separated
+    # with the newest first; derived from SECRET_KEY when unset
+    CREDENTIALS_KEY = os.environ.get('CREDENTIALS_KEY')
 
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
-    GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
\ No newline at end of file
+    GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
+    GOOGLE_CALENDAR_ID = os.environ.get('GOOGLE_CALENDAR_ID')
+    # Override to point the Calendar client at a local fake
+    GOOGLE_CALENDAR_API_URL = os.environ.get('GOOGLE_CALENDAR_API_URL', 'https://www.googleapis.com/calendar/v3')
+    # Room that events from the Google calendar are synced into
+    GOOGLE_SYNC_ROOM_ID = int(os.environ['GOOGLE_SYNC_ROOM_ID']) if os.environ.get('GOOGLE_SYNC_ROOM_ID') else None
+
+    # Background calendar sync interval in seconds (0 disables the scheduler;
+    # use sync_calendars.py from cron instead when running several workers)
+    CALENDAR_SYNC_INTERVAL = int(os.environ.get('CALENDAR_SYNC_INTERVAL', 0))
+
+    # Seconds to hold outbound calendar writes so rapid edits coalesce
+    OUTBOUND_SYNC_DELAY = float(os.environ.get('OUTBOUND_SYNC_DELAY', 2.0))
+    OUTBOUND_SYNC_MAX_ATTEMPTS = int(os.environ.get('OUTBOUND_SYNC_MAX_ATTEMPTS', 5))
+    # Writes still 'pending' after this many seconds were lost with their
+    # process; sync_calendars.py sends them again
+    OUTBOUND_SYNC_STALE_SECONDS = int(os.environ.get('OUTBOUND_SYNC_STALE_SECONDS', 900))
+
+    # Calendar provider HTTP resilience (app/services/resilience.py)
+    CALENDAR_CONNECT_TIMEOUT = float(os.environ.get('CALENDAR_CONNECT_TIMEOUT', 3.05))
+    CALENDAR_READ_TIMEOUT = float(os.environ.get('CALENDAR_READ_TIMEOUT', 15.0))
+    CALENDAR_MAX_RETRIES = int(os.environ.get('CALENDAR_MAX_RETRIES', 3))
+    CALENDAR_RETRY_BASE_DELAY = float(os.environ.get('CALENDAR_RETRY_BASE_DELAY', 0.5))
+    CALENDAR_RETRY_MAX_DELAY = float(os.environ.get('CALENDAR_RETRY_MAX_DELAY', 10.0))
+    CALENDAR_BREAKER_THRESHOLD = int(os.environ.get('CALENDAR_BREAKER_THRESHOLD', 5))
+    CALENDAR_BREAKER_RESET = float(os.environ.get('CALENDAR_BREAKER_RESET', 30.0))
+
+    # Merged calendar feed: overall latency budget (seconds) and fan-out threads
+    CALENDAR_FEED_BUDGET = float(os.environ.get('CALENDAR_FEED_BUDGET', 2.0))
+    CALENDAR_FEED_WORKERS = int(os.environ.get('CALENDAR_FEED_WORKERS', 8))
+
+    # External event cache: seconds an entry is fresh, extra seconds it may be
+    # served stale while refreshing in the background, and max cached windows
+    CALENDAR_CACHE_TTL = float(os.environ.get('CALENDAR_CACHE_TTL', 60))
+    CALENDAR_CACHE_STALE_TTL = float(os.environ.get('CALENDAR_CACHE_STALE_TTL', 300))
+    CALENDAR_CACHE_MAX_ENTRIES = int(os.environ.get('CALENDAR_CACHE_MAX_ENTRIES', 512))
+
+    # .ics subscription feeds: days of history and future included, rows per fetch
+    ICS_FEED_PAST_DAYS = int(os.environ.get('ICS_FEED_PAST_DAYS', 30))
+    ICS_FEED_FUTURE_DAYS = int(os.environ.get('ICS_FEED_FUTURE_DAYS', 365))
+    ICS_FEED_BATCH_SIZE = int(os.environ.get('ICS_FEED_BATCH_SIZE', 500))
+
+    # .ics import: occurrences per conflict-check/insert batch, how far ahead
+    # open-ended recurrences are expanded, how far back recurrences start,
+    # the most occurrences per event, and the zone for floating times
+    ICS_IMPORT_BATCH_SIZE = int(os.environ.get('ICS_IMPORT_BATCH_SIZE', 1000))
+    ICS_IMPORT_HORIZON_DAYS = int(os.environ.get('ICS_IMPORT_HORIZON_DAYS', 365))
+    ICS_IMPORT_PAST_DAYS = int(os.environ.get('ICS_IMPORT_PAST_DAYS', 365))
+    ICS_IMPORT_MAX_OCCURRENCES = int(os.environ.get('ICS_IMPORT_MAX_OCCURRENCES', 1000))
+    ICS_IMPORT_TIMEZONE = os.environ.get('ICS_IMPORT_TIMEZONE', 'UTC')
+    ICS_IMPORT_REPORT_LIMIT = int(os.environ.get('ICS_IMPORT_REPORT_LIMIT', 1000))
+
+    # /api/rooms catalog cache: 'filesystem' (shared by the workers on a host,
+    # in ROOM_CACHE_DIR, default instance/room_cache), 'simple' (per process)
+    # or 'null'. Room writes invalidate it; ROOM_CACHE_TTL bounds staleness
+    # after writes made outside the app
+    ROOM_CACHE_TYPE = os.environ.get('ROOM_CACHE_TYPE', 'filesystem')
+    ROOM_CACHE_DIR = os.environ.get('ROOM_CACHE_DIR')
+    ROOM_CACHE_TTL = int(os.environ.get('ROOM_CACHE_TTL', 300))
+    ROOM_CACHE_THRESHOLD = int(os.environ.get('ROOM_CACHE_THRESHOLD', 2000))
+
+    # Compression of JSON and text responses of at least COMPRESSION_MIN_SIZE
+    # bytes: brotli when the brotli package is installed, else gzip
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+
+    # Static assets: templates link the content-hashed copies made by
+    # build_assets.py (cached ASSETS_MAX_AGE seconds, immutable) when they
+    # exist; other static files are cached SEND_FILE_MAX_AGE_DEFAULT seconds
+    ASSETS_HASHED = os.environ.get('ASSETS_HASHED', 'true').lower() in ('1', 'true', 'yes')
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 31536000))
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.environ.get('SEND_FILE_MAX_AGE_DEFAULT', 300))
+
+    # Prometheus metrics at /metrics. Scrapes need METRICS_TOKEN as a bearer
+    # token; without one /metrics only answers in debug mode. With METRICS_DIR
+    # (run.py serve defaults it to instance/metrics) workers share their
+    # counters there, written at most every METRICS_FLUSH_SECONDS
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 1.0))
+
+    # N+1 query detector (always on in debug/testing): repeats allowed per
+    # statement in one request, and 'warn' or 'raise' when exceeded
+    NPLUSONE_ENABLED = os.environ.get('NPLUSONE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    NPLUSONE_THRESHOLD = int(os.environ.get('NPLUSONE_THRESHOLD', 5))
+    NPLUSONE_ACTION = os.environ.get('NPLUSONE_ACTION', 'warn')
+
+    # Logging: JSON lines (LOG_FORMAT='text' for plain lines) on stdout, written
+    # by a background thread from a queue of at most LOG_QUEUE_SIZE records.
+    # LOG_SAMPLING keeps a share of a logger's sub-WARNING records, e.g.
+    # 'app.access=0.1'; LOG_REQUESTS logs every request with its duration
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_SAMPLING = os.environ.get('LOG_SAMPLING', '')
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'true').lower() in ('1', 'true', 'yes')
+
+    # Production serving (python run.py --mode serve): pre-fork workers
+    # (0 = 2 x CPUs + 1), threads per worker, and request/shutdown timeouts
+    SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', 0))
+    SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 4))
+    SERVE_TIMEOUT = int(os.environ.get('SERVE_TIMEOUT', 30))
+    SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Bulk import bookings from an .ics file into one company's rooms"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models import Company, Room, User
+from app.services import ics_import
+
+def import_ics(path, company_id, room_name=None, user_email=None, dry_run=False, report_path=None):
+    app = create_app()
+    with app.app_context():
+        company = Company.query.get(company_id)
+        if not company:
+            print(f"Company {company_id} not found")
+            return False
+        
+        room_id = None
+        if room_name:
+            room = Room.query.filter_by(company_id=company.id, name=room_name).first()
+            if not room:
+                print(f"Room '{room_name}' not found in {company.name}")
+                return False
+            room_id = room.id
+        
+        user_id = None
+        if user_email:
+            user = User.query.filter_by(email=user_email, company_id=company.id).first()
+            if not user:
+                print(f"User {user_email} not found in {company.name}")
+                return False
+            user_id = user.id
+        
+        print(f"=== Importing {path} into {company.name}{' (dry run)' if dry_run else ''} ===")
+        with open(path, 'rb') as f:
+            report = ics_import.import_ics(f, company.id, user_id=user_id, room_id=room_id, dry_run=dry_run)
+        
+        print(f"Events read: {report['events']}")
+        print(f"Occurrences: {report['occurrences']}")
+        print(f"{'Would import' if dry_run else 'Imported'}: {report['imported']}")
+        print(f"Conflicts: {report['conflicts']}")
+        print(f"Skipped: {report['skipped']}")
+        if report['truncated'] or report['before_window']:
+            print(f"Recurrences cut short: {report['truncated']} events, "
+                  f"{report['before_window']} occurrences before the import window")
+        for location, count in sorted(report['unknown_rooms'].items()):
+            print(f"  - unknown room '{location}': {count} events")
+        for issue in report['issues'][:20]:
+            print(f"  - {issue['reason']}: {issue['title']} {issue['start'] or ''} ({issue['room'] or 'no room'})")
+        if len(report['issues']) > 20:
+            print(f"  ... {len(report['issues']) - 20} more issues")
+        
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Full report written to {report_path}")
+        return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help='.ics file to import')
+    parser.add_argument('--company-id', type=int, required=True)
+    parser.add_argument('--room', help='Put every event in this room instead of matching LOCATION')
+    parser.add_argument('--user-email', help='Owner of the imported bookings')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would happen without saving')
+    parser.add_argument('--report', help='Write the full JSON report to this file')
+    args = parser.parse_args()
+    ok = import_ics(args.path, args.company_id, args.room, args.user_email, args.dry_run, args.report)
+    sys.exit(0 if ok else 1)
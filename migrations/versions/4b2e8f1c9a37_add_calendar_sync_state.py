@@ -0,0 +1,43 @@
+"""Add calendar sync state and Microsoft event id to bookings
+
+Revision ID: 4b2e8f1c9a37
+Revises: 829b0e659f6e
+Create Date: 2026-10-19 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b2e8f1c9a37'
+down_revision = '829b0e659f6e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('calendar_id', sa.String(length=255), nullable=False),
+    sa.Column('sync_cursor', sa.Text(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('provider', 'calendar_id', name='uq_calendar_sync_state_provider_calendar')
+    )
+
+    # The bookings migration created this column and 6cd782c66df9 dropped it;
+    # delta sync needs it back to match Graph events to local bookings.
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('microsoft_calendar_event_id', sa.String(length=255), nullable=True))
+        batch_op.create_unique_constraint('uq_booking_microsoft_calendar_event_id', ['microsoft_calendar_event_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_booking_microsoft_calendar_event_id', type_='unique')
+        batch_op.drop_column('microsoft_calendar_event_id')
+
+    op.drop_table('calendar_sync_state')
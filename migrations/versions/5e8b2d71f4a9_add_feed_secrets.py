@@ -0,0 +1,36 @@
+"""Add feed secrets to companies and rooms for revocable .ics feed URLs
+
+Revision ID: 5e8b2d71f4a9
+Revises: b7f1c4e82d36
+Create Date: 2026-10-19 18:05:41.302117
+
+"""
+import secrets
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b2d71f4a9'
+down_revision = 'b7f1c4e82d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Feed URLs issued before this revision stop working; each row gets its own secret
+    connection = op.get_bind()
+    for table in ('company', 'room'):
+        op.add_column(table, sa.Column('feed_secret', sa.String(length=32), nullable=True))
+        for (row_id,) in connection.execute(sa.text(f"SELECT id FROM {table}")).all():
+            connection.execute(sa.text(f"UPDATE {table} SET feed_secret = :secret WHERE id = :id"),
+                               {'secret': secrets.token_urlsafe(16), 'id': row_id})
+        # SQLite can only add NOT NULL by rebuilding the table, which its
+        # foreign keys block; the model's default fills the column there
+        if connection.dialect.name != 'sqlite':
+            op.alter_column(table, 'feed_secret', existing_type=sa.String(length=32), nullable=False)
+
+
+def downgrade():
+    for table in ('room', 'company'):
+        op.drop_column(table, 'feed_secret')
@@ -0,0 +1,36 @@
+"""Encrypt stored calendar credentials
+
+Revision ID: 8c4f1a6e2b95
+Revises: 5e8b2d71f4a9
+Create Date: 2026-10-19 18:52:07.640319
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app import encryption
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f1a6e2b95'
+down_revision = '5e8b2d71f4a9'
+branch_labels = None
+depends_on = None
+
+
+def _convert(transform, plaintext):
+    # Uses CREDENTIALS_KEY (or SECRET_KEY) of the app running the migration
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, credentials FROM calendar_credential")).all()
+    for row_id, credentials in rows:
+        # Plaintext rows are the JSON objects written before this revision
+        if credentials.lstrip().startswith('{') == plaintext:
+            connection.execute(sa.text("UPDATE calendar_credential SET credentials = :value WHERE id = :id"),
+                               {'value': transform(credentials), 'id': row_id})
+
+
+def upgrade():
+    _convert(encryption.encrypt, plaintext=True)
+
+
+def downgrade():
+    _convert(encryption.decrypt, plaintext=False)
@@ -0,0 +1,44 @@
+"""Add calendar credentials and Google event id to bookings
+
+Revision ID: 9d5a07c3e6f2
+Revises: 4b2e8f1c9a37
+Create Date: 2026-10-19 11:40:03.772916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d5a07c3e6f2'
+down_revision = '4b2e8f1c9a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_credential',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('credentials', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('provider', 'user_id', name='uq_calendar_credential_provider_user')
+    )
+
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('google_calendar_event_id', sa.String(length=255), nullable=True))
+        batch_op.create_unique_constraint('uq_booking_google_calendar_event_id', ['google_calendar_event_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_booking_google_calendar_event_id', type_='unique')
+        batch_op.drop_column('google_calendar_event_id')
+
+    op.drop_table('calendar_credential')
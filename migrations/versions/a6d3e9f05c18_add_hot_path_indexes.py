@@ -0,0 +1,46 @@
+"""Add composite indexes for the booking, user, invitation and room hot paths
+
+Revision ID: a6d3e9f05c18
+Revises: f4c2d8a1b7e9
+Create Date: 2026-10-19 18:05:47.301552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e9f05c18'
+down_revision = 'f4c2d8a1b7e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_room_time', ['room_id', 'start_time', 'end_time'], unique=False)
+        batch_op.create_index('ix_booking_company_time', ['company_id', 'start_time', 'end_time'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_company_id'), ['company_id'], unique=False)
+
+    with op.batch_alter_table('invitation', schema=None) as batch_op:
+        batch_op.create_index('ix_invitation_company_used_expires', ['company_id', 'is_used', 'expires_at'], unique=False)
+
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.create_index('ix_room_company_name', ['company_id', 'name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.drop_index('ix_room_company_name')
+
+    with op.batch_alter_table('invitation', schema=None) as batch_op:
+        batch_op.drop_index('ix_invitation_company_used_expires')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_company_id'))
+
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_company_time')
+        batch_op.drop_index('ix_booking_room_time')
@@ -0,0 +1,66 @@
+"""Add room_equipment table (backfilled from room.equipment) and room search indexes
+
+Revision ID: b7f1c4e82d36
+Revises: a6d3e9f05c18
+Create Date: 2026-10-19 20:12:31.904417
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f1c4e82d36'
+down_revision = 'a6d3e9f05c18'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(item):
+    # Same as RoomEquipment.normalize() at this revision
+    return '_'.join(str(item).lower().split())[:100]
+
+
+def upgrade():
+    room_equipment = op.create_table('room_equipment',
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('item', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('room_id', 'item')
+    )
+    with op.batch_alter_table('room_equipment', schema=None) as batch_op:
+        batch_op.create_index('ix_room_equipment_item', ['item', 'room_id'], unique=False)
+
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.create_index('ix_room_type_capacity', ['room_type', 'capacity'], unique=False)
+        batch_op.create_index('ix_room_capacity', ['capacity'], unique=False)
+        batch_op.create_index('ix_room_location', ['location'], unique=False)
+
+    # Backfill from the JSON lists; unreadable values are skipped, as
+    # Room.get_equipment_list() treats them as empty
+    connection = op.get_bind()
+    rows = []
+    for room_id, equipment in connection.execute(sa.text("SELECT id, equipment FROM room WHERE equipment IS NOT NULL")):
+        try:
+            items = json.loads(equipment)
+        except ValueError:
+            continue
+        if not isinstance(items, list):
+            continue
+        keys = dict.fromkeys(_normalize(item) for item in items if str(item).strip())
+        rows.extend({'room_id': room_id, 'item': key} for key in keys)
+    if rows:
+        op.bulk_insert(room_equipment, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.drop_index('ix_room_location')
+        batch_op.drop_index('ix_room_capacity')
+        batch_op.drop_index('ix_room_type_capacity')
+
+    with op.batch_alter_table('room_equipment', schema=None) as batch_op:
+        batch_op.drop_index('ix_room_equipment_item')
+
+    op.drop_table('room_equipment')
@@ -0,0 +1,35 @@
+"""Add booking sync state for outbound calendar writes
+
+Revision ID: c81f4d2b6a05
+Revises: 9d5a07c3e6f2
+Create Date: 2026-10-19 14:02:27.105561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4d2b6a05'
+down_revision = '9d5a07c3e6f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('booking_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('external_event_id', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('booking_id', 'provider', name='uq_booking_sync_state_booking_provider')
+    )
+
+
+def downgrade():
+    op.drop_table('booking_sync_state')
@@ -0,0 +1,28 @@
+"""Add updated_at to bookings for calendar feed validators
+
+Revision ID: e3a91c7d5b20
+Revises: c81f4d2b6a05
+Create Date: 2026-10-19 15:11:42.630914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a91c7d5b20'
+down_revision = 'c81f4d2b6a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE booking SET updated_at = created_at WHERE updated_at IS NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,29 @@
+"""Add company shard directory for tenant sharding
+
+Revision ID: f4c2d8a1b7e9
+Revises: e3a91c7d5b20
+Create Date: 2026-10-19 16:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2d8a1b7e9'
+down_revision = 'e3a91c7d5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_shard',
+    sa.Column('company_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+
+def downgrade():
+    op.drop_table('company_shard')
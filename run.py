@@ -1,8 +1,12 @@
 import argparse
 import os
 import sys
-from app import create_app, db
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from config import Config
+from app import create_app, db, metrics
 from app.models import User, Company
+from app.routes import warm_room_catalogs
 
 def create_dev_user():
     """Create a development user if it doesn't exist"""
@@ -47,6 +51,10 @@ def show_menu():
     print("3. Custom Mode (Command line options)")
     print("   - Use command line arguments")
     print()
+    print("4. Production Mode (Multi-worker)")
+    print("   - Pre-fork gunicorn workers, debug off")
+    print("   - Workers/threads from SERVE_WORKERS / SERVE_THREADS")
+    print()
     print("0. Exit")
     print("="*50)
 
@@ -54,11 +62,11 @@ def get_user_choice():
     """Get user choice from terminal"""
     while True:
         try:
-            choice = input("\nEnter your choice (0-3): ").strip()
-            if choice in ['0', '1', '2', '3']:
+            choice = input("\nEnter your choice (0-4): ").strip()
+            if choice in ['0', '1', '2', '3', '4']:
                 return choice
             else:
-                print("❌ Invalid choice. Please enter 0, 1, 2, or 3.")
+                print("❌ Invalid choice. Please enter 0, 1, 2, 3, or 4.")
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!")
             sys.exit(0)
@@ -105,22 +113,100 @@ def run_user_mode():
     # Run the application
     app.run(host='127.0.0.1', port=5000, debug=True)
 
+class ServeConfig(Config):
+    # The in-process sync thread would be duplicated (or forked mid-run) in
+    # every worker; run sync_calendars.py from cron instead
+    CALENDAR_SYNC_INTERVAL = 0
+
+def warm_up(app):
+    """Loads everything workers would otherwise build on their first request."""
+    configure_mappers()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    with app.app_context():
+        # Fails fast on a bad DATABASE_URL and initializes the dialect
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        # Shared with the workers through ROOM_CACHE_DIR (or copied by fork)
+        warm_room_catalogs()
+        # No connections may be shared with the forked workers
+        for engine in db.engines.values():
+            engine.dispose()
+
+def post_fork(server, worker):
+    """Drops pool state copied from the master without closing its sockets."""
+    with app.app_context():
+        # Every bind: replicas and shards have pools of their own
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def run_production_mode(host='0.0.0.0', port=5000, workers=None, threads=None):
+    """Run the application under gunicorn with a preloaded app"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ Production mode needs gunicorn: pip install gunicorn")
+        sys.exit(1)
+    
+    print("\n🏭 Starting in PRODUCTION mode...")
+    os.environ['FLASK_ENV'] = 'production'
+    os.environ['DEV_MODE'] = 'false'
+    
+    global app
+    app = create_app(ServeConfig)
+    warm_up(app)
+    # Workers merge their metrics through files; start from zero
+    app.config['METRICS_DIR'] = app.config['METRICS_DIR'] or os.path.join(app.instance_path, 'metrics')
+    metrics.clear_snapshots(app.config['METRICS_DIR'])
+    
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f'{host}:{port}',
+                'workers': workers or app.config['SERVE_WORKERS'] or (os.cpu_count() or 1) * 2 + 1,
+                'threads': threads or app.config['SERVE_THREADS'],
+                'timeout': app.config['SERVE_TIMEOUT'],
+                'graceful_timeout': app.config['SERVE_GRACEFUL_TIMEOUT'],
+                'preload_app': True,
+                'post_fork': post_fork
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    server = ProductionServer()
+    print(f"🌐 Server starting on http://{host}:{port} "
+          f"({server.cfg.workers} workers x {server.cfg.threads} threads)")
+    print(f"🔁 kill -HUP {os.getpid()} rolls workers gracefully; restart to load new code")
+    print("Press CTRL+C to quit")
+    server.run()
+
 def main():
     # Check if command line arguments are provided
     if len(sys.argv) > 1:
         # Use command line mode
         parser = argparse.ArgumentParser(description='BoardRoom-Booker Application')
-        parser.add_argument('--mode', choices=['user', 'dev'], default='user',
-                           help='Run mode: user (normal) or dev (auto-login)')
+        parser.add_argument('--mode', choices=['user', 'dev', 'serve'], default='user',
+                           help='Run mode: user (normal), dev (auto-login) or serve (production workers)')
         parser.add_argument('--host', default='127.0.0.1',
                            help='Host to run the server on (default: 127.0.0.1)')
         parser.add_argument('--port', type=int, default=5000,
                            help='Port to run the server on (default: 5000)')
         parser.add_argument('--debug', action='store_true', default=True,
                            help='Run in debug mode (default: True)')
+        parser.add_argument('--workers', type=int,
+                           help='Serve mode: worker processes (default: SERVE_WORKERS)')
+        parser.add_argument('--threads', type=int,
+                           help='Serve mode: threads per worker (default: SERVE_THREADS)')
         
         args = parser.parse_args()
         
+        if args.mode == 'serve':
+            run_production_mode(args.host, args.port, args.workers, args.threads)
+            return
+        
         # Set environment variable for dev mode
         if args.mode == 'dev':
             os.environ['FLASK_ENV'] = 'development'
@@ -168,8 +254,12 @@ def main():
                 print("\n💡 Use command line arguments:")
                 print("   python run.py --mode dev    # Development mode")
                 print("   python run.py --mode user   # User mode")
+                print("   python run.py --mode serve  # Production mode")
                 print("   python run.py --help        # Show all options")
                 sys.exit(0)
+            elif choice == '4':
+                run_production_mode()
+                break
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
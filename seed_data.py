@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Generate a synthetic dataset (companies, users, rooms, bookings) with bulk inserts"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app import seeding
+
+def seed_data(args):
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            print("Dropping and recreating tables...")
+            db.drop_all()
+        db.create_all()
+        
+        print(f"=== Seeding {args.companies} companies x {args.rooms} rooms x {args.users} users ===")
+        started = time.perf_counter()
+        
+        def progress(count):
+            print(f"  ... {count} bookings ({count / (time.perf_counter() - started):,.0f}/s)")
+        
+        counts = seeding.generate(
+            companies=args.companies,
+            rooms_per_company=args.rooms,
+            users_per_company=args.users,
+            years=args.years,
+            start=datetime.strptime(args.start, '%Y-%m-%d') if args.start else None,
+            bookings=args.bookings,
+            occupancy=args.occupancy,
+            recurring_per_room=args.recurring,
+            public_share=args.public_share,
+            invitations_per_company=args.invitations,
+            password=args.password,
+            seed=args.seed,
+            progress=progress
+        )
+        
+        print(f"✓ Created {counts['companies']} companies, {counts['users']} users, {counts['rooms']} rooms, "
+              f"{counts['invitations']} invitations")
+        print(f"✓ Created {counts['bookings']} bookings over {counts['days']} days "
+              f"in {time.perf_counter() - started:.1f}s")
+        print(f"Login as user1@company<N>.example.com (admin) with password '{args.password}'")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--companies', type=int, default=10)
+    parser.add_argument('--rooms', type=int, default=5, help='Rooms per company')
+    parser.add_argument('--users', type=int, default=20, help='Users per company')
+    parser.add_argument('--years', type=float, default=1, help='Years of bookings to generate')
+    parser.add_argument('--start', help='First booking day, YYYY-MM-DD (default: Jan 1 this year)')
+    parser.add_argument('--bookings', type=int, help='Stop at exactly this many bookings instead of --years')
+    parser.add_argument('--occupancy', type=float, default=0.15, help='Ad-hoc demand, roughly share of peak slots booked')
+    parser.add_argument('--recurring', type=int, default=1, help='Weekly recurring meetings per room')
+    parser.add_argument('--public-share', type=float, default=0.7, help='Share of bookings visible to all companies')
+    parser.add_argument('--invitations', type=int, default=0, help='Pending invitations per company')
+    parser.add_argument('--password', default='password', help='Password for every generated user')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Drop all tables first')
+    seed_data(parser.parse_args())
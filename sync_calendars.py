@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Run one pass of the external calendar sync (schedule this with cron)"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services import calendar_sync
+from app.services import outbound_sync
+
+def sync_calendars():
+    app = create_app()
+    with app.app_context():
+        print("=== Calendar Sync ===")
+        results = calendar_sync.run_all_syncs()
+        for provider, counts in results.items():
+            if counts is None:
+                print(f"  - {provider}: skipped or failed (see calendar_sync_state.last_error)")
+            else:
+                print(f"  - {provider}: {counts['created']} created, {counts['updated']} updated, {counts['deleted']} deleted")
+        
+        outbound_sync.queue.background = False
+        retried = outbound_sync.retry_failed()
+        if retried:
+            outbound_sync.queue.drain()
+            print(f"Retried {retried} failed or stalled outbound writes")
+
+if __name__ == '__main__':
+    sync_calendars()
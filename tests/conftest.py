@@ -0,0 +1,104 @@
+# tests/conftest.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'test')
+
+import pytest
+from config import Config
+from app import create_app, db, sharding
+from app.models import Company, Room, User
+from app.services import outbound_sync
+from stub_server import StubServer
+
+# The query_budget fixture
+pytest_plugins = ['app.nplusone']
+
+def build_app(tmp_path, **overrides):
+    """An app on its own SQLite file in tmp_path, with the schema created."""
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'app.db')
+        SESSION_FILE_DIR = str(tmp_path / 'sessions')
+        ROOM_CACHE_TYPE = 'null'
+        CALENDAR_SYNC_INTERVAL = 0
+        LOG_LEVEL = 'WARNING'
+        LOG_REQUESTS = False
+    for key, value in overrides.items():
+        setattr(TestConfig, key, value)
+    app = create_app(TestConfig)
+    with app.app_context():
+        # Models live on the default bind; `db` keeps the bind keys of apps built earlier in the run
+        db.create_all(bind_key=None)
+    return app
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+@pytest.fixture
+def app(tmp_path):
+    app = build_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def two_companies(app):
+    """Companies A and B, each with an admin, an employee and a company-only room; returns their ids."""
+    with app.app_context():
+        ids = {}
+        for key in ('a', 'b'):
+            company = Company(name=f'Company {key.upper()}', domain=f'{key}.example.com')
+            db.session.add(company)
+            db.session.flush()
+            admin = User(email=f'admin@{key}.example.com', name=f'Admin {key}', role='admin', company_id=company.id)
+            employee = User(email=f'user@{key}.example.com', name=f'User {key}', role='employee',
+                            company_id=company.id)
+            room = Room(name=f'Room {key}', company_id=company.id, visibility_type='company')
+            db.session.add_all([admin, employee, room])
+            db.session.flush()
+            ids[key] = {'company': company.id, 'admin': admin.id, 'employee': employee.id, 'room': room.id}
+        db.session.commit()
+    return ids
+
+def register_tenant(app, key):
+    """Registers a company with a room and one booking; returns its client and room id."""
+    client = app.test_client()
+    response = client.post('/auth/register', json={
+        'email': f'admin@{key}.example.com', 'name': f'Admin {key}', 'password': 'password',
+        'company_name': f'Company {key}', 'company_domain': f'{key}.example.com'})
+    assert response.status_code in (200, 201), response.get_json()
+    response = client.post('/api/rooms', json={'name': f'Room {key}', 'capacity': 4})
+    room_id = response.get_json()['room']['id']
+    response = client.post('/api/bookings/new', json={
+        'title': f'Meeting {key}', 'room_id': room_id,
+        'start_time': '2026-11-03T09:00', 'end_time': '2026-11-03T10:00'})
+    assert response.status_code in (200, 201), response.get_json()
+    return client, room_id
+
+@pytest.fixture
+def sharded_app(tmp_path):
+    """An app with the main database and shards eu and us, each in tmp_path."""
+    app = build_app(tmp_path, DATABASE_SHARDS=f"eu=sqlite:///{tmp_path / 'eu.db'},us=sqlite:///{tmp_path / 'us.db'}")
+    with app.app_context():
+        sharding.create_all()
+    yield app
+    outbound_sync.queue.background = True
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def stub_server():
+    """A local HTTP server scripted by the test (see tests/stub_server.py)."""
+    server = StubServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,149 @@
+# tests/google_calendar_fake.py
+"""
+An in-memory Google Calendar API for tests, served through StubServer.
+
+It keeps one calendar's events and a change log, and implements what the
+app uses: events.list with pageToken paging, syncToken incremental lists
+(cancelled events included) and 410 fullSyncRequired for expired tokens,
+plus the multipart/mixed batch endpoint for inserts, patches and deletes.
+Tests change the calendar "upstream" with put() and cancel(), expire every
+sync token with expire_sync_tokens(), and make single batch parts fail
+with fail_next.
+"""
+
+import json
+import uuid
+from email.parser import BytesParser
+from urllib.parse import unquote
+
+API_PATH = '/calendar/v3'
+BATCH_PATH = '/batch/calendar/v3'
+
+class GoogleCalendarFake:
+    def __init__(self, calendar_id, page_size=2):
+        self.calendar_id = calendar_id
+        self.page_size = page_size
+        self.events = {}
+        self.version = 0          # bumped by every change
+        self.changed_at = {}      # event id -> version of its last change
+        self.valid_tokens = set()
+        self.fail_next = {}       # batch Content-ID -> (status, body) for the next batch
+        self.batches = []         # [(method, path, body), ...] per batch request
+
+    @property
+    def events_path(self):
+        return f"{API_PATH}/calendars/{self.calendar_id}/events"
+
+    def install(self, server):
+        """Serves this calendar from `server`; returns the API base URL."""
+        self.server = server
+        server.add('GET', self.events_path, self.list_events)
+        server.add('POST', BATCH_PATH, self.batch)
+        return f'{server.url}{API_PATH}'
+
+    # --- Upstream changes ---
+
+    def put(self, event_id, summary, start, end, visibility='default', status='confirmed'):
+        self.version += 1
+        self.events[event_id] = {
+            'kind': 'calendar#event',
+            'etag': f'"{self.version}"',
+            'id': event_id,
+            'status': status,
+            'summary': summary,
+            'start': {'dateTime': start, 'timeZone': 'UTC'},
+            'end': {'dateTime': end, 'timeZone': 'UTC'},
+            'visibility': visibility,
+            'organizer': {'email': 'owner@a.example.com', 'displayName': 'Calendar Owner'}
+        }
+        self.changed_at[event_id] = self.version
+        return self.events[event_id]
+
+    def cancel(self, event_id):
+        self.version += 1
+        self.events[event_id]['status'] = 'cancelled'
+        self.changed_at[event_id] = self.version
+
+    def expire_sync_tokens(self):
+        self.valid_tokens.clear()
+
+    # --- events.list ---
+
+    def _error(self, status, reason, message):
+        return status, {'error': {'code': status, 'message': message,
+                                  'errors': [{'domain': 'global', 'reason': reason, 'message': message}]}}
+
+    def list_events(self, request):
+        if request.headers.get('Authorization') != 'Bearer google-token':
+            return self._error(401, 'authError', 'Invalid Credentials')
+        sync_token = request.query.get('syncToken')
+        if sync_token is not None:
+            if sync_token not in self.valid_tokens:
+                return self._error(410, 'fullSyncRequired', 'Sync token is no longer valid, a full sync is required.')
+            since = int(sync_token.split('-')[1])
+            items = [self.events[event_id] for event_id, version in sorted(self.changed_at.items(), key=lambda i: i[1])
+                     if version > since]
+        else:
+            items = [event for event in self.events.values() if event['status'] != 'cancelled']
+
+        offset = int(request.query.get('pageToken') or 0)
+        page = items[offset:offset + self.page_size]
+        body = {'kind': 'calendar#events', 'summary': self.calendar_id, 'items': page}
+        if offset + self.page_size < len(items):
+            body['nextPageToken'] = str(offset + self.page_size)
+        else:
+            token = f'sync-{self.version}'
+            self.valid_tokens.add(token)
+            body['nextSyncToken'] = token
+        return 200, body
+
+    # --- batch ---
+
+    def _apply(self, method, path, body):
+        if not path.startswith(self.events_path):
+            return self._error(404, 'notFound', 'Not Found')
+        event_id = unquote(path[len(self.events_path):].lstrip('/'))
+        if method == 'POST':
+            event_id = uuid.uuid4().hex[:16]
+            return 200, self.put(event_id, body['summary'], body['start']['dateTime'], body['end']['dateTime'],
+                                 body.get('visibility', 'default'))
+        event = self.events.get(event_id)
+        if event is None or event['status'] == 'cancelled':
+            return self._error(410 if event else 404, 'deleted' if event else 'notFound',
+                               'Resource has been deleted' if event else 'Not Found')
+        if method == 'PATCH':
+            return 200, self.put(event_id, body.get('summary', event['summary']),
+                                 body.get('start', event['start'])['dateTime'],
+                                 body.get('end', event['end'])['dateTime'],
+                                 body.get('visibility', event['visibility']))
+        self.cancel(event_id)
+        return 204, None
+
+    def batch(self, request):
+        header = f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode()
+        message = BytesParser().parsebytes(header + request.body)
+        boundary = 'batch_fake_response'
+        parts = []
+        calls = []
+        for part in message.get_payload():
+            content_id = (part.get('Content-ID') or '').strip('<>')
+            raw = part.get_payload(decode=True) or part.get_payload().encode()
+            # The embedded request: request line and headers, a blank line, the body
+            head, _, body = raw.replace(b'\r\n', b'\n').partition(b'\n\n')
+            method, path = head.decode().split('\n')[0].split()[:2]
+            payload = json.loads(body) if body.strip() else None
+            calls.append((method, path, payload))
+            if content_id in self.fail_next:
+                status, response = self.fail_next.pop(content_id)
+            else:
+                status, response = self._apply(method, path, payload)
+            lines = [f'--{boundary}', 'Content-Type: application/http', f'Content-ID: <response-{content_id}>', '',
+                     f'HTTP/1.1 {status} {"OK" if status < 400 else "Error"}']
+            if response is not None:
+                lines += ['Content-Type: application/json; charset=UTF-8', '', json.dumps(response)]
+            else:
+                lines += ['', '']
+            parts.append('\r\n'.join(lines))
+        self.batches.append(calls)
+        return 200, '\r\n'.join(parts + [f'--{boundary}--', '']), {
+            'Content-Type': f'multipart/mixed; boundary={boundary}'}
@@ -0,0 +1,89 @@
+# tests/test_calendar_feed.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app import db
+from app.models import Booking, Room
+from app.services import aggregator, microsoft_calendar
+from conftest import login
+
+WINDOW = {'start': '2024-03-04T00:00:00', 'end': '2024-03-11T00:00:00'}
+
+def _connect_microsoft(app, monkeypatch, room_id):
+    app.config.update(MICROSOFT_CLIENT_ID='client', MICROSOFT_BOARDROOM_EMAIL='boardroom@a.example.com',
+                      MICROSOFT_CALENDAR_ID='calendar', MICROSOFT_SYNC_ROOM_ID=room_id)
+    monkeypatch.setattr(microsoft_calendar, 'cached_list_events', lambda start, end: [{
+        'id': 'graph-1',
+        'subject': 'Board meeting',
+        'start': {'dateTime': '2024-03-05T09:00:00'},
+        'end': {'dateTime': '2024-03-05T10:00:00'}
+    }])
+
+def _feed(app, user_id):
+    response = login(app.test_client(), user_id).get('/api/calendar/feed', query_string=WINDOW)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_external_calendar_only_shown_to_companies_that_see_its_room(app, two_companies, monkeypatch):
+    _connect_microsoft(app, monkeypatch, two_companies['a']['room'])
+
+    own = _feed(app, two_companies['a']['employee'])
+    assert 'microsoft' in own['sources']
+    assert [event['title'] for event in own['events']] == ['Board meeting']
+
+    other = _feed(app, two_companies['b']['employee'])
+    assert other['sources'] == ['local']
+    assert other['events'] == []
+
+def test_external_calendar_of_public_room_is_shared(app, two_companies, monkeypatch):
+    _connect_microsoft(app, monkeypatch, two_companies['a']['room'])
+    with app.app_context():
+        db.session.get(Room, two_companies['a']['room']).visibility_type = 'public'
+        db.session.commit()
+
+    other = _feed(app, two_companies['b']['employee'])
+    assert 'microsoft' in other['sources']
+    assert [event['title'] for event in other['events']] == ['Board meeting']
+
+def test_external_calendar_without_synced_room_is_hidden(app, two_companies, monkeypatch):
+    _connect_microsoft(app, monkeypatch, None)
+    assert _feed(app, two_companies['a']['employee'])['sources'] == ['local']
+
+def _book(app, ids):
+    with app.app_context():
+        db.session.add(Booking(title='Standup', room_id=ids['room'], user_id=ids['employee'], company_id=ids['company'],
+                               start_time=datetime(2024, 3, 5, 11), end_time=datetime(2024, 3, 5, 12)))
+        db.session.commit()
+
+def test_local_bookings_do_not_wait_behind_stuck_providers(app, two_companies, monkeypatch):
+    ids = two_companies['a']
+    _book(app, ids)
+    _connect_microsoft(app, monkeypatch, ids['room'])
+    app.config['CALENDAR_FEED_BUDGET'] = 0.2
+    release = threading.Event()
+    monkeypatch.setattr(microsoft_calendar, 'cached_list_events', lambda start, end: release.wait(5) and [])
+    # One pool thread, taken by the first request's provider call
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(aggregator, '_executor', executor)
+    try:
+        for _ in range(2):
+            feed = _feed(app, ids['employee'])
+            assert [event['title'] for event in feed['events']] == ['Standup']
+            assert feed['partial'] == ['microsoft']
+            assert feed['errors'] == {'microsoft': 'Timed out'}
+    finally:
+        release.set()
+        executor.shutdown()
+
+def test_provider_errors_are_logged_not_returned(app, two_companies, monkeypatch, caplog):
+    _connect_microsoft(app, monkeypatch, two_companies['a']['room'])
+
+    def fail(start, end):
+        raise RuntimeError('token=secret rejected')
+    monkeypatch.setattr(microsoft_calendar, 'cached_list_events', fail)
+
+    feed = _feed(app, two_companies['a']['employee'])
+    assert feed['errors'] == {'microsoft': 'Unavailable'}
+    assert 'secret' not in str(feed)
+    assert 'token=secret rejected' in caplog.text
@@ -0,0 +1,73 @@
+# tests/test_event_cache.py
+
+import threading
+from app.services import event_cache, microsoft_calendar
+from conftest import login
+
+KEY = ('microsoft', 'calendar', None, None)
+
+def test_default_feed_window_reuses_the_cache(app, two_companies, monkeypatch):
+    app.config.update(MICROSOFT_CLIENT_ID='client', MICROSOFT_BOARDROOM_EMAIL='boardroom@a.example.com',
+                      MICROSOFT_CALENDAR_ID='calendar', MICROSOFT_SYNC_ROOM_ID=two_companies['a']['room'])
+    windows = []
+    monkeypatch.setattr(microsoft_calendar, 'list_events', lambda start, end: windows.append((start, end)) or [])
+    event_cache.cache.invalidate()
+
+    client = login(app.test_client(), two_companies['a']['employee'])
+    for _ in range(3):
+        response = client.get('/api/calendar/feed')
+        assert response.status_code == 200
+        assert response.get_json()['partial'] == []
+    assert len(windows) == 1
+    start, end = windows[0]
+    assert (start.hour, start.minute, start.microsecond) == (0, 0, 0)
+    assert (end - start).days == 42
+
+def test_explicit_window_is_widened_to_whole_hours(app, two_companies, monkeypatch):
+    app.config.update(MICROSOFT_CLIENT_ID='client', MICROSOFT_BOARDROOM_EMAIL='boardroom@a.example.com',
+                      MICROSOFT_CALENDAR_ID='calendar', MICROSOFT_SYNC_ROOM_ID=two_companies['a']['room'])
+    windows = []
+    monkeypatch.setattr(microsoft_calendar, 'list_events', lambda start, end: windows.append((start, end)) or [])
+    event_cache.cache.invalidate()
+
+    client = login(app.test_client(), two_companies['a']['employee'])
+    client.get('/api/calendar/feed', query_string={'start': '2024-03-04T09:15:00.123', 'end': '2024-03-04T17:30:00'})
+    assert [(start.isoformat(), end.isoformat()) for start, end in windows] == [
+        ('2024-03-04T09:00:00', '2024-03-04T18:00:00')]
+
+def test_invalidate_fences_a_load_in_flight(app):
+    cache = event_cache.EventCache()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return ['before the write']
+
+    def leader():
+        with app.app_context():
+            results.append(cache.get(KEY, slow_loader))
+
+    with app.app_context():
+        thread = threading.Thread(target=leader)
+        thread.start()
+        assert started.wait(5)
+        # A write lands while the old load is still running
+        cache.invalidate('microsoft')
+        assert cache.get(KEY, lambda: ['after the write']) == ['after the write']
+        release.set()
+        thread.join(5)
+
+        # The old load still answers its own caller but is not stored over the new one
+        assert results == [['before the write']]
+        assert cache.get(KEY, lambda: ['reloaded']) == ['after the write']
+
+def test_invalidating_another_provider_keeps_the_load(app):
+    cache = event_cache.EventCache()
+    with app.app_context():
+        cache.get(KEY, lambda: ['cached'])
+        cache.invalidate('google')
+        assert cache.get(KEY, lambda: ['reloaded']) == ['cached']
+        cache.invalidate()
+        assert cache.get(KEY, lambda: ['reloaded']) == ['reloaded']
@@ -0,0 +1,121 @@
+# tests/test_google_calendar.py
+
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Booking, CalendarCredential, CalendarSyncState
+from app.services import calendar_sync, google_calendar, resilience
+from google_calendar_fake import GoogleCalendarFake
+
+@pytest.fixture
+def google(app, two_companies, stub_server):
+    """A fake Google calendar synced into company A's room, with a connected account."""
+    fake = GoogleCalendarFake('team-cal')
+    app.config.update(GOOGLE_CALENDAR_API_URL=fake.install(stub_server), GOOGLE_CALENDAR_ID='team-cal',
+                      GOOGLE_SYNC_ROOM_ID=two_companies['a']['room'], CALENDAR_MAX_RETRIES=0)
+    fake.put('event-a', 'Design review', '2026-11-03T09:00:00Z', '2026-11-03T10:00:00Z')
+    fake.put('event-b', 'One to one', '2026-11-03T11:00:00Z', '2026-11-03T11:30:00Z', visibility='private')
+    fake.put('event-c', 'Offsite prep', '2026-11-04T14:00:00+01:00', '2026-11-04T16:00:00+01:00')
+    resilience._breakers.clear()
+    with app.app_context():
+        record = CalendarCredential(provider='google', user_id=two_companies['a']['admin'],
+                                    company_id=two_companies['a']['company'])
+        record.set_credentials({'token': 'google-token', 'refresh_token': 'refresh', 'client_id': 'client',
+                                'client_secret': 'secret', 'token_uri': 'https://oauth2.googleapis.com/token',
+                                'scopes': google_calendar.SCOPES,
+                                'expiry': (datetime.utcnow() + timedelta(hours=1)).isoformat()})
+        db.session.add(record)
+        db.session.commit()
+        yield fake
+
+def _bookings():
+    return {booking.google_calendar_event_id: (booking.title, booking.start_time, booking.is_public)
+            for booking in Booking.query.all()}
+
+def _list_queries(fake):
+    return [request.query for request in fake.server.requests if request.path == fake.events_path]
+
+def test_full_sync_pages_through_and_stores_the_sync_token(google):
+    assert calendar_sync.sync_google_calendar() == {'created': 3, 'updated': 0, 'deleted': 0}
+    assert _bookings() == {
+        'event-a': ('Design review', datetime(2026, 11, 3, 9), True),
+        'event-b': ('One to one', datetime(2026, 11, 3, 11), False),
+        'event-c': ('Offsite prep', datetime(2026, 11, 4, 13), True)
+    }
+    first, second = _list_queries(google)
+    assert 'syncToken' not in first and first['singleEvents'] == 'true'
+    assert second['pageToken'] == '2'
+    assert CalendarSyncState.query.filter_by(provider='google').one().sync_cursor == 'sync-3'
+
+def test_sync_token_only_fetches_changes(google):
+    calendar_sync.sync_google_calendar()
+    google.put('event-a', 'Design review (moved)', '2026-11-03T15:00:00Z', '2026-11-03T16:00:00Z')
+    google.cancel('event-b')
+    google.put('event-d', 'Hiring panel', '2026-11-05T09:00:00Z', '2026-11-05T12:00:00Z')
+
+    assert calendar_sync.sync_google_calendar() == {'created': 1, 'updated': 1, 'deleted': 1}
+    assert _list_queries(google)[2]['syncToken'] == 'sync-3'
+    assert _bookings() == {
+        'event-a': ('Design review (moved)', datetime(2026, 11, 3, 15), True),
+        'event-c': ('Offsite prep', datetime(2026, 11, 4, 13), True),
+        'event-d': ('Hiring panel', datetime(2026, 11, 5, 9), True)
+    }
+    assert CalendarSyncState.query.filter_by(provider='google').one().sync_cursor == 'sync-6'
+
+def test_expired_sync_token_triggers_a_full_resync(google):
+    calendar_sync.sync_google_calendar()
+    google.put('event-a', 'Design review (moved)', '2026-11-03T15:00:00Z', '2026-11-03T16:00:00Z')
+    google.expire_sync_tokens()
+
+    assert calendar_sync.sync_google_calendar() == {'created': 0, 'updated': 3, 'deleted': 0}
+    expired, *resync = _list_queries(google)[2:]
+    assert expired['syncToken'] == 'sync-3'
+    assert [query.get('syncToken') for query in resync] == [None, None]
+    assert _bookings()['event-a'][0] == 'Design review (moved)'
+    state = CalendarSyncState.query.filter_by(provider='google').one()
+    assert (state.sync_cursor, state.last_error) == ('sync-4', None)
+
+def test_batch_write_sends_one_multipart_request_and_reads_each_part(google):
+    record = CalendarCredential.query.one()
+    google.fail_next['3'] = (403, {'error': {'code': 403, 'message': 'Rate Limit Exceeded',
+                                             'errors': [{'reason': 'rateLimitExceeded'}]}})
+    event = {'title': 'Launch', 'start_time': datetime(2026, 11, 6, 9), 'end_time': datetime(2026, 11, 6, 10),
+             'is_public': True}
+    results = google_calendar.batch_write(record, 'team-cal', [
+        {'action': 'create', 'event_id': None, 'event': event},
+        {'action': 'update', 'event_id': 'event-a', 'event': dict(event, title='Design review v2')},
+        {'action': 'delete', 'event_id': 'event-b'},
+        {'action': 'update', 'event_id': 'event-c', 'event': event},
+        {'action': 'delete', 'event_id': 'missing'}
+    ])
+
+    assert len(google.batches) == 1
+    assert [method for method, _, _ in google.batches[0]] == ['POST', 'PATCH', 'DELETE', 'PATCH', 'DELETE']
+    assert [result['status'] for result in results] == [200, 200, 204, 403, 404]
+    created = results[0]['event_id']
+    assert google.events[created]['summary'] == 'Launch'
+    assert google.events['event-a']['summary'] == 'Design review v2'
+    assert google.events['event-b']['status'] == 'cancelled'
+    assert results[3]['error'] == 'Rate Limit Exceeded'
+    assert google.events['event-c']['summary'] == 'Offsite prep'
+    assert results[4]['event_id'] == 'missing' and results[4]['error'] == 'Not Found'
+
+def test_credentials_are_encrypted_at_rest(google, app):
+    raw = db.session.execute(db.text('SELECT credentials FROM calendar_credential')).scalar_one()
+    assert 'refresh' not in raw and 'secret' not in raw
+    assert CalendarCredential.query.one().get_credentials()['refresh_token'] == 'refresh'
+
+def test_credentials_survive_key_rotation_but_not_a_lost_key(google, app, caplog):
+    from cryptography.fernet import Fernet
+    old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    app.config['CREDENTIALS_KEY'] = old_key
+    record = CalendarCredential.query.one()
+    record.set_credentials({'refresh_token': 'rotated'})
+    db.session.commit()
+
+    app.config['CREDENTIALS_KEY'] = f'{new_key},{old_key}'
+    assert record.get_credentials() == {'refresh_token': 'rotated'}
+
+    app.config['CREDENTIALS_KEY'] = new_key
+    assert record.get_credentials() == {}
+    assert 'Unreadable google credentials' in caplog.text
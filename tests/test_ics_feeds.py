@@ -0,0 +1,49 @@
+# tests/test_ics_feeds.py
+
+from app import db
+from app.models import Room
+from conftest import login
+
+def _links(app, user_id):
+    response = login(app.test_client(), user_id).get('/api/calendar/feed-links')
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_feed_links_list_the_rooms_visible_to_the_company(app, two_companies):
+    with app.app_context():
+        db.session.get(Room, two_companies['b']['room']).visibility_type = 'public'
+        db.session.commit()
+
+    links = _links(app, two_companies['a']['employee'])
+    assert [room['name'] for room in links['rooms']] == ['Room a', 'Room b']
+    links = _links(app, two_companies['b']['employee'])
+    assert [room['name'] for room in links['rooms']] == ['Room b']
+
+def _fetch(client, url):
+    return client.get(url.replace('http://localhost', ''))
+
+def test_rotating_a_feed_secret_revokes_the_old_url(app, two_companies):
+    ids = two_companies['a']
+    client = login(app.test_client(), ids['admin'])
+    links = _links(app, ids['admin'])
+    room_url = links['rooms'][0]['url']
+    assert _fetch(client, links['company']).status_code == 200
+    assert _fetch(client, room_url).status_code == 200
+
+    response = client.post('/api/calendar/feed-links/company/rotate')
+    assert response.status_code == 200
+    assert _fetch(client, links['company']).status_code == 404
+    assert _fetch(client, response.get_json()['url']).status_code == 200
+    # The room feed has its own secret
+    assert _fetch(client, room_url).status_code == 200
+
+    response = client.post(f"/api/calendar/feed-links/rooms/{ids['room']}/rotate")
+    assert response.status_code == 200
+    assert _fetch(client, room_url).status_code == 404
+    assert _fetch(client, response.get_json()['url']).status_code == 200
+
+def test_only_the_owning_company_can_rotate_a_room_feed(app, two_companies):
+    employee = login(app.test_client(), two_companies['a']['employee'])
+    assert employee.post('/api/calendar/feed-links/company/rotate').status_code == 403
+    other_admin = login(app.test_client(), two_companies['b']['admin'])
+    assert other_admin.post(f"/api/calendar/feed-links/rooms/{two_companies['a']['room']}/rotate").status_code == 404
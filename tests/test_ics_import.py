@@ -0,0 +1,78 @@
+# tests/test_ics_import.py
+
+from datetime import datetime, timedelta
+from app import db, ical
+from app.models import Booking
+from app.services import ics_import
+
+def _event(rrule, dtstart='20150105T090000Z', dtend='20150105T100000Z'):
+    return {'DTSTART': [({}, dtstart)], 'DTEND': [({}, dtend)], 'RRULE': [({}, rrule)]}
+
+def _expand(event, **kwargs):
+    """(occurrences, return value) of ical.expand_event."""
+    generator = ical.expand_event(event, **kwargs)
+    occurrences = []
+    while True:
+        try:
+            occurrences.append(next(generator))
+        except StopIteration as stop:
+            return occurrences, stop.value
+
+def test_bounded_rule_beyond_the_horizon_is_expanded():
+    horizon = datetime(2025, 1, 1)
+    occurrences, (before, stopped) = _expand(
+        _event('FREQ=WEEKLY;COUNT=3', '20270104T090000Z', '20270104T100000Z'), horizon=horizon)
+    assert [start for start, _ in occurrences] == [datetime(2027, 1, 4, 9), datetime(2027, 1, 11, 9),
+                                                   datetime(2027, 1, 18, 9)]
+    assert (before, stopped) == (0, None)
+
+def test_open_ended_rule_stops_at_the_horizon_and_says_so():
+    occurrences, (_, stopped) = _expand(_event('FREQ=DAILY', '20250101T090000Z', '20250101T100000Z'),
+                                        horizon=datetime(2025, 1, 10))
+    assert len(occurrences) == 9
+    assert stopped == 'horizon'
+
+def test_old_daily_rule_is_expanded_from_the_window_not_dtstart():
+    since, horizon = datetime(2025, 1, 1), datetime(2025, 3, 1)
+    occurrences, (before, stopped) = _expand(_event('FREQ=DAILY'), since=since, horizon=horizon,
+                                             max_occurrences=1000)
+    assert occurrences[0][0] == datetime(2025, 1, 1, 9)
+    assert occurrences[-1][0] == datetime(2025, 2, 28, 9)
+    assert before == (datetime(2025, 1, 1) - datetime(2015, 1, 5)).days
+    assert stopped == 'horizon'
+
+def test_count_includes_occurrences_before_the_window():
+    occurrences, (before, stopped) = _expand(_event('FREQ=DAILY;COUNT=5'), since=datetime(2015, 1, 8))
+    assert [start.day for start, _ in occurrences] == [8, 9]
+    assert (before, stopped) == (3, None)
+
+def test_occurrence_limit_is_reported():
+    occurrences, (_, stopped) = _expand(_event('FREQ=DAILY;UNTIL=20991231T000000Z'), max_occurrences=10)
+    assert len(occurrences) == 10
+    assert stopped == 'limit'
+
+def _ics(*events):
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+    for uid, dtstart, dtend, rrule in events:
+        lines += ['BEGIN:VEVENT', f'UID:{uid}', f'SUMMARY:{uid}', 'LOCATION:Room a',
+                  f'DTSTART:{dtstart}', f'DTEND:{dtend}', f'RRULE:{rrule}', 'END:VEVENT']
+    lines.append('END:VCALENDAR')
+    return [line + '\r\n' for line in lines]
+
+def test_import_reports_truncated_recurrences(app, two_companies):
+    app.config.update(ICS_IMPORT_HORIZON_DAYS=30, ICS_IMPORT_PAST_DAYS=7, ICS_IMPORT_MAX_OCCURRENCES=1000)
+    far = (datetime.utcnow() + timedelta(days=400)).strftime('%Y%m%d')
+    lines = _ics(('standup', '20150105T090000Z', '20150105T091500Z', 'FREQ=DAILY'),
+                 ('offsite', f'{far}T090000Z', f'{far}T170000Z', 'FREQ=WEEKLY;COUNT=3'))
+    with app.app_context():
+        report = ics_import.import_ics(lines, two_companies['a']['company'])
+        titles = [title for (title,) in db.session.query(Booking.title)]
+
+    assert titles.count('offsite') == 3
+    # The last week up to 30 days ahead, not 2015-2017
+    assert 36 <= titles.count('standup') <= 39
+    assert report['truncated'] == 1
+    assert report['before_window'] > 3000
+    assert {issue['reason'] for issue in report['issues'] if issue['uid'] == 'standup'} == {
+        f"{report['before_window']} occurrences before the import window left out",
+        'recurrence stopped at the import horizon'}
@@ -0,0 +1,12 @@
+# tests/test_import_time.py
+
+import os
+from benchmarks import import_time
+
+# Slow or shared CI machines can raise it
+BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', import_time.DEFAULT_BUDGET_MS))
+
+def test_startup_stays_within_the_import_budget():
+    modules = import_time.measure_imports()
+    assert import_time.lazy_imports(modules) == []
+    assert import_time.total_ms(modules) <= BUDGET_MS
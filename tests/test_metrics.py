@@ -0,0 +1,89 @@
+# tests/test_metrics.py
+
+import os
+import time
+import pytest
+from app import db, metrics
+from conftest import build_app
+
+@pytest.fixture
+def app(tmp_path):
+    app = build_app(tmp_path, METRICS_TOKEN='scrape-token', METRICS_DIR=str(tmp_path / 'metrics'),
+                    METRICS_FLUSH_SECONDS=0.01)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+def _exited_pid():
+    pid = 4_000_000
+    while metrics._alive(pid):
+        pid += 1
+    return pid
+
+def _scrape(client, token='scrape-token'):
+    return client.get('/metrics', headers={'Authorization': f'Bearer {token}'} if token else {})
+
+def _value(body, series):
+    for line in body.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0
+
+def test_metrics_need_the_token_outside_debug(app):
+    client = app.test_client()
+    assert _scrape(client).status_code == 200
+    assert _scrape(client, token='wrong').status_code == 401
+
+    app.config['METRICS_TOKEN'] = None
+    assert _scrape(client, token=None).status_code == 403
+    app.debug = True
+    try:
+        assert _scrape(client, token=None).status_code == 200
+    finally:
+        app.debug = False
+
+def test_scrapes_sum_counters_across_workers(app, tmp_path):
+    client = app.test_client()
+    series = 'boardroom_http_requests_total{endpoint="metrics",method="GET",status="200"}'
+    own = _value(_scrape(client).get_data(as_text=True), series) + 1
+
+    worker = _exited_pid()
+    with open(tmp_path / 'metrics' / f'{worker}.prom', 'w') as f:
+        f.write('# TYPE boardroom_http_requests_total counter\n'
+                f'{series} 40\n'
+                '# TYPE boardroom_calendar_cache_entries gauge\n'
+                'boardroom_calendar_cache_entries 7\n')
+
+    body = _scrape(client).get_data(as_text=True)
+    assert _value(body, series) == own + 40
+    # Gauges are per live worker; the exited one's are dropped
+    assert f'boardroom_calendar_cache_entries{{pid="{os.getpid()}"}}' in body
+    assert f'pid="{worker}"' not in body
+
+def test_workers_write_their_snapshot_after_requests(app, tmp_path):
+    app.test_client().get('/api/current-user')
+    path = tmp_path / 'metrics' / f'{os.getpid()}.prom'
+    deadline = time.monotonic() + 2
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 'boardroom_http_requests_total{endpoint="main.get_current_user"' in path.read_text()
+
+def test_merge_sums_histograms_and_labels_gauges():
+    worker = _exited_pid()
+    snapshot = ('# HELP boardroom_http_request_duration_seconds Request latency.\n'
+                '# TYPE boardroom_http_request_duration_seconds histogram\n'
+                'boardroom_http_request_duration_seconds_bucket{endpoint="x",le="+Inf"} 2\n'
+                'boardroom_http_request_duration_seconds_sum{endpoint="x"} 0.5\n'
+                '# TYPE boardroom_room_catalog_entries gauge\n'
+                'boardroom_room_catalog_entries{shard="a"} 3\n')
+    merged = metrics.merge({os.getpid(): snapshot, worker: snapshot})
+    assert merged.splitlines() == [
+        '# HELP boardroom_http_request_duration_seconds Request latency.',
+        '# TYPE boardroom_http_request_duration_seconds histogram',
+        'boardroom_http_request_duration_seconds_bucket{endpoint="x",le="+Inf"} 4',
+        'boardroom_http_request_duration_seconds_sum{endpoint="x"} 1',
+        '# TYPE boardroom_room_catalog_entries gauge',
+        f'boardroom_room_catalog_entries{{shard="a",pid="{os.getpid()}"}} 3'
+    ]
@@ -0,0 +1,82 @@
+# tests/test_microsoft_calendar.py
+
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.models import Booking, CalendarSyncState
+from app.services import calendar_sync, microsoft_calendar, resilience
+
+@pytest.fixture
+def graph(app, two_companies, stub_server, monkeypatch):
+    """Graph replayed from tests/recordings/graph_calendar.json, synced into company A's room."""
+    stub_server.replay('graph_calendar.json')
+    app.config.update(MICROSOFT_GRAPH_URL=stub_server.url, MICROSOFT_BOARDROOM_EMAIL='boardroom@a.example.com',
+                      MICROSOFT_CALENDAR_ID='cal-1', MICROSOFT_SYNC_ROOM_ID=two_companies['a']['room'],
+                      CALENDAR_MAX_RETRIES=0)
+    monkeypatch.setattr(microsoft_calendar, 'app_cache', {'access_token': 'app-token', 'expires_at': time.time() + 3600})
+    resilience._breakers.clear()
+    with app.app_context():
+        yield stub_server
+
+def _bookings():
+    return {booking.microsoft_calendar_event_id: (booking.title, booking.start_time, booking.is_public)
+            for booking in Booking.query.all()}
+
+def _cursor():
+    return CalendarSyncState.query.filter_by(provider='microsoft', calendar_id='cal-1').one().sync_cursor
+
+def _delta_queries(server):
+    return [request.query for request in server.requests if request.path.endswith('/calendarView/delta')]
+
+def test_first_sync_follows_next_link_and_stores_the_delta_link(graph):
+    assert calendar_sync.sync_microsoft_calendar() == {'created': 3, 'updated': 0, 'deleted': 0}
+    assert _bookings() == {
+        'AAMkAGI2-event-a': ('Board meeting', datetime(2026, 11, 3, 9), True),
+        'AAMkAGI2-event-b': ('Salary review', datetime(2026, 11, 4, 13, 30), False),
+        'AAMkAGI2-event-c': ('Quarterly planning', datetime(2026, 11, 5, 8), True)
+    }
+    assert _cursor().endswith('$deltatoken=token-1')
+    first, second = _delta_queries(graph)
+    assert 'startDateTime' in first and 'endDateTime' in first
+    assert second == {'$skiptoken': 'page-2'}
+    assert graph.requests[0].headers['Authorization'] == 'Bearer app-token'
+
+def test_delta_applies_updates_removals_and_cancellations(graph):
+    calendar_sync.sync_microsoft_calendar()
+    assert calendar_sync.sync_microsoft_calendar() == {'created': 0, 'updated': 1, 'deleted': 2}
+    assert _bookings() == {'AAMkAGI2-event-a': ('Board meeting (moved)', datetime(2026, 11, 3, 11), True)}
+    assert _delta_queries(graph)[-1] == {'$deltatoken': 'token-1'}
+    assert _cursor().endswith('$deltatoken=token-2')
+
+def test_expired_delta_link_falls_back_to_a_full_resync(graph):
+    calendar_sync.sync_microsoft_calendar()
+    calendar_sync.sync_microsoft_calendar()
+    # Graph answers token-2 with 410 syncStateNotFound
+    assert calendar_sync.sync_microsoft_calendar() == {'created': 2, 'updated': 1, 'deleted': 0}
+
+    assert [query.get('$deltatoken') or query.get('$skiptoken') for query in _delta_queries(graph)[-3:]] == [
+        'token-2', None, 'page-2']
+    assert _bookings() == {
+        'AAMkAGI2-event-a': ('Board meeting', datetime(2026, 11, 3, 9), True),
+        'AAMkAGI2-event-b': ('Salary review', datetime(2026, 11, 4, 13, 30), False),
+        'AAMkAGI2-event-c': ('Quarterly planning', datetime(2026, 11, 5, 8), True)
+    }
+    state = CalendarSyncState.query.filter_by(provider='microsoft').one()
+    assert state.sync_cursor.endswith('$deltatoken=token-1')
+    assert state.last_error is None
+
+def test_list_events_reads_every_calendar_view_page(graph):
+    events = microsoft_calendar.list_events(datetime(2026, 11, 2), datetime(2026, 11, 9))
+    assert [event['id'] for event in events] == ['AAMkAGI2-event-a', 'AAMkAGI2-event-c']
+    first, second = [request.query for request in graph.requests]
+    assert first['startDateTime'] == '2026-11-02T00:00:00Z'
+    assert second['$skip'] == '1'
+
+def test_full_sync_window_comes_from_config(graph, app):
+    app.config.update(MICROSOFT_SYNC_LOOKBACK_DAYS=7, MICROSOFT_SYNC_WINDOW_DAYS=14)
+    calendar_sync.sync_microsoft_calendar()
+    first = _delta_queries(graph)[0]
+    start = datetime.strptime(first['startDateTime'], '%Y-%m-%dT%H:%M:%SZ')
+    end = datetime.strptime(first['endDateTime'], '%Y-%m-%dT%H:%M:%SZ')
+    assert end - start == timedelta(days=21)
+    assert abs(datetime.utcnow() - timedelta(days=7) - start) < timedelta(minutes=1)
@@ -0,0 +1,70 @@
+# tests/test_nplusone.py
+
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Booking, Room, User
+from app.nplusone import NPlusOneError, QueryBudgetExceeded
+from conftest import build_app, login
+
+@pytest.fixture
+def app(tmp_path):
+    """An app that fails requests repeating a statement more than twice, with a route that does."""
+    app = build_app(tmp_path, NPLUSONE_THRESHOLD=2, NPLUSONE_ACTION='raise')
+
+    @app.route('/test/rooms-one-by-one')
+    def rooms_one_by_one():
+        return {'rooms': [Room.query.filter_by(id=room_id).count() for room_id in range(1, 5)]}
+
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def busy_company(app, two_companies):
+    """Company A with five more rooms, five more users and a booking by each."""
+    ids = two_companies['a']
+    start = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        for index in range(5):
+            room = Room(name=f'Extra room {index}', company_id=ids['company'], visibility_type='company')
+            user = User(email=f'user{index}@a.example.com', name=f'User {index}', role='employee',
+                        company_id=ids['company'])
+            db.session.add_all([room, user])
+            db.session.flush()
+            db.session.add(Booking(title=f'Meeting {index}', room_id=room.id, user_id=user.id,
+                                   company_id=ids['company'], start_time=start + timedelta(days=index),
+                                   end_time=start + timedelta(days=index, hours=1)))
+        db.session.commit()
+    return ids
+
+def test_repeated_statements_fail_the_request(app, two_companies):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    with pytest.raises(NPlusOneError, match=r'GET /test/rooms-one-by-one: 4x'):
+        client.get('/test/rooms-one-by-one')
+
+def test_detection_follows_the_testing_flag_per_request(app, two_companies):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    app.testing = False
+    try:
+        assert client.get('/test/rooms-one-by-one').status_code == 200
+    finally:
+        app.testing = True
+    with pytest.raises(NPlusOneError):
+        client.get('/test/rooms-one-by-one')
+
+def test_query_budget_fails_a_block_over_budget(app, two_companies, query_budget):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    with pytest.raises(QueryBudgetExceeded, match='budget is 1'):
+        with query_budget(max_queries=1):
+            client.get('/api/rooms/search')
+
+@pytest.mark.parametrize('path', ['/api/bookings', '/api/calendar/feed', '/api/rooms', '/api/rooms/search',
+                                  '/api/users', '/api/users?page=1', '/api/company/stats'])
+def test_list_endpoints_do_not_query_per_row(app, busy_company, query_budget, path):
+    client = login(app.test_client(), busy_company['admin'])
+    with query_budget(max_queries=15, max_repeats=1):
+        response = client.get(path)
+    assert response.status_code == 200
@@ -0,0 +1,80 @@
+# tests/test_outbound_sync.py
+
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Booking, BookingSyncState
+from app.services import microsoft_calendar, outbound_sync
+from conftest import login
+
+@pytest.fixture
+def synced_room(app, two_companies, monkeypatch):
+    """Company A's room synced to a Microsoft calendar; Graph writes are recorded, not sent."""
+    app.config.update(MICROSOFT_CALENDAR_ID='room@example.com', MICROSOFT_SYNC_ROOM_ID=two_companies['a']['room'])
+    sent = []
+
+    def batch_write(operations):
+        sent.append([(operation['action'], operation['event_id']) for operation in operations])
+        return [{'status': 201, 'event_id': 'graph-1', 'error': None, 'retry_after': None} for _ in operations]
+    monkeypatch.setattr(microsoft_calendar, 'batch_write', batch_write)
+    outbound_sync.queue.background = False
+    with outbound_sync.queue._cond:
+        outbound_sync.queue._pending.clear()
+    yield sent
+    outbound_sync.queue.background = True
+
+def _book(app, two_companies):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    response = client.post('/api/bookings/new', json={
+        'title': 'Review', 'room_id': two_companies['a']['room'],
+        'start_time': '2026-11-03T09:00', 'end_time': '2026-11-03T10:00'})
+    assert response.status_code in (200, 201)
+    return client
+
+def _states(app):
+    with app.app_context():
+        return [(state.provider, state.status) for state in BookingSyncState.query.all()]
+
+def test_write_is_persisted_as_pending_before_it_is_queued(app, two_companies, synced_room):
+    _book(app, two_companies)
+    assert len(outbound_sync.queue) == 1
+    assert _states(app) == [('microsoft', 'pending')]
+
+    with app.app_context():
+        outbound_sync.queue.drain()
+    assert synced_room == [[('create', None)]]
+    assert _states(app) == [('microsoft', 'synced')]
+
+def test_retry_failed_resends_stale_pending_writes(app, two_companies, synced_room):
+    _book(app, two_companies)
+    # The process died before sending it
+    with outbound_sync.queue._cond:
+        outbound_sync.queue._pending.clear()
+
+    with app.app_context():
+        assert outbound_sync.retry_failed() == 0  # still fresh: a live worker may send it
+        BookingSyncState.query.update({'updated_at': datetime.utcnow() - timedelta(hours=1)})
+        db.session.commit()
+        assert outbound_sync.retry_failed() == 1
+        outbound_sync.queue.drain()
+        booking = Booking.query.one()
+        assert booking.microsoft_calendar_event_id == 'graph-1'
+    assert synced_room == [[('create', None)]]
+    assert _states(app) == [('microsoft', 'synced')]
+
+def test_retry_failed_removes_stale_pending_delete(app, two_companies, synced_room):
+    client = _book(app, two_companies)
+    with app.app_context():
+        outbound_sync.queue.drain()
+        booking_id = Booking.query.one().id
+    assert client.post(f'/api/bookings/{booking_id}/delete').status_code == 200
+    with outbound_sync.queue._cond:
+        outbound_sync.queue._pending.clear()
+
+    with app.app_context():
+        BookingSyncState.query.update({'updated_at': datetime.utcnow() - timedelta(hours=1)})
+        db.session.commit()
+        assert outbound_sync.retry_failed() == 1
+        outbound_sync.queue.drain()
+    assert synced_room[-1] == [('delete', 'graph-1')]
+    assert _states(app) == [('microsoft', 'synced')]
@@ -0,0 +1,10 @@
+# tests/test_query_plans.py
+
+from benchmarks import seed as seeding
+from benchmarks.query_plans import explain, full_scans, hot_queries
+
+def test_hot_queries_use_an_index(app):
+    with app.app_context():
+        seeding.seed(200)
+        scans = {name: full_scans(explain(statement), table) for name, table, statement in hot_queries()}
+    assert {name: steps for name, steps in scans.items() if steps} == {}
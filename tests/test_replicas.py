@@ -0,0 +1,92 @@
+# tests/test_replicas.py
+
+import sqlite3
+import pytest
+from app import database, db
+from app.models import Room
+from conftest import build_app, login
+
+@pytest.fixture
+def app(tmp_path):
+    """The app with a primary (app.db) and one replica (replica.db)."""
+    app = build_app(tmp_path, DATABASE_REPLICA_URLS=f"sqlite:///{tmp_path / 'replica.db'}",
+                    REPLICA_STICKY_SECONDS=5)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def replica(app, two_companies, tmp_path):
+    """
+    Copies the primary to the replica, then renames company A's room on the
+    replica only, so a response shows which database it was read from.
+    Returns a function running SQL on (primary|replica).
+    """
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    with sqlite3.connect(tmp_path / 'app.db') as source, sqlite3.connect(tmp_path / 'replica.db') as target:
+        source.backup(target)
+        target.execute("UPDATE room SET name = 'Room a (replica)' WHERE id = ?", (two_companies['a']['room'],))
+
+    def query(name, sql):
+        with sqlite3.connect(tmp_path / f'{name}.db') as connection:
+            return connection.execute(sql).fetchall()
+    return query
+
+def _room_names(client):
+    response = client.get('/api/rooms/search')
+    assert response.status_code == 200
+    return [room['name'] for room in response.get_json()['rooms']]
+
+def test_reads_go_to_the_replica(app, two_companies, replica):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    assert _room_names(client) == ['Room a (replica)']
+
+def test_writes_go_to_the_primary(app, two_companies, replica):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    response = client.post('/api/bookings/new', json={
+        'title': 'Planning', 'room_id': two_companies['a']['room'],
+        'start_time': '2026-11-03T09:00', 'end_time': '2026-11-03T10:00'})
+    assert response.status_code in (200, 201)
+    assert replica('app', 'SELECT title FROM booking') == [('Planning',)]
+    assert replica('replica', 'SELECT title FROM booking') == []
+
+def test_reads_after_a_write_go_to_the_primary(app, two_companies, replica):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    client.post('/api/bookings/new', json={
+        'title': 'Planning', 'room_id': two_companies['a']['room'],
+        'start_time': '2026-11-03T09:00', 'end_time': '2026-11-03T10:00'})
+    # Within REPLICA_STICKY_SECONDS this user reads their own write
+    assert [booking['title'] for booking in client.get('/api/bookings').get_json()] == ['Planning']
+    assert _room_names(client) == ['Room a']
+
+    # Other users still read the (lagging) replica
+    other = login(app.test_client(), two_companies['a']['employee'])
+    assert other.get('/api/bookings').get_json() == []
+
+    with client.session_transaction() as session:
+        session['_db_primary_until'] = 0
+    assert client.get('/api/bookings').get_json() == []
+
+def test_reads_in_the_same_session_after_a_flush_stay_on_the_primary(app, two_companies, replica):
+    with app.test_request_context('/api/rooms', method='GET'):
+        assert db.session.get(Room, two_companies['a']['room']).name == 'Room a (replica)'
+        db.session.add(Room(name='New room', company_id=two_companies['a']['company']))
+        db.session.flush()
+        names = {room.name for room in Room.query.filter_by(company_id=two_companies['a']['company'])}
+        assert names == {'Room a', 'New room'}
+        db.session.rollback()
+
+def test_use_primary_pins_the_rest_of_the_request(app, two_companies, replica):
+    with app.test_request_context('/api/rooms', method='GET'):
+        assert db.session.scalar(db.select(Room.name).filter_by(id=two_companies['a']['room'])) == 'Room a (replica)'
+        database.use_primary()
+        assert db.session.scalar(db.select(Room.name).filter_by(id=two_companies['a']['room'])) == 'Room a'
+        assert db.session.scalar(db.select(Room.name).filter_by(id=two_companies['b']['room'])) == 'Room b'
+
+    # /api/rooms builds its cached catalog on the primary
+    client = login(app.test_client(), two_companies['a']['admin'])
+    assert [room['name'] for room in client.get('/api/rooms').get_json()['rooms']] == ['Room a']
@@ -0,0 +1,105 @@
+# tests/test_resilience.py
+
+import pytest
+import requests
+from app.services import resilience
+
+OK = (200, {'value': ['event']})
+DOWN = (503, {'error': 'unavailable'})
+
+@pytest.fixture
+def calendar_app(app, monkeypatch):
+    app.config.update(CALENDAR_MAX_RETRIES=2, CALENDAR_RETRY_BASE_DELAY=0.01, CALENDAR_RETRY_MAX_DELAY=5.0,
+                      CALENDAR_BREAKER_THRESHOLD=2, CALENDAR_BREAKER_RESET=60.0,
+                      CALENDAR_CONNECT_TIMEOUT=1.0, CALENDAR_READ_TIMEOUT=2.0)
+    resilience._breakers.clear()
+    resilience._metrics.clear()
+    resilience._last_known_good.clear()
+    sleeps = []
+    monkeypatch.setattr(resilience.time, 'sleep', sleeps.append)
+    with app.app_context():
+        yield sleeps
+
+def _get(server, path='/events', token='alice', **kwargs):
+    return resilience.request('stub', 'GET', server.url + path,
+                              headers={'Authorization': f'Bearer {token}'}, **kwargs)
+
+def test_retries_server_errors_then_succeeds(calendar_app, stub_server):
+    stub_server.add('GET', '/events', DOWN, (502, 'bad gateway'), OK)
+    response = _get(stub_server)
+    assert response.status_code == 200
+    assert stub_server.count('GET', '/events') == 3
+    assert len(calendar_app) == 2
+    assert resilience.get_metrics()['stub']['retries'] == 2
+
+def test_honours_retry_after_up_to_the_cap(calendar_app, stub_server):
+    stub_server.add('GET', '/events', (429, 'slow down', {'Retry-After': '3'}),
+                    (429, 'slow down', {'Retry-After': '120'}), OK)
+    assert _get(stub_server).status_code == 200
+    assert calendar_app == [3.0, 5.0]
+
+def test_post_is_only_replayed_when_the_provider_did_not_process_it(calendar_app, stub_server):
+    stub_server.add('POST', '/batch', (500, 'oops'))
+    assert resilience.request('stub', 'POST', stub_server.url + '/batch').status_code == 500
+    assert stub_server.count('POST', '/batch') == 1
+
+    stub_server.add('POST', '/batch', DOWN, OK)
+    assert resilience.request('stub', 'POST', stub_server.url + '/batch').status_code == 200
+    assert stub_server.count('POST', '/batch') == 3
+
+def test_breaker_opens_rejects_and_closes_after_a_good_trial(calendar_app, stub_server, app):
+    stub_server.add('GET', '/events', DOWN)
+    for _ in range(2):
+        assert _get(stub_server, use_fallback=False).status_code == 503
+    sent = stub_server.count('GET', '/events')
+    assert resilience.get_breaker('stub').state == 'open'
+
+    with pytest.raises(resilience.CircuitOpenError):
+        _get(stub_server)
+    assert stub_server.count('GET', '/events') == sent
+
+    resilience.get_breaker('stub').reset_timeout = 0
+    stub_server.add('GET', '/events', OK)
+    assert _get(stub_server).status_code == 200
+    assert resilience.get_breaker('stub').state == 'closed'
+
+def test_fallback_serves_the_last_good_response_for_the_same_credential(calendar_app, stub_server):
+    stub_server.add('GET', '/events', OK)
+    assert _get(stub_server, params={'day': '1'}).json() == {'value': ['event']}
+
+    stub_server.add('GET', '/events', DOWN)
+    stale = _get(stub_server, params={'day': '1'})
+    assert stale.status_code == 200 and stale.from_cache
+    assert stale.json() == {'value': ['event']}
+    # Another user's token never gets alice's events
+    assert _get(stub_server, token='bob', params={'day': '1'}).status_code == 503
+
+    assert resilience.get_breaker('stub').state == 'open'
+    assert _get(stub_server, params={'day': '1'}).from_cache
+    with pytest.raises(resilience.CircuitOpenError):
+        _get(stub_server, token='bob', params={'day': '1'})
+
+def test_explicit_credential_outlives_the_access_token(calendar_app, stub_server):
+    stub_server.add('GET', '/events', OK)
+    _get(stub_server, token='old-access-token', credential='refresh-token')
+    stub_server.add('GET', '/events', DOWN)
+    assert _get(stub_server, token='new-access-token', credential='refresh-token').from_cache
+
+def test_transport_errors_are_retried_then_fall_back(calendar_app, stub_server):
+    stub_server.add('GET', '/events', OK)
+    _get(stub_server)
+    url = stub_server.url
+    stub_server.stop()
+
+    stale = resilience.request('stub', 'GET', url + '/events', headers={'Authorization': 'Bearer alice'})
+    assert stale.from_cache
+    assert resilience.get_metrics()['stub']['connection_errors'] == 3
+    with pytest.raises(requests.exceptions.ConnectionError):
+        resilience.request('stub', 'GET', url + '/events', headers={'Authorization': 'Bearer bob'})
+
+def test_fallback_cache_is_bounded(calendar_app, stub_server, monkeypatch):
+    monkeypatch.setattr(resilience, 'LAST_KNOWN_GOOD_LIMIT', 3)
+    stub_server.add('GET', '/events', OK)
+    for day in range(5):
+        _get(stub_server, params={'day': str(day)})
+    assert [key[3] for key in resilience._last_known_good] == [(('day', '2'),), (('day', '3'),), (('day', '4'),)]
@@ -0,0 +1,32 @@
+# tests/test_serve.py
+
+import run
+from app import db
+from app.services import room_catalog
+from conftest import register_tenant
+
+def test_warm_up_builds_every_companys_room_catalog(sharded_app):
+    sharded_app.config['ROOM_CACHE_TYPE'] = 'simple'
+    clients = {key: register_tenant(sharded_app, key)[0] for key in ('a', 'b')}
+
+    before = room_catalog.get_stats()
+    run.warm_up(sharded_app)
+    after_warm_up = room_catalog.get_stats()
+    assert after_warm_up['misses'] - before['misses'] == 2
+
+    for key, client in clients.items():
+        response = client.get('/api/rooms')
+        assert [room['name'] for room in response.get_json()['rooms']] == [f'Room {key}']
+    after_requests = room_catalog.get_stats()
+    assert after_requests['misses'] == after_warm_up['misses']
+    assert after_requests['hits'] - after_warm_up['hits'] == 2
+
+def test_post_fork_replaces_the_pool_of_every_bind(sharded_app, monkeypatch):
+    monkeypatch.setattr(run, 'app', sharded_app, raising=False)
+    with sharded_app.app_context():
+        pools = {key: engine.pool for key, engine in db.engines.items()}
+    assert len(pools) == 3
+
+    run.post_fork(None, None)
+    with sharded_app.app_context():
+        assert all(engine.pool is not pools[key] for key, engine in db.engines.items())
@@ -0,0 +1,73 @@
+# tests/test_sharding.py
+
+import sqlite3
+from app.services import microsoft_calendar, outbound_sync
+from conftest import register_tenant
+
+WINDOW = {'start': '2026-11-02T00:00:00', 'end': '2026-11-09T00:00:00'}
+
+def test_feed_reads_each_tenants_own_shard(sharded_app, tmp_path):
+    clients = {key: register_tenant(sharded_app, key)[0] for key in ('a', 'b')}
+
+    placed = {}
+    for shard in ('eu', 'us'):
+        with sqlite3.connect(tmp_path / f'{shard}.db') as connection:
+            for (title,) in connection.execute('SELECT title FROM booking'):
+                placed[title] = shard
+    assert set(placed) == {'Meeting a', 'Meeting b'}
+    assert placed['Meeting a'] != placed['Meeting b']
+
+    for key, client in clients.items():
+        response = client.get('/api/calendar/feed', query_string=WINDOW)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['partial'] == []
+        assert [event['title'] for event in body['events']] == [f'Meeting {key}']
+
+def test_outbound_sync_worker_writes_to_the_bookings_shard(sharded_app, tmp_path, monkeypatch):
+    sharded_app.config.update(MICROSOFT_CALENDAR_ID='room@example.com', MICROSOFT_SYNC_ROOM_ID=1,
+                              OUTBOUND_SYNC_DELAY=0)
+    monkeypatch.setattr(microsoft_calendar, 'batch_write', lambda operations: [
+        {'status': 201, 'event_id': f'graph-{index}', 'error': None, 'retry_after': None}
+        for index, _ in enumerate(operations)])
+    outbound_sync.queue.background = False
+
+    _, room_id = register_tenant(sharded_app, 'a')
+    assert room_id == 1
+    assert len(outbound_sync.queue) == 1
+
+    # As the worker thread does: an app context without a request
+    with sharded_app.app_context():
+        assert outbound_sync.queue.drain() == 1
+
+    synced = {}
+    for shard in ('eu', 'us'):
+        with sqlite3.connect(tmp_path / f'{shard}.db') as connection:
+            synced.update(connection.execute(
+                'SELECT title, microsoft_calendar_event_id FROM booking').fetchall())
+    assert synced == {'Meeting a': 'graph-0'}
+
+def test_companies_on_other_shards_can_be_opened_edited_and_deleted(sharded_app, tmp_path):
+    client_a = register_tenant(sharded_app, 'a')[0]
+    register_tenant(sharded_app, 'b')
+    companies = {company['name']: company['id']
+                 for company in client_a.get('/api/companies/list').get_json()['companies']}
+    company_b = companies['Company b']
+
+    response = client_a.get(f'/api/companies/{company_b}')
+    assert response.status_code == 200
+    assert response.get_json()['company']['domain'] == 'b.example.com'
+
+    response = client_a.put(f'/api/companies/{company_b}', json={'name': 'Company B2', 'domain': '@b.example.com'})
+    assert response.status_code == 200, response.get_json()
+    assert client_a.get(f'/api/companies/{company_b}').get_json()['company']['name'] == 'Company B2'
+
+    response = client_a.delete(f'/api/companies/{company_b}')
+    assert response.status_code == 200, response.get_json()
+    assert client_a.get(f'/api/companies/{company_b}').status_code == 404
+    with sqlite3.connect(tmp_path / 'app.db') as connection:
+        assert connection.execute('SELECT company_id FROM company_shard WHERE company_id = ?',
+                                  (company_b,)).fetchall() == []
+
+    # The admin's own requests still go to their own shard
+    assert [event['title'] for event in client_a.get('/api/bookings').get_json()] == ['Meeting a']
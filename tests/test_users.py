@@ -0,0 +1,13 @@
+# tests/test_users.py
+
+from conftest import login
+
+def test_user_search_matches_name_or_email_within_the_company(app, two_companies):
+    client = login(app.test_client(), two_companies['a']['admin'])
+    response = client.get('/api/users?q=user@')
+    assert response.status_code == 200
+    assert [user['email'] for user in response.get_json()] == ['user@a.example.com']
+
+    response = client.get('/api/users?q=Admin&page=1')
+    assert response.status_code == 200
+    assert [user['email'] for user in response.get_json()['users']] == ['admin@a.example.com']